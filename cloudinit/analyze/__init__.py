@@ -3,12 +3,14 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import argparse
+import os
 import re
 import sys
 from datetime import datetime, timezone
 from typing import IO
 
-from cloudinit.analyze import dump, show
+from cloudinit import performance, settings
+from cloudinit.analyze import dump, show, trace
 from cloudinit.atomic_helper import json_dumps
 
 
@@ -110,6 +112,47 @@ def get_parser(parser=None):
         help="specify where to write output.",
     )
     parser_boot.set_defaults(action=("boot", analyze_boot))
+    parser_trace = subparsers.add_parser(
+        "trace", help="Summarize the performance trace of the last boot"
+    )
+    parser_trace.add_argument(
+        "-i",
+        "--infile",
+        action="store",
+        dest="infile",
+        default=os.path.join(settings.DEFAULT_RUN_DIR, performance.TRACE_FILE),
+        help="specify where to read input.",
+    )
+    parser_trace.add_argument(
+        "-o",
+        "--outfile",
+        action="store",
+        dest="outfile",
+        default="-",
+        help="specify where to write output.",
+    )
+    parser_trace.add_argument(
+        "-f",
+        "--format",
+        action="store",
+        dest="trace_format",
+        choices=["summary", "chrome"],
+        default="summary",
+        help=(
+            "summary: the costliest spans of each stage. chrome: a JSON"
+            " trace loadable by chrome://tracing or Perfetto."
+        ),
+    )
+    parser_trace.add_argument(
+        "-n",
+        "--top",
+        action="store",
+        dest="top",
+        type=int,
+        default=20,
+        help="number of spans reported per stage by the summary format.",
+    )
+    parser_trace.set_defaults(action=("trace", analyze_trace))
     return parser
 
 
@@ -271,6 +314,21 @@ def analyze_dump(name, args):
     clean_io(infh, outfh)
 
 
+def analyze_trace(name, args):
+    """Summarize the trace of Timed spans recorded during boot.
+
+    Unlike the other subcommands, this reads the structured trace written
+    by each boot stage rather than parsing cloud-init.log.
+    """
+    infh, outfh = configure_io(args)
+    events = trace.load_trace(infh)
+    if args.trace_format == "chrome":
+        outfh.write(json_dumps(trace.to_chrome(events)) + "\n")
+    else:
+        outfh.write(trace.summarize(events, top=args.top))
+    clean_io(infh, outfh)
+
+
 def _get_events(infile):
     rawdata = None
     events, rawdata = show.load_events_infile(infile)
@@ -0,0 +1,82 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Summarize the performance trace written by cloudinit.performance."""
+
+import json
+import logging
+from collections import OrderedDict
+from typing import IO, Dict, List
+
+LOG = logging.getLogger(__name__)
+
+
+def load_trace(infh: IO) -> List[dict]:
+    """Load trace events from a JSON lines trace file.
+
+    Lines which are not valid JSON objects, such as a last line truncated by
+    an interrupted stage, are skipped.
+    """
+    events = []
+    for lineno, line in enumerate(infh, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            LOG.debug("Skipping invalid trace event on line %d", lineno)
+            continue
+        if isinstance(event, dict):
+            events.append(event)
+    return events
+
+
+def to_chrome(events: List[dict]) -> dict:
+    """Return events as a Chrome trace-event JSON object.
+
+    The result can be loaded by chrome://tracing or https://ui.perfetto.dev
+    """
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _group_by_stage(events: List[dict]) -> Dict[str, List[dict]]:
+    stages: Dict[str, List[dict]] = OrderedDict()
+    for event in sorted(events, key=lambda e: e.get("ts", 0)):
+        stages.setdefault(event.get("cat", "unknown"), []).append(event)
+    return stages
+
+
+def summarize(events: List[dict], top: int = 20) -> str:
+    """Return a report of the costliest spans of each boot stage.
+
+    For example:
+      -- Stage init-local: 1.20400s, 36 spans --
+         00.80300s Running module config-growpart
+         00.40300s Loading yaml
+      -- Counters init-local --
+         url_helper.connections.new: 2
+    """
+    lines = []
+    stages = _group_by_stage(events)
+    for stage, stage_events in stages.items():
+        spans = [e for e in stage_events if e.get("ph") == "X"]
+        if spans:
+            start = min(e["ts"] for e in spans)
+            end = max(e["ts"] + e.get("dur", 0) for e in spans)
+            lines.append(
+                "-- Stage %s: %.5fs, %d spans --"
+                % (stage, (end - start) / 1e6, len(spans))
+            )
+            spans.sort(key=lambda e: e.get("dur", 0), reverse=True)
+            for span in spans[:top]:
+                lines.append(
+                    "   %09.5fs %s"
+                    % (span.get("dur", 0) / 1e6, span.get("name", ""))
+                )
+        counters = [e for e in stage_events if e.get("ph") == "C"]
+        if counters and counters[-1].get("args"):
+            lines.append("-- Counters %s --" % stage)
+            for key, value in sorted(counters[-1]["args"].items()):
+                lines.append("   %s: %s" % (key, value))
+    lines.append("%d stages analyzed" % len(stages))
+    return "\n".join(lines) + "\n"
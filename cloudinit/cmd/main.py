@@ -18,30 +18,29 @@ import os
 import sys
 import traceback
 import logging
-import yaml
-from typing import Optional, Tuple, Callable, Union
+from typing import TYPE_CHECKING, Optional, Tuple, Callable, Union
 
 from cloudinit import netinfo
 from cloudinit import signal_handler
 from cloudinit import sources
 from cloudinit import socket
 from cloudinit import stages
-from cloudinit import url_helper
 from cloudinit import util
 from cloudinit import performance
 from cloudinit import version
 from cloudinit import warnings
 from cloudinit import reporting
+from cloudinit import safeyaml
 from cloudinit import atomic_helper
 from cloudinit import lifecycle
 from cloudinit import handlers
+from cloudinit import importer
 from cloudinit.log import log_util, loggers
 from cloudinit.cmd.devel import read_cfg_paths
-from cloudinit.config import cc_set_hostname
-from cloudinit.config.modules import Modules
-from cloudinit.config.schema import validate_cloudconfig_schema
+from cloudinit.cmd.status import notify_status_waiters
 from cloudinit.lifecycle import log_with_downgradable_level
 from cloudinit.reporting import events
+from cloudinit.url_cache import UrlCache, get_cache_dir
 from cloudinit.settings import (
     PER_INSTANCE,
     PER_ALWAYS,
@@ -49,6 +48,16 @@ from cloudinit.settings import (
     CLOUD_CONFIG,
 )
 
+if TYPE_CHECKING:
+    from cloudinit.config.modules import Modules
+
+# Deferred so that commands such as status and query, which poll in tight
+# loops, don't import requests and jsonschema
+cc_set_hostname = importer.lazy_import("cloudinit.config.cc_set_hostname")
+modules = importer.lazy_import("cloudinit.config.modules")
+schema = importer.lazy_import("cloudinit.config.schema")
+url_helper = importer.lazy_import("cloudinit.url_helper")
+
 Reason = str
 
 # Welcome message template
@@ -135,7 +144,7 @@ def extract_fns(args):
     return fn_cfgs
 
 
-def run_module_section(mods: Modules, action_name, section):
+def run_module_section(mods: "Modules", action_name, section):
     full_section_name = MOD_SECTION_TPL % (section)
     (which_ran, failures) = mods.run_section(full_section_name)
     total_attempted = len(which_ran) + len(failures)
@@ -167,12 +176,19 @@ def parse_cmdline_url(cmdline, names=("cloud-config-url", "url")):
     raise KeyError("No keys (%s) found in string '%s'" % (cmdline, names))
 
 
-def attempt_cmdline_url(path, network=True, cmdline=None) -> Tuple[int, str]:
+def attempt_cmdline_url(
+    path,
+    network=True,
+    cmdline=None,
+    url_cache: Optional[UrlCache] = None,
+) -> Tuple[int, str]:
     """Write data from url referenced in command line to path.
 
     path: a file to write content to if downloaded.
     network: should network access be assumed.
     cmdline: the cmdline to parse for cloud-config-url.
+    url_cache: optional cache the url is revalidated against, so content
+        which didn't change since a previous boot isn't downloaded again.
 
     This is used in MAAS datasource, in "ephemeral" (read-only root)
     environment where the instance netboots to iscsi ro root.
@@ -225,7 +241,10 @@ def attempt_cmdline_url(path, network=True, cmdline=None) -> Tuple[int, str]:
     data = None
     header = b"#cloud-config"
     try:
-        resp = url_helper.read_file_or_url(**kwargs)
+        if url_cache is None:
+            resp = url_helper.read_file_or_url(**kwargs)
+        else:
+            resp = url_cache.fetch(**kwargs)
         sniffed_content = b""
         if resp.ok():
             is_cloud_cfg = True
@@ -264,6 +283,8 @@ def attempt_cmdline_url(path, network=True, cmdline=None) -> Tuple[int, str]:
                 "url '%s' returned code %s. Ignoring." % (url, resp.code),
             )
         data = sniffed_content + resp.contents
+        if url_cache is not None and isinstance(resp, url_helper.UrlResponse):
+            url_cache.store(url, resp.headers, data)
 
     except url_helper.UrlError as e:
         return (level, "retrieving url '%s' failed: %s" % (url, e))
@@ -280,7 +301,9 @@ def purge_cache_on_python_version_change(init):
     """Purge the cache if python version changed on us.
 
     There could be changes not represented in our cache (obj.pkl) after we
-    upgrade to a new version of python, so at that point clear the cache
+    upgrade to a new version of python, so at that point clear the cache.
+    The JSON datasource cache (obj.json) doesn't depend on the python
+    version, so when present only obj.pkl is removed.
     """
     current_python_version = "%d.%d" % (
         sys.version_info.major,
@@ -294,8 +317,15 @@ def purge_cache_on_python_version_change(init):
         # The Python version has changed out from under us, anything that was
         # pickled previously is likely useless due to API changes.
         if cached_python_version != current_python_version:
-            LOG.debug("Python version change detected. Purging cache")
-            init.purge_cache(True)
+            if os.path.exists(init.paths.get_ipath_cur("obj_json")):
+                LOG.debug(
+                    "Python version change detected. Purging pickled cache"
+                )
+                util.del_file(init.paths.get_ipath_cur("obj_pkl"))
+                init.purge_cache(False)
+            else:
+                LOG.debug("Python version change detected. Purging cache")
+                init.purge_cache(True)
             util.write_file(python_version_path, current_python_version)
     else:
         if os.path.exists(init.paths.get_ipath_cur("obj_pkl")):
@@ -341,7 +371,7 @@ def _should_wait_via_user_data(
         return True, "non-cloud-config user data found"
 
     try:
-        parsed_yaml = yaml.safe_load(raw_config)
+        parsed_yaml = safeyaml.load(raw_config)
     except Exception as e:
         log_with_downgradable_level(
             logger=LOG,
@@ -420,6 +450,7 @@ def main_init(name, args):
                 "%s.d" % CLOUD_CONFIG, "91_kernel_cmdline_url.cfg"
             ),
             network=not args.local,
+            url_cache=UrlCache(get_cache_dir(read_cfg_paths())),
         )
     ]
 
@@ -438,7 +469,11 @@ def main_init(name, args):
     # 11. Done!
     bootstage_name = "init-local" if args.local else "init"
     w_msg = welcome_format(bootstage_name)
-    init = stages.Init(ds_deps=deps, reporter=args.reporter)
+    init = stages.Init(
+        ds_deps=deps,
+        reporter=args.reporter,
+        previous_datasource=_get_previous_datasource(args),
+    )
     # Stage 1
     init.read_cfg(extract_fns(args))
     # Stage 2
@@ -509,6 +544,7 @@ def main_init(name, args):
     bring_up_interfaces = _should_bring_up_interfaces(init, args)
     try:
         init.fetch(existing=existing)
+        _handoff_datasource(args, init)
         # if in network mode, and the datasource is local
         # then work was done at that stage.
         if mode == sources.DSMODE_NETWORK and init.datasource.dsmode != mode:
@@ -629,8 +665,8 @@ def main_init(name, args):
     # Validate user-data adheres to schema definition
     cloud_cfg_path = init.paths.get_ipath_cur("cloud_config")
     if os.path.exists(cloud_cfg_path) and os.stat(cloud_cfg_path).st_size != 0:
-        validate_cloudconfig_schema(
-            config=yaml.safe_load(util.load_text_file(cloud_cfg_path)),
+        schema.validate_cloudconfig_schema(
+            config=safeyaml.load(util.load_text_file(cloud_cfg_path)),
             strict=False,
             log_details=False,
             log_deprecations=True,
@@ -641,7 +677,7 @@ def main_init(name, args):
     apply_reporting_cfg(init.cfg)
 
     # Stage 8 - re-read and apply relevant cloud-config to include user-data
-    mods = Modules(init, extract_fns(args), reporter=args.reporter)
+    mods = modules.Modules(init, extract_fns(args), reporter=args.reporter)
     # Stage 9
     try:
         outfmt_orig = outfmt
@@ -727,12 +763,17 @@ def main_modules(action_name, args):
     # 6. Done!
     bootstage_name = "%s:%s" % (action_name, name)
     w_msg = welcome_format(bootstage_name)
-    init = stages.Init(ds_deps=[], reporter=args.reporter)
+    init = stages.Init(
+        ds_deps=[],
+        reporter=args.reporter,
+        previous_datasource=_get_previous_datasource(args),
+    )
     # Stage 1
     init.read_cfg(extract_fns(args))
     # Stage 2
     try:
         init.fetch(existing="trust")
+        _handoff_datasource(args, init)
     except sources.DataSourceNotFoundException:
         # There was no datasource found, theres nothing to do
         msg = (
@@ -745,7 +786,7 @@ def main_modules(action_name, args):
             return [(msg)]
     _maybe_persist_instance_data(init)
     # Stage 3
-    mods = Modules(init, extract_fns(args), reporter=args.reporter)
+    mods = modules.Modules(init, extract_fns(args), reporter=args.reporter)
     # Stage 4
     try:
         if not args.skip_log_setup:
@@ -809,7 +850,7 @@ def main_single(name, args):
             return 1
     _maybe_persist_instance_data(init)
     # Stage 3
-    mods = Modules(init, extract_fns(args), reporter=args.reporter)
+    mods = modules.Modules(init, extract_fns(args), reporter=args.reporter)
     mod_args = args.module_args
     if mod_args:
         LOG.debug("Using passed in arguments %s", mod_args)
@@ -857,6 +898,7 @@ def status_wrapper(name, args):
     status_link = os.path.join(link_d, "status.json")
     result_path = os.path.join(data_d, "result.json")
     result_link = os.path.join(link_d, "result.json")
+    trace_path = os.path.join(link_d, performance.TRACE_FILE)
     root_logger = logging.getLogger()
 
     util.ensure_dirs(
@@ -899,7 +941,13 @@ def status_wrapper(name, args):
         }
     }
     if mode == "init-local":
-        for f in (status_link, result_link, status_path, result_path):
+        for f in (
+            status_link,
+            result_link,
+            status_path,
+            result_path,
+            trace_path,
+        ):
             util.del_file(f)
     else:
         try:
@@ -933,7 +981,9 @@ def status_wrapper(name, args):
     util.sym_link(
         os.path.relpath(status_path, link_d), status_link, force=True
     )
+    notify_status_waiters(link_d)
 
+    performance.start_trace(trace_path, mode)
     try:
         ret = functor(name, args)
         if mode in ("init", "init-local"):
@@ -984,6 +1034,8 @@ def status_wrapper(name, args):
 
         # Write status.json after running init / module code
         atomic_helper.write_json(status_path, status)
+        notify_status_waiters(link_d)
+        performance.stop_trace()
 
     if mode == "modules-final":
         # write the 'finished' file
@@ -999,6 +1051,7 @@ def status_wrapper(name, args):
         util.sym_link(
             os.path.relpath(result_path, link_d), result_link, force=True
         )
+        notify_status_waiters(link_d)
 
     return len(v1[mode]["errors"])
 
@@ -1280,9 +1333,45 @@ def main(sysv_args=None):
     return all_stages(parser)
 
 
+class StageHandoff:
+    """Objects passed on from one boot stage to the next in all_stages."""
+
+    def __init__(self):
+        self.datasource: Optional[sources.DataSource] = None
+
+
+def _get_previous_datasource(args) -> Optional[sources.DataSource]:
+    """Return the datasource fetched by the previous boot stage, if any."""
+    handoff = getattr(args, "handoff", None)
+    return handoff.datasource if handoff else None
+
+
+def _handoff_datasource(args, init: stages.Init):
+    """Pass on the fetched datasource to the next boot stage, if any."""
+    handoff = getattr(args, "handoff", None)
+    if handoff:
+        handoff.datasource = init.datasource
+
+
 def all_stages(parser):
-    """Run all stages in a single process using an ordering protocol."""
+    """Run all stages in a single process using an ordering protocol.
+
+    The datasource fetched by a stage is reused by the next stage rather
+    than restored from the datasource cache, unless the stage failed.
+    """
     LOG.info("Running cloud-init in single process mode.")
+    handoff = StageHandoff()
+
+    def run_stage(args):
+        args.handoff = handoff
+        exit_code = 1
+        try:
+            exit_code = sub_main(args)
+        finally:
+            if exit_code:
+                # The next stage restores the cache as a new process would
+                handoff.datasource = None
+        return exit_code
 
     # this _must_ be called before sd_notify is called otherwise netcat may
     # attempt to send "start" before a socket exists
@@ -1296,7 +1385,7 @@ def all_stages(parser):
         args = parser.parse_args(args=["init", "--local"])
         args.skip_log_setup = False
         # run local stage
-        sync.systemd_exit_code = sub_main(args)
+        sync.systemd_exit_code = run_stage(args)
 
     # wait for cloud-init-network.service to start
     with sync("network"):
@@ -1304,7 +1393,7 @@ def all_stages(parser):
         args = parser.parse_args(args=["init"])
         args.skip_log_setup = True
         # run init stage
-        sync.systemd_exit_code = sub_main(args)
+        sync.systemd_exit_code = run_stage(args)
 
     # wait for cloud-config.service to start
     with sync("config"):
@@ -1312,7 +1401,7 @@ def all_stages(parser):
         args = parser.parse_args(args=["modules", "--mode=config"])
         args.skip_log_setup = True
         # run config stage
-        sync.systemd_exit_code = sub_main(args)
+        sync.systemd_exit_code = run_stage(args)
 
     # wait for cloud-final.service to start
     with sync("final"):
@@ -1320,7 +1409,7 @@ def all_stages(parser):
         args = parser.parse_args(args=["modules", "--mode=final"])
         args.skip_log_setup = True
         # run final stage
-        sync.systemd_exit_code = sub_main(args)
+        sync.systemd_exit_code = run_stage(args)
 
     # signal completion to cloud-init-main.service
     if sync.experienced_any_error:
@@ -1399,6 +1488,9 @@ def sub_main(args):
         with performance.Timed(f"cloud-init stage: '{rname}'"):
             retval = functor(name, args)
     reporting.flush_events()
+    if "cloudinit.url_helper" in sys.modules:
+        # Don't import requests only to find there's nothing to close
+        url_helper.close_sessions()
 
     # handle return code for main_modules, as it is not wrapped by
     # status_wrapped when mode == init
@@ -20,20 +20,24 @@ import logging
 import os
 import sys
 from errno import EACCES
+from typing import List, Optional
 
-from cloudinit import atomic_helper, util
+from cloudinit import atomic_helper, importer, util
 from cloudinit.cmd.devel import read_cfg_paths
-from cloudinit.handlers.jinja_template import (
-    convert_jinja_instance_data,
-    get_jinja_variable_alias,
-    render_jinja_payload,
-)
+from cloudinit.helpers import Paths
+from cloudinit.instance_data_index import InstanceDataIndex, StaleIndexError
 from cloudinit.sources import REDACT_SENSITIVE_VALUE
-from cloudinit.templater import JinjaSyntaxParsingException
 
 NAME = "query"
 LOG = logging.getLogger(__name__)
 
+# jinja2 is only needed for --format and lookups missing from the index
+jinja_template = importer.lazy_import("cloudinit.handlers.jinja_template")
+templater = importer.lazy_import("cloudinit.templater")
+
+# Keys which _read_instance_data adds to instance-data from other files
+NOT_INDEXED_KEYS = ("userdata", "vendordata", "combined_cloud_config")
+
 
 def get_parser(parser=None):
     """Build or extend an arg parser for query utility.
@@ -109,6 +113,16 @@ def get_parser(parser=None):
         dest="dump_all",
         help="Dump all available instance-data",
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        action="store_true",
+        default=False,
+        help=(
+            "Read dot-delimited varnames from stdin, one per line, and print"
+            " a JSON object of their values"
+        ),
+    )
     parser.add_argument(
         "-f",
         "--format",
@@ -138,37 +152,41 @@ def load_userdata(ud_file_path):
         return util.decomp_gzip(bdata, quiet=False, decode=True)
 
 
-def _read_instance_data(instance_data, user_data, vendor_data) -> dict:
+def _get_instance_data_fn(instance_data: Optional[str], paths: Paths) -> str:
+    """Return the path of the instance-data file to query.
+
+    Non-root users get the redacted INSTANCE_JSON_FILE.
+    """
+    if instance_data:
+        return instance_data
+    redacted_data_fn = paths.get_runpath("instance_data")
+    if os.getuid() != 0:
+        return redacted_data_fn
+    sensitive_data_fn = paths.get_runpath("instance_data_sensitive")
+    if os.path.exists(sensitive_data_fn):
+        return sensitive_data_fn
+    LOG.warning(
+        "Missing root-readable %s. Using redacted %s instead.",
+        sensitive_data_fn,
+        redacted_data_fn,
+    )
+    return redacted_data_fn
+
+
+def _read_instance_data(
+    instance_data_fn, user_data, vendor_data, paths: Paths
+) -> dict:
     """Return a dict of merged instance-data, vendordata and userdata.
 
     The dict will contain supplemental userdata and vendordata keys sourced
     from default user-data and vendor-data files.
 
-    Non-root users will have redacted INSTANCE_JSON_FILE content and redacted
-    vendordata and userdata values.
+    Non-root users will have redacted vendordata and userdata values.
 
     :raise: IOError/OSError on absence of instance-data.json file or invalid
         access perms.
     """
     uid = os.getuid()
-    paths = read_cfg_paths()
-    if instance_data:
-        instance_data_fn = instance_data
-    else:
-        redacted_data_fn = paths.get_runpath("instance_data")
-        if uid == 0:
-            sensitive_data_fn = paths.get_runpath("instance_data_sensitive")
-            if os.path.exists(sensitive_data_fn):
-                instance_data_fn = sensitive_data_fn
-            else:
-                LOG.warning(
-                    "Missing root-readable %s. Using redacted %s instead.",
-                    sensitive_data_fn,
-                    redacted_data_fn,
-                )
-                instance_data_fn = redacted_data_fn
-        else:
-            instance_data_fn = redacted_data_fn
     if user_data:
         user_data_fn = user_data
     else:
@@ -252,7 +270,10 @@ def _find_instance_data_leaf_by_varname_path(
             response = response[key_path_part]
         else:  # We are an underscore_delimited key alias
             for key in response:
-                if get_jinja_variable_alias(key) == key_path_part:
+                if (
+                    jinja_template.get_jinja_variable_alias(key)
+                    == key_path_part
+                ):
                     response = response[key]
                     break
         if walked_key_path:
@@ -261,60 +282,53 @@ def _find_instance_data_leaf_by_varname_path(
     return response
 
 
-def handle_args(name, args):
-    """Handle calls to 'cloud-init query' as a subcommand."""
-    if not any([args.list_keys, args.varname, args.format, args.dump_all]):
-        LOG.error(
-            "Expected one of the options: --all, --format,"
-            " --list-keys or varname"
-        )
-        get_parser().print_help()
-        return 1
+def _read_indexed_instance_data(
+    instance_data_fn: str, varnames: List[str]
+) -> Optional[dict]:
+    """Return the value of each varname from the instance-data index.
+
+    Looking up varnames in the index avoids loading and converting all of
+    instance-data.
+
+    @return: dict of values by varname, or None when the index is absent or
+        stale or doesn't contain all varnames.
+    """
+    if any(varname.split(".")[0] in NOT_INDEXED_KEYS for varname in varnames):
+        return None
     try:
-        instance_data = _read_instance_data(
-            args.instance_data, args.user_data, args.vendor_data
-        )
-    except (IOError, OSError):
-        return 1
-    if args.format:
-        payload = "## template: jinja\n{fmt}".format(fmt=args.format)
-        try:
-            rendered_payload = render_jinja_payload(
-                payload=payload,
-                payload_fn="query command line",
-                instance_data=instance_data,
-                debug=True if args.debug else False,
-            )
-        except JinjaSyntaxParsingException as e:
-            LOG.error(
-                "Failed to render templated data. %s",
-                str(e),
-            )
-            return 1
-        if rendered_payload:
-            print(rendered_payload)
-            return 0
-        return 1
+        with InstanceDataIndex(instance_data_fn) as index:
+            return {varname: index.get(varname) for varname in varnames}
+    except (OSError, StaleIndexError, KeyError) as e:
+        LOG.debug("Not using instance-data index: %s", e)
+    return None
 
-    # If not rendering a structured format above, query output will be either:
-    #  - JSON dump of all instance-data/jinja variables
-    #  - JSON dump of a value at an dict path into the instance-data dict.
-    #  - a list of keys for a specific dict path into the instance-data dict.
-    response = convert_jinja_instance_data(instance_data)
-    if args.varname:
-        jinja_vars_with_aliases = convert_jinja_instance_data(
-            instance_data, include_key_aliases=True
-        )
+
+def _find_instance_data_leaves(instance_data: dict, varnames: List[str]):
+    """Return a dict of the value of each varname found in instance_data.
+
+    Errors are logged for varnames which aren't found.
+    """
+    jinja_vars_without_aliases = jinja_template.convert_jinja_instance_data(
+        instance_data
+    )
+    jinja_vars_with_aliases = jinja_template.convert_jinja_instance_data(
+        instance_data, include_key_aliases=True
+    )
+    responses = {}
+    for varname in varnames:
         try:
-            response = _find_instance_data_leaf_by_varname_path(
-                jinja_vars_without_aliases=response,
+            responses[varname] = _find_instance_data_leaf_by_varname_path(
+                jinja_vars_without_aliases=jinja_vars_without_aliases,
                 jinja_vars_with_aliases=jinja_vars_with_aliases,
-                varname=args.varname,
-                list_keys=args.list_keys,
+                varname=varname,
+                list_keys=False,
             )
         except (KeyError, ValueError) as e:
             LOG.error(e)
-            return 1
+    return responses
+
+
+def _print_response(args, response) -> int:
     if args.list_keys:
         if not isinstance(response, dict):
             LOG.error(
@@ -328,6 +342,80 @@ def handle_args(name, args):
     return 0
 
 
+def handle_args(name, args):
+    """Handle calls to 'cloud-init query' as a subcommand."""
+    if not any(
+        [args.list_keys, args.varname, args.format, args.dump_all, args.batch]
+    ):
+        LOG.error(
+            "Expected one of the options: --all, --batch, --format,"
+            " --list-keys or varname"
+        )
+        get_parser().print_help()
+        return 1
+    varnames = []
+    if args.batch:
+        if any([args.list_keys, args.varname, args.format, args.dump_all]):
+            LOG.error(
+                "--batch cannot be combined with --all, --format, --list-keys"
+                " or varname"
+            )
+            return 1
+        varnames = [line.strip() for line in sys.stdin if line.strip()]
+    elif args.varname and not args.format:
+        varnames = [args.varname]
+
+    try:
+        paths = read_cfg_paths()
+    except (IOError, OSError):
+        return 1
+    instance_data_fn = _get_instance_data_fn(args.instance_data, paths)
+    responses = None
+    if varnames:
+        responses = _read_indexed_instance_data(instance_data_fn, varnames)
+    if responses is None:
+        try:
+            instance_data = _read_instance_data(
+                instance_data_fn, args.user_data, args.vendor_data, paths
+            )
+        except (IOError, OSError):
+            return 1
+        if args.format:
+            payload = "## template: jinja\n{fmt}".format(fmt=args.format)
+            try:
+                rendered_payload = jinja_template.render_jinja_payload(
+                    payload=payload,
+                    payload_fn="query command line",
+                    instance_data=instance_data,
+                    debug=True if args.debug else False,
+                )
+            except templater.JinjaSyntaxParsingException as e:
+                LOG.error(
+                    "Failed to render templated data. %s",
+                    str(e),
+                )
+                return 1
+            if rendered_payload:
+                print(rendered_payload)
+                return 0
+            return 1
+        if not varnames:
+            # JSON dump of all instance-data/jinja variables, or their keys
+            return _print_response(
+                args, jinja_template.convert_jinja_instance_data(instance_data)
+            )
+        responses = _find_instance_data_leaves(instance_data, varnames)
+
+    if args.batch:
+        print(atomic_helper.json_dumps(responses))
+        return 0 if len(responses) == len(varnames) else 1
+    if args.varname not in responses:
+        return 1
+    # JSON dump of a value at a dict path into the instance-data dict, or
+    # a list of its keys
+    return _print_response(args, responses[args.varname])
+
+
 def main():
     """Tool to query specific instance-data values."""
     parser = get_parser()
@@ -15,7 +15,7 @@ from copy import deepcopy
 from time import gmtime, sleep, strftime
 from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
-from cloudinit import safeyaml, subp
+from cloudinit import safeyaml, socket, subp
 from cloudinit.cmd.devel import read_cfg_paths
 from cloudinit.distros import uses_systemd
 from cloudinit.helpers import Paths
@@ -23,6 +23,17 @@ from cloudinit.util import get_cmdline, load_json, load_text_file
 
 CLOUDINIT_DISABLED_FILE = "/etc/cloud/cloud-init.disabled"
 
+# Directory below the run dir in which `status --wait` listens for
+# notifications of status.json and result.json updates
+STATUS_WAITERS_DIR = "status-waiters"
+
+# Seconds between status checks when notifications are unavailable
+POLL_INTERVAL = 0.25
+
+# Seconds between status checks while waiting on notifications. Failures of
+# cloud-init's systemd units are never notified, so still check for them.
+NOTIFY_TIMEOUT = 5.0
+
 
 @enum.unique
 class RunningStatus(enum.Enum):
@@ -232,17 +243,23 @@ def handle_status_args(name, args) -> int:
     """Handle calls to 'cloud-init status' as a subcommand."""
     # Read configured paths
     paths = read_cfg_paths()
-    details = get_status_details(paths, args.wait)
     if args.wait:
-        while details.running_status in (
-            RunningStatus.NOT_STARTED,
-            RunningStatus.RUNNING,
-        ):
-            if args.format == "tabular":
-                sys.stdout.write(".")
-                sys.stdout.flush()
+        # Listen before reading the status so that no update is missed
+        with socket.Listener(
+            os.path.join(paths.run_dir, STATUS_WAITERS_DIR)
+        ) as listener:
             details = get_status_details(paths, args.wait)
-            sleep(0.25)
+            while details.running_status in (
+                RunningStatus.NOT_STARTED,
+                RunningStatus.RUNNING,
+            ):
+                if args.format == "tabular":
+                    sys.stdout.write(".")
+                    sys.stdout.flush()
+                wait_for_status_update(listener)
+                details = get_status_details(paths, args.wait)
+    else:
+        details = get_status_details(paths, args.wait)
 
     print_status(args, details)
 
@@ -255,6 +272,23 @@ def handle_status_args(name, args) -> int:
     return 0
 
 
+def wait_for_status_update(listener: socket.Listener):
+    """Block until the status may have changed.
+
+    Wake on notification from status_wrapper when listening succeeded,
+    otherwise poll.
+    """
+    if listener.bound:
+        listener.wait(NOTIFY_TIMEOUT)
+    else:
+        sleep(POLL_INTERVAL)
+
+
+def notify_status_waiters(run_dir: str):
+    """Wake any `cloud-init status --wait` listening in run_dir."""
+    socket.notify_listeners(os.path.join(run_dir, STATUS_WAITERS_DIR))
+
+
 def _disabled_via_environment(wait) -> bool:
     """Return whether cloud-init is disabled via environment variable."""
     try:
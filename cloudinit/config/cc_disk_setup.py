@@ -27,6 +27,7 @@ meta: MetaSchema = {
     "distros": [ALL_DISTROS],
     "frequency": PER_INSTANCE,
     "activate_by_schema_keys": ["disk_setup", "fs_setup"],
+    "writes": ["disks"],
 }
 
 
@@ -978,3 +979,5 @@ def mkfs(fs_cfg):
         subp.subp(fs_cmd, shell=shell)
     except Exception as e:
         raise RuntimeError("Failed to exec of '%s':\n%s" % (fs_cmd, e)) from e
+    finally:
+        util.clear_blkid_snapshot()
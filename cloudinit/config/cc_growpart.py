@@ -33,6 +33,7 @@ meta: MetaSchema = {
     "distros": [ALL_DISTROS],
     "frequency": frequency,
     "activate_by_schema_keys": [],
+    "writes": ["disks"],
 }
 
 DEFAULT_CONFIG = {
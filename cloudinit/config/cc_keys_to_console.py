@@ -26,6 +26,7 @@ meta: MetaSchema = {
     "distros": ["all"],
     "frequency": PER_INSTANCE,
     "activate_by_schema_keys": [],
+    "reads": ["ssh"],
 }
 
 LOG = logging.getLogger(__name__)
@@ -21,6 +21,7 @@ meta: MetaSchema = {
     "distros": ["all"],
     "frequency": PER_INSTANCE,
     "activate_by_schema_keys": [],
+    "writes": ["locale"],
 }
 
 LOG = logging.getLogger(__name__)
@@ -258,6 +258,7 @@ meta: MetaSchema = {
     "distros": distros,
     "frequency": PER_INSTANCE,
     "activate_by_schema_keys": ["ntp"],
+    "writes": ["ntp", "packages"],
 }
 
 
@@ -30,6 +30,7 @@ meta: MetaSchema = {
     "distros": [ALL_DISTROS],
     "frequency": PER_ALWAYS,
     "activate_by_schema_keys": [],
+    "writes": ["disks"],
 }
 
 LOG = logging.getLogger(__name__)
@@ -31,6 +31,8 @@ meta: MetaSchema = {
     "distros": [ALL_DISTROS],
     "frequency": PER_INSTANCE,
     "activate_by_schema_keys": [],
+    "reads": ["users"],
+    "writes": ["ssh"],
 }
 
 LOG = logging.getLogger(__name__)
@@ -21,6 +21,7 @@ meta: MetaSchema = {
     "distros": [ALL_DISTROS],
     "frequency": PER_INSTANCE,
     "activate_by_schema_keys": ["timezone"],
+    "writes": ["timezone"],
 }
 
 LOG = logging.getLogger(__name__)
@@ -16,6 +16,7 @@ from cloudinit.cloud import Cloud
 from cloudinit.config import Config
 from cloudinit.config.schema import MetaSchema
 from cloudinit.settings import PER_INSTANCE
+from cloudinit.url_cache import UrlCache, get_cache_dir
 
 DEFAULT_PERMS = 0o644
 DEFAULT_DEFER = False
@@ -46,7 +47,13 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
         )
         return
     ssl_details = util.fetch_ssl_details(cloud.paths)
-    write_files(name, filtered_files, cloud.distro.default_owner, ssl_details)
+    write_files(
+        name,
+        filtered_files,
+        cloud.distro.default_owner,
+        ssl_details,
+        url_cache=UrlCache(get_cache_dir(cloud.paths)),
+    )
 
 
 def canonicalize_extraction(encoding_type):
@@ -74,7 +81,13 @@ def canonicalize_extraction(encoding_type):
     return [TEXT_PLAIN_ENC]
 
 
-def write_files(name, files, owner: str, ssl_details: Optional[dict] = None):
+def write_files(
+    name,
+    files,
+    owner: str,
+    ssl_details: Optional[dict] = None,
+    url_cache: Optional[UrlCache] = None,
+):
     if not files:
         return
 
@@ -94,6 +107,7 @@ def write_files(name, files, owner: str, ssl_details: Optional[dict] = None):
             ssl_details,
             f_info.get("content", None),
             f_info.get("encoding", None),
+            url_cache,
         )
         if contents is None:
             LOG.warning(
@@ -135,7 +149,7 @@ def decode_perms(perm, default):
         return default
 
 
-def read_url_or_decode(source, ssl_details, content, encoding):
+def read_url_or_decode(source, ssl_details, content, encoding, url_cache=None):
     url = None if source is None else source.get("uri", None)
     use_url = bool(url)
     # Special case: empty URL and content. Write a blank file
@@ -147,7 +161,12 @@ def read_url_or_decode(source, ssl_details, content, encoding):
         try:
             # NOTE: These retry parameters are arbitrarily chosen defaults.
             # They have no significance, and may be changed if appropriate
-            result = url_helper.read_file_or_url(
+            fetch = (
+                url_helper.read_file_or_url
+                if url_cache is None
+                else url_cache.fetch
+            )
+            result = fetch(
                 url,
                 headers=source.get("headers", None),
                 retries=3,
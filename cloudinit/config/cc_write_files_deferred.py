@@ -13,6 +13,7 @@ from cloudinit.config.cc_write_files import DEFAULT_DEFER, write_files
 from cloudinit.config.schema import MetaSchema
 from cloudinit.distros import ALL_DISTROS
 from cloudinit.settings import PER_INSTANCE
+from cloudinit.url_cache import UrlCache, get_cache_dir
 
 meta: MetaSchema = {
     "id": "cc_write_files_deferred",
@@ -40,4 +41,10 @@ def handle(name: str, cfg: Config, cloud: Cloud, args: list) -> None:
         )
         return
     ssl_details = util.fetch_ssl_details(cloud.paths)
-    write_files(name, filtered_files, cloud.distro.default_owner, ssl_details)
+    write_files(
+        name,
+        filtered_files,
+        cloud.distro.default_owner,
+        ssl_details,
+        url_cache=UrlCache(get_cache_dir(cloud.paths)),
+    )
@@ -8,9 +8,10 @@
 
 import copy
 import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from inspect import signature
 from types import ModuleType
-from typing import Dict, List, NamedTuple, Optional
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
 
 from cloudinit import (
     config,
@@ -46,6 +47,22 @@ RENAMED_MODULES = {
     "cc_ubuntu_advantage": "cc_ubuntu_pro",  # Renamed 24.1
 }
 
+# System resources a module may declare in its meta "reads" and "writes"
+# lists. When module_concurrency allows it, modules run concurrently unless
+# one writes a resource the other reads or writes. Modules which declare
+# neither list never run concurrently with any other module.
+MODULE_RESOURCES = frozenset(
+    [
+        "disks",
+        "locale",
+        "ntp",
+        "packages",
+        "ssh",
+        "timezone",
+        "users",
+    ]
+)
+
 
 class ModuleDetails(NamedTuple):
     module: ModuleType
@@ -86,6 +103,62 @@ def validate_module(mod, name):
             f"Module '{mod}' with name '{name}' has a JSON 'schema' attribute "
             "defined. Please define schema in cloud-init-schema,json."
         )
+    for key in ("reads", "writes"):
+        unknown = set(mod.meta.get(key, [])).difference(MODULE_RESOURCES)
+        if unknown:
+            raise ValueError(
+                f"Module '{mod}' with name '{name}' has unknown resources "
+                f"in '{key}': {', '.join(sorted(unknown))}."
+            )
+
+
+ModuleResources = Optional[Tuple[FrozenSet[str], FrozenSet[str]]]
+
+
+def _get_resources(mod) -> ModuleResources:
+    """Return the (reads, writes) resources declared by a module.
+
+    None is returned when the module declares no resources.
+    """
+    meta = getattr(mod, "meta", None)
+    if not isinstance(meta, dict):
+        return None
+    if "reads" not in meta and "writes" not in meta:
+        return None
+    return (
+        frozenset(meta.get("reads", [])),
+        frozenset(meta.get("writes", [])),
+    )
+
+
+def _conflicts(first: ModuleResources, second: ModuleResources) -> bool:
+    if first is None or second is None:
+        return True
+    (first_reads, first_writes) = first
+    (second_reads, second_writes) = second
+    return bool(
+        first_writes & (second_reads | second_writes)
+        or second_writes & first_reads
+    )
+
+
+def get_module_dependencies(mostly_mods) -> List[Set[int]]:
+    """Return, for each module, the indexes of earlier modules it waits for.
+
+    A module waits for every earlier module in the list which it conflicts
+    with, so conflicting modules keep their configured order.
+    """
+    resources = [_get_resources(mod_details[0]) for mod_details in mostly_mods]
+    dependencies = []
+    for idx, mod_resources in enumerate(resources):
+        dependencies.append(
+            {
+                prior
+                for prior in range(idx)
+                if _conflicts(resources[prior], mod_resources)
+            }
+        )
+    return dependencies
 
 
 def _is_active(module_details: ModuleDetails, cfg: dict) -> bool:
@@ -253,59 +326,107 @@ class Modules:
             )
         return mostly_mods
 
+    def _run_module(self, cc, mod, name, freq, args) -> Optional[Exception]:
+        """Run a single module, returning the exception it failed with."""
+        try:
+            LOG.debug(
+                "Running module %s (%s) with frequency %s", name, mod, freq
+            )
+
+            # This name will affect the semaphore name created
+            run_name = f"config-{name}"
+
+            desc = "running %s with frequency %s" % (run_name, freq)
+            myrep = ReportEventStack(
+                name=run_name, description=desc, parent=self.reporter
+            )
+            func_args = {
+                "name": name,
+                "cfg": self.cfg,
+                "cloud": cc,
+                "args": args,
+            }
+
+            with myrep:
+                func_signature = signature(mod.handle)
+                func_params = func_signature.parameters
+                if len(func_params) == 5:
+                    lifecycle.deprecate(
+                        deprecated="Config modules with a `log` parameter",
+                        deprecated_version="23.2",
+                    )
+                    func_args.update({"log": LOG})
+
+                with performance.Timed(
+                    f"Running module {run_name}", log_mode="skip"
+                ) as timer:
+                    ran, _r = cc.run(
+                        run_name, mod.handle, func_args, freq=freq
+                    )
+                if ran:
+                    myrep.message = (
+                        f"{run_name} ran successfully and "
+                        f"took {timer.delta:.3f} seconds"
+                    )
+                else:
+                    myrep.message = "%s previously ran" % run_name
+
+        except Exception as e:
+            util.logexc(LOG, "Running module %s (%s) failed", name, mod)
+            return e
+        return None
+
+    def _run_modules_concurrently(
+        self, cc, mostly_mods, max_workers: int
+    ) -> List[Optional[Exception]]:
+        """Run modules in a thread pool as their dependencies complete.
+
+        See get_module_dependencies for how dependencies are determined.
+        """
+        dependencies = get_module_dependencies(mostly_mods)
+        errors: List[Optional[Exception]] = [None] * len(mostly_mods)
+        waiting = list(range(len(mostly_mods)))
+        finished: Set[int] = set()
+        running = {}
+        LOG.debug("Running modules with up to %s workers", max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while waiting or running:
+                for idx in list(waiting):
+                    if dependencies[idx].issubset(finished):
+                        waiting.remove(idx)
+                        future = executor.submit(
+                            self._run_module, cc, *mostly_mods[idx]
+                        )
+                        running[future] = idx
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = running.pop(future)
+                    errors[idx] = future.result()
+                    finished.add(idx)
+        return errors
+
     def _run_modules(self, mostly_mods: List[ModuleDetails]):
         cc = self.init.cloudify()
+        max_workers = util.get_cfg_option_int(
+            self.cfg, "module_concurrency", 1
+        )
+        if max_workers > 1 and len(mostly_mods) > 1:
+            errors = self._run_modules_concurrently(
+                cc, mostly_mods, max_workers
+            )
+        else:
+            errors = [
+                self._run_module(cc, *mod_details)
+                for mod_details in mostly_mods
+            ]
         # Return which ones ran
         # and which ones failed + the exception of why it failed
         failures = []
         which_ran = []
-        for mod, name, freq, args in mostly_mods:
-            try:
-                LOG.debug(
-                    "Running module %s (%s) with frequency %s", name, mod, freq
-                )
-
-                # Mark it as having started running
-                which_ran.append(name)
-                # This name will affect the semaphore name created
-                run_name = f"config-{name}"
-
-                desc = "running %s with frequency %s" % (run_name, freq)
-                myrep = ReportEventStack(
-                    name=run_name, description=desc, parent=self.reporter
-                )
-                func_args = {
-                    "name": name,
-                    "cfg": self.cfg,
-                    "cloud": cc,
-                    "args": args,
-                }
-
-                with myrep:
-                    func_signature = signature(mod.handle)
-                    func_params = func_signature.parameters
-                    if len(func_params) == 5:
-                        lifecycle.deprecate(
-                            deprecated="Config modules with a `log` parameter",
-                            deprecated_version="23.2",
-                        )
-                        func_args.update({"log": LOG})
-
-                    with performance.Timed("", log_mode="skip") as timer:
-                        ran, _r = cc.run(
-                            run_name, mod.handle, func_args, freq=freq
-                        )
-                    if ran:
-                        myrep.message = (
-                            f"{run_name} ran successfully and "
-                            f"took {timer.delta:.3f} seconds"
-                        )
-                    else:
-                        myrep.message = "%s previously ran" % run_name
-
-            except Exception as e:
-                util.logexc(LOG, "Running module %s (%s) failed", name, mod)
-                failures.append((name, e))
+        for (_mod, name, _freq, _args), error in zip(mostly_mods, errors):
+            which_ran.append(name)
+            if error is not None:
+                failures.append((name, error))
         return (which_ran, failures)
 
     def run_single(self, mod_name, args=None, freq=None):
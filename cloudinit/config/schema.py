@@ -12,7 +12,7 @@ from contextlib import suppress
 from copy import deepcopy
 from enum import Enum
 from errno import EACCES
-from functools import partial
+from functools import lru_cache, partial
 from typing import (
     TYPE_CHECKING,
     DefaultDict,
@@ -83,6 +83,8 @@ if TYPE_CHECKING:
         distros: typing.List[str]
         frequency: str
         activate_by_schema_keys: NotRequired[List[str]]
+        reads: NotRequired[List[str]]
+        writes: NotRequired[List[str]]
 
 else:
     MetaSchema = dict
@@ -438,11 +440,15 @@ def _oneOf(
         yield from all_deprecations
 
 
+@lru_cache()
 def get_jsonschema_validator():
     """Get metaschema validator and format checker
 
     Older versions of jsonschema require some compatibility changes.
 
+    N.B. This function is wrapped in functools.lru_cache, so the validator
+    class is only created once per process.
+
     @returns: Tuple: (jsonschema.Validator, FormatChecker)
     @raises: ImportError when jsonschema is not present
     """
@@ -705,7 +711,7 @@ def validate_cloudconfig_schema(
             schema_type = SchemaType.NETWORK_CONFIG_V2
         elif network_version == 1:
             schema_type = SchemaType.NETWORK_CONFIG_V1
-        schema = get_schema(schema_type)
+        schema = None
 
     if schema_type == SchemaType.NETWORK_CONFIG_V2:
         if netplan_validate_network_schema(
@@ -722,20 +728,22 @@ def validate_cloudconfig_schema(
             # adhere to cloud-init's network v2.
             return False
 
-    if schema is None:
-        schema = get_schema(schema_type)
     try:
-        (cloudinitValidator, FormatChecker) = get_jsonschema_validator()
+        if schema is None:
+            (schema, validator) = _get_schema_validator(schema_type)
+        else:
+            (cloudinitValidator, FormatChecker) = get_jsonschema_validator()
+            validator = cloudinitValidator(
+                schema, format_checker=FormatChecker()
+            )
         if strict_metaschema:
             validate_cloudconfig_metaschema(
-                cloudinitValidator, schema, throw=False
+                get_jsonschema_validator()[0], schema, throw=False
             )
     except ImportError:
         LOG.debug("Ignoring schema validation. jsonschema is not present")
         return False
 
-    validator = cloudinitValidator(schema, format_checker=FormatChecker())
-
     errors: SchemaProblems = []
     deprecations: SchemaProblems = []
     info_deprecations: SchemaProblems = []
@@ -1083,7 +1091,7 @@ def validate_cloudconfig_file(
         if annotate:
             cloudconfig, marks = safeyaml.load_with_marks(content)
         else:
-            cloudconfig = yaml.safe_load(content)
+            cloudconfig = safeyaml.load(content)
             marks = {}
     except yaml.YAMLError as e:
         line = column = 1
@@ -1198,6 +1206,21 @@ def get_schema(schema_type: SchemaType = SchemaType.CLOUD_CONFIG) -> dict:
     return full_schema
 
 
+@lru_cache()
+def _get_schema_validator(schema_type: SchemaType):
+    """Return the full schema for schema_type and a validator bound to it.
+
+    Cached per schema_type so the schema file is only parsed and the
+    validator only built once per process. Neither return value is handed to
+    callers of validate_cloudconfig_schema, so they are never mutated.
+
+    @raises: ImportError when jsonschema is not present
+    """
+    (cloudinitValidator, FormatChecker) = get_jsonschema_validator()
+    schema = get_schema(schema_type)
+    return (schema, cloudinitValidator(schema, format_checker=FormatChecker()))
+
+
 def get_parser(parser=None):
     """Return a parser for supported cmdline arguments."""
     if not parser:
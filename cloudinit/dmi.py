@@ -3,15 +3,19 @@ import logging
 import os
 import re
 from collections import namedtuple
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Optional, Pattern, Tuple
 
-from cloudinit import performance, subp
+from cloudinit import atomic_helper, performance, subp
+from cloudinit.settings import DEFAULT_RUN_DIR
 from cloudinit.util import (
     is_container,
     is_DragonFlyBSD,
     is_FreeBSD,
     is_OpenBSD,
     is_illumos,
+    load_json,
+    load_text_file,
 )
 
 LOG = logging.getLogger(__name__)
@@ -78,6 +82,93 @@ DMIDECODE_TO_KERNEL = {
 }
 
 
+# dmidecode(8) --string keywords and the (type, field) of the dmidecode
+# structure dump they are read from.
+DMIDECODE_STRING_FIELDS = {
+    "bios-vendor": (0, "Vendor"),
+    "bios-version": (0, "Version"),
+    "bios-release-date": (0, "Release Date"),
+    "system-manufacturer": (1, "Manufacturer"),
+    "system-product-name": (1, "Product Name"),
+    "system-version": (1, "Version"),
+    "system-serial-number": (1, "Serial Number"),
+    "system-uuid": (1, "UUID"),
+    "baseboard-manufacturer": (2, "Manufacturer"),
+    "baseboard-product-name": (2, "Product Name"),
+    "baseboard-version": (2, "Version"),
+    "baseboard-serial-number": (2, "Serial Number"),
+    "baseboard-asset-tag": (2, "Asset Tag"),
+    "chassis-manufacturer": (3, "Manufacturer"),
+    "chassis-version": (3, "Version"),
+    "chassis-serial-number": (3, "Serial Number"),
+    "chassis-asset-tag": (3, "Asset Tag"),
+}
+
+# Snapshot of the structures last dumped by smbios(1) or dmidecode(8), which
+# later boot stages read instead of running them again. DMI data doesn't
+# change while booted and the run dir doesn't persist across boots.
+DMI_SNAPSHOT_FILE = os.path.join(DEFAULT_RUN_DIR, "dmi-snapshot.json")
+
+SMBIOS_HEADER = re.compile(r"\(type (\d+)\)")
+SMBIOS_FIELD = re.compile(r"^  (\S[^:]*):\s*(.+?)\s*$")
+DMIDECODE_HEADER = re.compile(r"^Handle 0x[0-9A-Fa-f]+, DMI type (\d+),")
+DMIDECODE_FIELD = re.compile(r"^\t([^\t:][^:]*):\s*(.*?)\s*$")
+
+
+def _parse_dmi_dump(
+    out: str, header: Pattern, field: Pattern
+) -> Dict[str, Dict[str, str]]:
+    """Parse a dump of DMI structures into a table of fields by type.
+
+    Only the fields of the first structure of each type are kept, which are
+    those the per-key smbios and dmidecode queries report.
+    """
+    table: Dict[str, Dict[str, str]] = {}
+    fields: Optional[Dict[str, str]] = None
+    for line in out.splitlines():
+        match = header.search(line)
+        if match:
+            typ = match.group(1)
+            fields = None if typ in table else table.setdefault(typ, {})
+            continue
+        match = field.match(line)
+        if match and fields is not None:
+            fields.setdefault(match.group(1), match.group(2))
+    return table
+
+
+@lru_cache()
+def _get_dmi_snapshot(
+    cmd: Tuple[str, ...], header: Pattern, field: Pattern
+) -> Optional[Dict[str, Dict[str, str]]]:
+    """Return the DMI structures dumped by cmd, running it at most once.
+
+    The structures are cached in DMI_SNAPSHOT_FILE for later boot stages.
+
+    @return: None when cmd fails.
+    """
+    try:
+        snapshot = load_json(load_text_file(DMI_SNAPSHOT_FILE))
+        if snapshot.get("cmd") == list(cmd):
+            LOG.debug("Using DMI snapshot %s", DMI_SNAPSHOT_FILE)
+            return snapshot["table"]
+    except (OSError, KeyError, TypeError, ValueError):
+        pass
+    try:
+        out = subp.subp(list(cmd), rcs=[0]).stdout
+    except subp.ProcessExecutionError as e:
+        LOG.debug("failed DMI dump cmd: %s\n%s", cmd, e)
+        return None
+    table = _parse_dmi_dump(out, header, field)
+    try:
+        atomic_helper.write_json(
+            DMI_SNAPSHOT_FILE, {"cmd": list(cmd), "table": table}, mode=0o600
+        )
+    except OSError as e:
+        LOG.debug("Could not write DMI snapshot %s: %s", DMI_SNAPSHOT_FILE, e)
+    return table
+
+
 def _read_dmi_syspath(key: str) -> Optional[str]:
     """
     Reads dmi data from /sys/class/dmi/id
@@ -173,17 +264,10 @@ def _read_smbios(key: str) -> Optional[str]:
 
     LOG.debug(f"querying dmi data {typ}/{key}")
 
-    cmd = ['smbios', '-t', str(typ)]
-    try:
-        import re
-        (out, _err) = subp.subp(cmd, rcs=[0])
-        m = re.search(rf'^\s*{key}:\s*(.+)\s*$', out, re.MULTILINE)
-        if m:
-            return m.group(1)
-    except subp.ProcessExecutionError as e:
-        LOG.debug('failed smbios cmd: %s\n%s', cmd, e)
-
-    return None
+    table = _get_dmi_snapshot(("smbios",), SMBIOS_HEADER, SMBIOS_FIELD)
+    if table is None:
+        return None
+    return table.get(str(typ), {}).get(key)
 
 
 def _call_dmidecode(key: str, dmidecode_path: str) -> Optional[str]:
@@ -191,6 +275,19 @@ def _call_dmidecode(key: str, dmidecode_path: str) -> Optional[str]:
     Calls out to dmidecode to get the data out. This is mostly for supporting
     OS's without /sys/class/dmi/id support.
     """
+    if key in DMIDECODE_STRING_FIELDS:
+        typ, field = DMIDECODE_STRING_FIELDS[key]
+        table = _get_dmi_snapshot(
+            (dmidecode_path, "--type", "0,1,2,3"),
+            DMIDECODE_HEADER,
+            DMIDECODE_FIELD,
+        )
+        result = (table or {}).get(str(typ), {}).get(field)
+        if result is not None:
+            LOG.debug("dmidecode returned '%s' for '%s'", result, key)
+            if result.replace(".", "") == "":
+                return ""
+            return result
     try:
         cmd = [dmidecode_path, "--string", key]
         result = subp.subp(cmd).stdout.strip()
@@ -7,7 +7,7 @@ import re
 from errno import EACCES
 from typing import Optional, Type
 
-from cloudinit import handlers
+from cloudinit import handlers, util
 from cloudinit.atomic_helper import b64d, json_dumps
 from cloudinit.helpers import Paths
 from cloudinit.settings import PER_ALWAYS
@@ -17,7 +17,6 @@ from cloudinit.templater import (
     detect_template,
     render_string,
 )
-from cloudinit.util import load_json, load_text_file
 
 JUndefinedError: Type[Exception]
 try:
@@ -116,7 +115,7 @@ def render_jinja_payload_from_file(
             " present at %s" % instance_data_file
         )
     try:
-        instance_data = load_json(load_text_file(instance_data_file))
+        instance_data = util.load_json(util.load_text_file(instance_data_file))
     except Exception as e:
         msg = "Loading Jinja instance data failed"
         if isinstance(e, (IOError, OSError)):
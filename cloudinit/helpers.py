@@ -11,6 +11,7 @@
 import contextlib
 import logging
 import os
+import threading
 from configparser import NoOptionError, NoSectionError, RawConfigParser
 from io import StringIO
 from time import time
@@ -118,6 +119,28 @@ class Runners:
     def __init__(self, paths):
         self.paths = paths
         self.sems = {}
+        # Guards self.sems and self._run_locks, as config modules may be run
+        # from multiple threads
+        self._lock = threading.Lock()
+        self._run_locks = {}
+
+    def __getstate__(self):
+        # Locks can't be pickled, and distros holding runners are
+        state = self.__dict__.copy()
+        state.pop("_lock", None)
+        state.pop("_run_locks", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._run_locks = {}
+
+    def _get_run_lock(self, name):
+        with self._lock:
+            if name not in self._run_locks:
+                self._run_locks[name] = threading.Lock()
+            return self._run_locks[name]
 
     def _get_sem(self, freq):
         if freq == PER_ALWAYS or not freq:
@@ -134,9 +157,10 @@ class Runners:
             sem_path = self.paths.get_cpath("sem")
         if not sem_path:
             return None
-        if sem_path not in self.sems:
-            self.sems[sem_path] = FileSemaphores(sem_path)
-        return self.sems[sem_path]
+        with self._lock:
+            if sem_path not in self.sems:
+                self.sems[sem_path] = FileSemaphores(sem_path)
+            return self.sems[sem_path]
 
     def run(self, name, functor, args, freq=None, clear_on_fail=False):
         sem = self._get_sem(freq)
@@ -144,19 +168,22 @@ class Runners:
             sem = DummySemaphores()
         if not args:
             args = []
-        if sem.has_run(name, freq):
-            LOG.debug("%s already ran (freq=%s)", name, freq)
-            return (False, None)
-        with sem.lock(name, freq, clear_on_fail) as lk:
-            if not lk:
-                raise LockFailure("Failed to acquire lock for %s" % name)
-            else:
-                LOG.debug("Running %s using lock (%s)", name, lk)
-                if isinstance(args, (dict)):
-                    results = functor(**args)
+        # Checking and taking the semaphore must not interleave with another
+        # thread running the same name
+        with self._get_run_lock(canon_sem_name(name)):
+            if sem.has_run(name, freq):
+                LOG.debug("%s already ran (freq=%s)", name, freq)
+                return (False, None)
+            with sem.lock(name, freq, clear_on_fail) as lk:
+                if not lk:
+                    raise LockFailure("Failed to acquire lock for %s" % name)
                 else:
-                    results = functor(*args)
-                return (True, results)
+                    LOG.debug("Running %s using lock (%s)", name, lk)
+                    if isinstance(args, (dict)):
+                        results = functor(**args)
+                    else:
+                        results = functor(*args)
+                    return (True, results)
 
 
 class ConfigMerger:
@@ -334,9 +361,12 @@ class Paths(persistence.CloudInitPickleMixin):
             # file
             "instance_data_sensitive": "instance-data-sensitive.json",
             "combined_cloud_config": "combined-cloud-config.json",
+            # Datasources init --local did not detect this boot
+            "ds_detection": "ds-detection.json",
             "network_config": "network-config.json",
             "instance_id": ".instance-id",
             "manual_clean_marker": "manual-clean",
+            "obj_json": "obj.json",
             "obj_pkl": "obj.pkl",
             "scripts": "scripts",
             "sem": "sem",
@@ -377,6 +407,10 @@ class Paths(persistence.CloudInitPickleMixin):
             self.lookups["combined_cloud_config"] = (
                 "combined-cloud-config.json"
             )
+        if "obj_json" not in self.lookups:
+            self.lookups["obj_json"] = "obj.json"
+        if "ds_detection" not in self.lookups:
+            self.lookups["ds_detection"] = "ds-detection.json"
         if "hotplug.enabled" not in self.lookups:
             self.lookups["hotplug.enabled"] = "hotplug.enabled"
 
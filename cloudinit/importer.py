@@ -9,16 +9,59 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import importlib
+import sys
 from types import ModuleType
 from typing import Optional, Sequence
 
-from cloudinit import util
-
 
 def import_module(module_name: str) -> ModuleType:
     return importlib.import_module(module_name)
 
 
+class _LazyModule(ModuleType):
+    """Stand-in for a module which is only imported on first use.
+
+    Attribute reads, writes and deletes are forwarded to the real module, so
+    mock.patch through the stand-in patches the real module.
+    """
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__.get("_lazy_module")
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return "<lazy module %r>" % self.__name__
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    """Return module_name, deferring its import until an attribute is used.
+
+    Used at module level for dependencies which are expensive to import and
+    only needed on some code paths, so short-lived commands such as
+    `cloud-init status` don't pay for them. An already imported module is
+    returned as is.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    return _LazyModule(module_name)
+
+
 def _count_attrs(
     module_name: str, attrs: Optional[Sequence[str]] = None
 ) -> int:
@@ -41,6 +84,9 @@ def match_case_insensitive_module_name(mod_name: str) -> Optional[str]:
         mod_name = mod_name[:-4]
     if not mod_name.startswith("DataSource"):
         mod_name = f"DataSource{mod_name}"
+    # Avoid circular import, util lazily imports modules through importer
+    from cloudinit import util
+
     modules = {}
     spec = importlib.util.find_spec("cloudinit.sources")
     if spec and spec.submodule_search_locations:
@@ -0,0 +1,243 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Key path index of instance-data for `cloud-init query`.
+
+The index is written next to each instance-data file and lets query resolve
+a dot-delimited varname without loading and converting the whole
+instance-data file.
+
+An index file has three sections:
+
+1. A header line:
+   ``#cloud-init-instance-data-index <version> <mtime_ns> <size> <length>``
+   where mtime_ns and size describe the instance-data file the index was
+   built from and length is the byte length of the key path section.
+2. The key path section: one tab-separated ``<varname> <start> <end>`` line
+   for each varname query accepts, aliases included, sorted by varname.
+3. The values section: the jinja-converted instance-data, serialized as
+   JSON. start and end are the offsets of a varname's value in this section.
+"""
+
+import json
+import mmap
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+
+from cloudinit import atomic_helper
+
+INDEX_MAGIC = b"#cloud-init-instance-data-index"
+INDEX_VERSION = 1
+
+
+def get_index_path(instance_data_file: str) -> str:
+    """Return the path of the index of instance_data_file.
+
+    For example: /run/cloud-init/instance-data.json ->
+    /run/cloud-init/instance-data.idx
+    """
+    return os.path.splitext(instance_data_file)[0] + ".idx"
+
+
+def _serialize(
+    value: Any,
+    key_path: Tuple[str, ...],
+    buf: List[bytes],
+    offset: int,
+    spans: Dict[Tuple[str, ...], Tuple[int, int]],
+) -> int:
+    """Append the JSON of value to buf, recording the span of each node.
+
+    @return: offset after the serialized value
+    """
+    start = offset
+    if isinstance(value, dict):
+        buf.append(b"{")
+        offset += 1
+        for idx, (key, child) in enumerate(value.items()):
+            encoded_key = (
+                (b"," if idx else b"") + json.dumps(key).encode() + b":"
+            )
+            buf.append(encoded_key)
+            offset = _serialize(
+                child,
+                key_path + (key,),
+                buf,
+                offset + len(encoded_key),
+                spans,
+            )
+        buf.append(b"}")
+        offset += 1
+    else:
+        encoded = json.dumps(value, separators=(",", ":")).encode()
+        buf.append(encoded)
+        offset += len(encoded)
+    spans[key_path] = (start, offset)
+    return offset
+
+
+def _iter_varnames(
+    with_aliases: dict,
+    without_aliases: dict,
+    key_path: Tuple[str, ...],
+    varname: str,
+) -> Iterator[Tuple[str, Tuple[str, ...]]]:
+    """Yield (varname, key_path) for each varname query can resolve.
+
+    Mirrors the walk of cmd.query._find_instance_data_leaf_by_varname_path:
+    varnames are validated against the tree with key aliases, and resolve to
+    the key in the tree without aliases which matches or is aliased by each
+    varname component.
+    """
+    # Avoid circular import
+    from cloudinit.handlers.jinja_template import get_jinja_variable_alias
+
+    for part, child in with_aliases.items():
+        if not isinstance(part, str) or any(c in part for c in ".\t\n"):
+            # Never produced by splitting a varname on "."
+            continue
+        if part in without_aliases:
+            key = part
+        else:
+            key = next(
+                (
+                    k
+                    for k in without_aliases
+                    if get_jinja_variable_alias(k) == part
+                ),
+                None,
+            )
+            if key is None:
+                continue
+        part_varname = f"{varname}.{part}" if varname else part
+        yield part_varname, key_path + (key,)
+        if isinstance(child, dict) and isinstance(without_aliases[key], dict):
+            yield from _iter_varnames(
+                child, without_aliases[key], key_path + (key,), part_varname
+            )
+
+
+def write_index(instance_data_file: str, instance_data: dict, mode: int):
+    """Write the index of instance_data, as persisted in instance_data_file.
+
+    @param instance_data_file: path of the instance-data file just written
+    @param instance_data: the instance-data written to instance_data_file
+    @param mode: permissions of the index, which are those of
+        instance_data_file as the index contains all of its values
+    """
+    # Avoid circular import
+    from cloudinit.handlers.jinja_template import convert_jinja_instance_data
+
+    without_aliases = convert_jinja_instance_data(instance_data)
+    with_aliases = convert_jinja_instance_data(
+        instance_data, include_key_aliases=True
+    )
+    values: List[bytes] = []
+    spans: Dict[Tuple[str, ...], Tuple[int, int]] = {}
+    _serialize(without_aliases, (), values, 0, spans)
+    key_paths = sorted(
+        (
+            f"{varname}\t{spans[key_path][0]}\t{spans[key_path][1]}\n".encode()
+            for varname, key_path in _iter_varnames(
+                with_aliases, without_aliases, (), ""
+            )
+        )
+    )
+    key_path_section = b"".join(key_paths)
+    # Within a write transaction, instance_data_file may only be staged yet.
+    # Renaming it into place keeps its mtime and size.
+    transaction = atomic_helper.get_transaction()
+    if transaction is not None:
+        source_stat = os.stat(transaction.staged_path(instance_data_file))
+    else:
+        source_stat = os.stat(instance_data_file)
+    header = b"%s %d %d %d %d\n" % (
+        INDEX_MAGIC,
+        INDEX_VERSION,
+        source_stat.st_mtime_ns,
+        source_stat.st_size,
+        len(key_path_section),
+    )
+    atomic_helper.write_file(
+        get_index_path(instance_data_file),
+        header + key_path_section + b"".join(values),
+        mode=mode,
+    )
+
+
+class StaleIndexError(ValueError):
+    """The index is invalid or doesn't describe its instance-data file."""
+
+
+class InstanceDataIndex:
+    """Read-only view of an instance-data index.
+
+    :raises: OSError when the index cannot be read.
+    :raises: StaleIndexError when the index is of another format version or
+        the instance-data file changed since the index was written.
+    """
+
+    def __init__(self, instance_data_file: str):
+        with open(get_index_path(instance_data_file), "rb") as stream:
+            header = stream.readline()
+            try:
+                magic, version, mtime_ns, size, length = header.split()
+                version, mtime_ns, size, length = (
+                    int(version),
+                    int(mtime_ns),
+                    int(size),
+                    int(length),
+                )
+            except ValueError as e:
+                raise StaleIndexError("Invalid index header") from e
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise StaleIndexError(f"Unsupported index version: {header!r}")
+            source_stat = os.stat(instance_data_file)
+            if (source_stat.st_mtime_ns, source_stat.st_size) != (
+                mtime_ns,
+                size,
+            ):
+                raise StaleIndexError(
+                    f"{instance_data_file} changed since it was indexed"
+                )
+            self._mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self._key_paths_start = len(header)
+        self._values_start = self._key_paths_start + length
+
+    def _find(self, varname: bytes):
+        """Binary search the sorted key path lines for varname."""
+        lo, hi = self._key_paths_start, self._values_start
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # lo always is the start of a line
+            line_start = max(lo, self._mmap.rfind(b"\n", lo, mid) + 1)
+            line_end = self._mmap.find(b"\n", line_start, hi)
+            name, start, end = self._mmap[line_start:line_end].split(b"\t")
+            if name == varname:
+                return int(start), int(end)
+            if name < varname:
+                lo = line_end + 1
+            else:
+                hi = line_start
+        return None
+
+    def get(self, varname: str) -> Any:
+        """Return the value of a dot-delimited varname.
+
+        :raises: KeyError when varname isn't indexed.
+        """
+        span = self._find(varname.encode())
+        if span is None:
+            raise KeyError(varname)
+        start, end = span
+        return json.loads(
+            self._mmap[self._values_start + start : self._values_start + end]
+        )
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
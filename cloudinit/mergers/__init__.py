@@ -4,6 +4,7 @@
 #
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import functools
 import re
 
 from cloudinit import importer, type_utils
@@ -13,6 +14,8 @@ NAME_MTCH = re.compile(r"(^[a-zA-Z_][A-Za-z0-9_]*)\((.*?)\)$")
 DEF_MERGE_TYPE = "list()+dict()+str()"
 MERGER_PREFIX = "m_"
 MERGER_ATTR = "Merger"
+# Most merger plans (constructed mergers) kept for reuse
+MERGER_PLAN_CACHE_SIZE = 32
 
 
 class UnknownMerger:
@@ -126,6 +129,22 @@ def default_mergers():
 
 
 def construct(parsed_mergers):
+    # Mergers hold no state besides their options, so the mergers built for
+    # a specification can be shared by every merge using it.
+    try:
+        key = tuple((m_name, tuple(m_ops)) for m_name, m_ops in parsed_mergers)
+        hash(key)
+    except TypeError:
+        return _construct(parsed_mergers)
+    return _construct_cached(key)
+
+
+@functools.lru_cache(maxsize=MERGER_PLAN_CACHE_SIZE)
+def _construct_cached(parsed_mergers):
+    return _construct(parsed_mergers)
+
+
+def _construct(parsed_mergers):
     mergers_to_be = []
     for m_name, m_ops in parsed_mergers:
         if not m_name.startswith(MERGER_PREFIX):
@@ -150,3 +169,41 @@ def construct(parsed_mergers):
     for attr, opts in mergers_to_be:
         mergers.append(attr(root, opts))
     return root
+
+
+def _merge_default_list(value, merge_with):
+    # The list merger with the default "replace" method and no recursion
+    if not isinstance(merge_with, (tuple, list)):
+        return merge_with
+    merged_list = list(value)
+    common_len = min(len(merged_list), len(merge_with))
+    merged_list[:common_len] = merge_with[:common_len]
+    return merged_list
+
+
+def merge_default(value, merge_with):
+    """Merge merge_with into value as construct(default_mergers()) would.
+
+    This is a single recursive pass over merge_with which doesn't look up
+    the merger method of each value: keys missing from value are added,
+    dicts found under the same key are merged recursively and other values
+    of value are kept.
+    """
+    type_name = type_utils.obj_name(value).lower()
+    if type_name == "dict":
+        if not isinstance(merge_with, dict):
+            return value
+        merged = dict(value)
+        for k, v in merge_with.items():
+            if k not in merged:
+                merged[k] = v
+            elif isinstance(v, dict):
+                merged[k] = merge_default(merged[k], v)
+        return merged
+    if type_name == "list":
+        return _merge_default_list(value, merge_with)
+    if type_name == "tuple":
+        return tuple(_merge_default_list(list(value), merge_with))
+    if type_name in ("str", "unicode"):
+        return merge_with
+    return value
@@ -5,13 +5,18 @@
 import contextlib
 import logging
 from functools import partial
-from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+from typing import Any, Callable, Dict, List, Literal, Optional, Set, Tuple
 
 import cloudinit.net as net
 import cloudinit.netinfo as netinfo
 from cloudinit.net.dhcp import NoDHCPLeaseError, maybe_perform_dhcp_discovery
 from cloudinit.subp import ProcessExecutionError
-from cloudinit.url_helper import UrlError, wait_for_url
+from cloudinit.url_helper import (
+    UrlError,
+    discard_session,
+    get_session_hosts,
+    wait_for_url,
+)
 
 from cloudinit.util import is_illumos
 
@@ -76,6 +81,8 @@ class EphemeralIPv4Network:
         self.interface_addrs_before_dhcp = interface_addrs_before_dhcp.get(
             self.interface, {}
         )
+        # Hosts with a keep-alive session before the network was set up
+        self.session_hosts_before: Set[str] = set()
 
     def __enter__(self):
         """Set up ephemeral network if interface is not connected.
@@ -83,7 +90,7 @@ class EphemeralIPv4Network:
         This context manager handles the lifecycle of the network interface,
         addresses, routes, etc
         """
-
+        self.session_hosts_before = get_session_hosts()
         try:
             try:
                 self._bringup_device()
@@ -115,6 +122,10 @@ class EphemeralIPv4Network:
 
     def __exit__(self, excp_type, excp_value, excp_traceback):
         """Teardown anything we set up."""
+        # Keep-alive connections opened meanwhile are bound to the ephemeral
+        # address. Sessions of other hosts may still be used by other threads.
+        for host in get_session_hosts() - self.session_hosts_before:
+            discard_session(host)
         for cmd in self.cleanup_cmds:
             cmd()
 
@@ -1,9 +1,135 @@
+import collections
 import functools
+import json
 import logging
+import os
+import threading
 import time
+from typing import Dict, List, Optional
 
 LOG = logging.getLogger(__name__)
 
+# Name of the trace file written to the run directory by each boot stage
+TRACE_FILE = "trace.jsonl"
+
+_counters: collections.Counter = collections.Counter()
+_counters_lock = threading.Lock()
+
+
+def increment(name: str, value: int = 1) -> None:
+    """Increment the performance counter 'name' by 'value'.
+
+    Counters are process-wide and safe to update from multiple threads.
+    """
+    with _counters_lock:
+        _counters[name] += value
+
+
+def get_counters() -> Dict[str, int]:
+    """Return a snapshot of all performance counters."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def reset_counters() -> None:
+    """Reset all performance counters."""
+    with _counters_lock:
+        _counters.clear()
+
+
+class _Trace:
+    """Append trace events for spans measured by Timed to a file.
+
+    Each line of the file is one event in the Chrome trace-event format, so
+    the file can be summarized by 'cloud-init analyze trace' or converted
+    to a JSON array loadable by chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, path: str, stage: str):
+        self.path = path
+        self.stage = stage
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8")
+        self._local = threading.local()
+
+    def _stack(self) -> List["Timed"]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def push(self, timer: "Timed") -> None:
+        self._stack().append(timer)
+
+    def pop(self, timer: "Timed") -> None:
+        stack = self._stack()
+        if timer in stack:
+            stack.remove(timer)
+        args = {"stage": self.stage, "depth": len(stack)}
+        if stack:
+            args["parent"] = stack[-1].msg
+        self.write(
+            {
+                "name": timer.msg,
+                "cat": self.stage,
+                "ph": "X",
+                "ts": int(timer.start_time * 1e6),
+                "dur": int(timer.delta * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": args,
+            }
+        )
+
+    def write(self, event: dict) -> None:
+        line = json.dumps(event, sort_keys=True) + "\n"
+        with self._lock:
+            # Spans may outlive the trace they were started in
+            if not self._fh.closed:
+                self._fh.write(line)
+
+    def close(self) -> None:
+        self.write(
+            {
+                "name": "counters",
+                "cat": self.stage,
+                "ph": "C",
+                "ts": int(time.time() * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": get_counters(),
+            }
+        )
+        with self._lock:
+            self._fh.close()
+
+
+_trace: Optional[_Trace] = None
+
+
+def start_trace(path: str, stage: str) -> None:
+    """Record every Timed span to the trace file at 'path'.
+
+    Events are appended, so successive boot stages share a single trace.
+
+    :param path: The trace file to append to.
+    :param stage: The boot stage name recorded with each event.
+    """
+    global _trace
+    stop_trace()
+    try:
+        _trace = _Trace(path, stage)
+    except OSError as e:
+        LOG.warning("Unable to write performance trace %s: %s", path, e)
+
+
+def stop_trace() -> None:
+    """Stop recording Timed spans and close the trace file."""
+    global _trace
+    trace, _trace = _trace, None
+    if trace is not None:
+        trace.close()
+
 
 class Timed:
     """
@@ -20,6 +146,9 @@ class Timed:
             'output' and 'delta' attributes, respectively. Used to manually
             coalesce with other logs at the call site.
 
+    When a trace has been started with start_trace(), every context is also
+    recorded as a span in the trace, regardless of log_mode.
+
     usage:
 
         this call:
@@ -46,14 +175,22 @@ class Timed:
         self.log_mode = log_mode
         self.output = ""
         self.start = 0.0
+        self.start_time = 0.0
         self.delta = 0.0
+        self._trace: Optional[_Trace] = None
 
     def __enter__(self):
+        self._trace = _trace
+        if self._trace:
+            self.start_time = time.time()
+            self._trace.push(self)
         self.start = time.monotonic()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.delta = time.monotonic() - self.start
+        if self._trace:
+            self._trace.pop(self)
         suffix = f"took {self.delta:.3f} seconds"
         if "always" == self.log_mode:
             LOG.debug("%s %s", self.msg, suffix)
@@ -14,11 +14,13 @@ from datetime import datetime, timezone
 from threading import Event
 from typing import Union
 
-from cloudinit import performance, url_helper, util
+from cloudinit import importer, performance, util
 from cloudinit.registry import DictRegistry
 
 LOG = logging.getLogger(__name__)
 
+url_helper = importer.lazy_import("cloudinit.url_helper")
+
 
 class ReportException(Exception):
     pass
@@ -70,6 +72,24 @@ class PrintHandler(ReportingHandler):
 
 
 class WebHookHandler(ReportingHandler):
+    """POST events to a web server.
+
+    Events are posted in the background over the keep-alive session of the
+    endpoint's host. By default each event is POSTed on its own as a JSON
+    object. When batch_size is greater than 1, up to batch_size queued
+    events are POSTed together as a JSON array, waiting up to
+    batch_interval seconds, or until flush(), for the events of a batch to be
+    published.
+
+    When max_queue_size is set, publishing an event blocks while the queue
+    is full, unless recent POSTs failed, in which case the event is dropped.
+    """
+
+    # Consecutive failed POSTs after which the endpoint is considered down
+    MAX_CONSECUTIVE_FAILURES = 3
+    # Queued by flush() to post a pending batch without waiting
+    FLUSH_MARKER = object()
+
     def __init__(
         self,
         endpoint,
@@ -79,6 +99,9 @@ class WebHookHandler(ReportingHandler):
         consumer_secret=None,
         timeout=None,
         retries=None,
+        batch_size=1,
+        batch_interval=0,
+        max_queue_size=0,
     ):
         super(WebHookHandler, self).__init__()
 
@@ -95,18 +118,51 @@ class WebHookHandler(ReportingHandler):
         self.endpoint = endpoint
         self.timeout = timeout
         self.retries = retries
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
         self.ssl_details = util.fetch_ssl_details()
+        self.consecutive_failed = 0
 
         self.flush_requested = Event()
-        self.queue: queue.Queue = queue.Queue()
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
         self.event_processor = threading.Thread(target=self.process_requests)
         self.event_processor.daemon = True
         self.event_processor.start()
 
+    def _get_batch(self) -> list:
+        """Block for the next queued event and batch those following it.
+
+        A batch ends early when flush() queues FLUSH_MARKER.
+        """
+        batch: list = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if deadline is None:
+                    args = self.queue.get(block=True)
+                else:
+                    remaining = deadline - time.monotonic()
+                    args = self.queue.get(
+                        block=remaining > 0, timeout=max(remaining, 0)
+                    )
+            except queue.Empty:
+                break
+            if args is self.FLUSH_MARKER:
+                self.queue.task_done()
+                if batch:
+                    break
+                continue
+            batch.append(args)
+            if deadline is None:
+                deadline = time.monotonic() + self.batch_interval
+        return batch
+
     def process_requests(self):
-        consecutive_failed = 0
         while True:
-            if self.flush_requested.is_set() and consecutive_failed > 2:
+            if (
+                self.flush_requested.is_set()
+                and self.consecutive_failed >= self.MAX_CONSECUTIVE_FAILURES
+            ):
                 # At this point the main thread is waiting for the queue to
                 # drain. If we have a queue of events piled up and recent
                 # events have failed, lets not waste time trying to post
@@ -119,27 +175,33 @@ class WebHookHandler(ReportingHandler):
                 while not self.queue.empty():
                     self.queue.get_nowait()
                     self.queue.task_done()
-                consecutive_failed = 0
-            args = self.queue.get(block=True)
+                self.consecutive_failed = 0
+            batch = self._get_batch()
+            args = batch[0]
+            if self.batch_size > 1:
+                data = "[%s]" % ",".join(event_args[1] for event_args in batch)
+            else:
+                data = args[1]
             try:
                 self.readurl(
                     args[0],
-                    data=args[1],
+                    data=data,
                     timeout=args[2],
                     retries=args[3],
                     ssl_details=args[4],
                     log_req_resp=False,
                 )
-                consecutive_failed = 0
+                self.consecutive_failed = 0
             except Exception as e:
                 LOG.warning(
                     "Failed posting event: %s. This was caused by: %s",
-                    args[1],
+                    data,
                     e,
                 )
-                consecutive_failed += 1
+                self.consecutive_failed += 1
             finally:
-                self.queue.task_done()
+                for _ in batch:
+                    self.queue.task_done()
 
     def publish_event(self, event):
         event_data = event.as_dict()
@@ -148,19 +210,29 @@ class WebHookHandler(ReportingHandler):
             self.endpoint,
             event_data,
         )
-        self.queue.put(
-            (
-                self.endpoint,
-                json.dumps(event_data),
-                self.timeout,
-                self.retries,
-                self.ssl_details,
+        try:
+            self.queue.put(
+                (
+                    self.endpoint,
+                    json.dumps(event_data),
+                    self.timeout,
+                    self.retries,
+                    self.ssl_details,
+                ),
+                block=(
+                    self.consecutive_failed < self.MAX_CONSECUTIVE_FAILURES
+                ),
+            )
+        except queue.Full:
+            LOG.warning(
+                "WebHookHandler queue is full. Dropping event: %s", event_data
             )
-        )
 
     def flush(self):
         self.flush_requested.set()
         LOG.debug("WebHookHandler flushing remaining events")
+        if self.batch_size > 1:
+            self.queue.put(self.FLUSH_MARKER)
         self.queue.join()
         self.flush_requested.clear()
 
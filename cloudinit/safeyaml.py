@@ -15,6 +15,10 @@ from cloudinit import performance
 
 LOG = logging.getLogger(__name__)
 
+# The libyaml based loader is many times faster, but PyYAML may be built
+# without libyaml
+FastSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 # SchemaPathMarks track the path to an element within a loaded YAML file.
 # The start_mark and end_mark contain the row and column indicators
@@ -235,6 +239,23 @@ class _CustomSafeLoaderWithMarks(yaml.SafeLoader):
         return data
 
 
+def load(blob) -> Any:
+    """Return the YAML document in blob, loaded like yaml.safe_load.
+
+    libyaml is used when available. When it fails, the pure Python loader
+    tries again, so that errors and their marks are those of
+    yaml.safe_load.
+
+    Use load_with_marks instead when the line of each key is needed.
+    """
+    try:
+        return yaml.load(blob, Loader=FastSafeLoader)
+    except yaml.YAMLError:
+        if FastSafeLoader is yaml.SafeLoader:
+            raise
+    return yaml.safe_load(blob)
+
+
 class NoAliasSafeDumper(yaml.dumper.SafeDumper):
     """A class which avoids constructing anchors/aliases on yaml dump"""
 
@@ -2,6 +2,7 @@
 """A module for common socket helpers."""
 import logging
 import os
+import select
 import socket
 import sys
 from contextlib import suppress
@@ -39,6 +40,101 @@ def sd_notify(message: str):
         sock.sendall(message.encode("ascii"))
 
 
+def notify_listeners(socket_dir: str, message: str = "changed"):
+    """Send a message to each Listener bound in socket_dir.
+
+    Sockets left behind by listeners which exited uncleanly are removed.
+
+    :param socket_dir: directory in which listeners bind their sockets
+    :param message: notification message (must be valid ascii)
+    """
+    try:
+        names = os.listdir(socket_dir)
+    except OSError:
+        # nobody is listening
+        return
+    with socket.socket(
+        socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC
+    ) as sock:
+        sock.setblocking(False)
+        for name in names:
+            socket_path = os.path.join(socket_dir, name)
+            try:
+                sock.sendto(message.encode("ascii"), socket_path)
+            except ConnectionRefusedError:
+                LOG.debug("Removing stale listener socket %s", socket_path)
+                with suppress(OSError):
+                    os.remove(socket_path)
+            except OSError as e:
+                # A full receive queue means the listener has yet to wake
+                # for an earlier notification, so nothing is lost.
+                LOG.debug("Unable to notify %s: %s", socket_path, e)
+
+
+class Listener:
+    """Wait for notifications sent by notify_listeners.
+
+    A socket named after the current process is bound in socket_dir. When it
+    cannot be bound, for example because the current user may not write to
+    socket_dir, the listener is not bound and callers need to poll instead.
+    """
+
+    def __init__(self, socket_dir: str):
+        self.socket_path = os.path.join(socket_dir, f"{os.getpid()}.sock")
+        self.sock = None
+        sock = socket.socket(
+            socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC
+        )
+        try:
+            os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+            with suppress(FileNotFoundError):
+                os.remove(self.socket_path)
+            sock.bind(self.socket_path)
+        except OSError as e:
+            LOG.debug(
+                "Unable to listen for notifications on %s: %s",
+                self.socket_path,
+                e,
+            )
+            sock.close()
+        else:
+            self.sock = sock
+
+    @property
+    def bound(self) -> bool:
+        return self.sock is not None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until notified or timeout seconds have passed.
+
+        Notifications which arrived meanwhile are coalesced into one.
+
+        :return: True when notified
+        """
+        if not self.sock:
+            return False
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return False
+        with suppress(BlockingIOError):
+            while True:
+                self.sock.recv(64, socket.MSG_DONTWAIT)
+        return True
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+            with suppress(FileNotFoundError):
+                os.remove(self.socket_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class SocketSync:
     """A two way synchronization protocol over Unix domain sockets."""
 
@@ -11,6 +11,7 @@
 import copy
 import logging
 import os
+import threading
 import time
 import uuid
 from contextlib import suppress
@@ -56,6 +57,9 @@ def skip_404_tag_errors(exception):
 # Cloud platforms that support IMDSv2 style metadata server
 IDMSV2_SUPPORTED_CLOUD_PLATFORMS = [CloudNames.AWS, CloudNames.ALIYUN]
 
+# Serializes API token refreshes when metadata is crawled concurrently
+_API_TOKEN_LOCK = threading.Lock()
+
 # Only trigger hook-hotplug on NICs with Ec2 drivers. Avoid triggering
 # it on docker virtual NICs and the like. LP: #1946003
 _EXTRA_HOTPLUG_UDEV_RULES = """
@@ -688,14 +692,19 @@ class DataSourceEc2(sources.DataSource):
         }
         if self.api_token_route in url:
             return request_token_header
-        if not self._api_token:
-            # If we don't yet have an API token, get one via a PUT against
-            # api_token_route. This _api_token may get unset by a 403 due
-            # to an invalid or expired token
-            self._api_token = self._refresh_api_token()
-            if not self._api_token:
+        api_token = self._api_token
+        if not api_token:
+            with _API_TOKEN_LOCK:
+                # If we don't yet have an API token, get one via a PUT against
+                # api_token_route. This _api_token may get unset by a 403 due
+                # to an invalid or expired token. Another thread may have
+                # refreshed it while we waited for the lock.
+                if not self._api_token:
+                    self._api_token = self._refresh_api_token()
+                api_token = self._api_token
+            if not api_token:
                 return {}
-        return {self.imdsv2_token_put_header: self._api_token}
+        return {self.imdsv2_token_put_header: api_token}
 
 
 class DataSourceEc2Local(DataSourceEc2):
@@ -77,6 +77,8 @@ NO_BASE64_DECODE = [
 METADATA_SOCKFILE = "/native/.zonecontrol/metadata.sock"
 SERIAL_DEVICE = "/dev/ttyS1"
 SERIAL_TIMEOUT = 60
+# Most bytes read from the metadata transport at once
+READ_CHUNK_SIZE = 4096
 
 # BUILT-IN DATASOURCE CONFIGURATION
 #  The following is the built-in configuration. If the values
@@ -250,12 +252,21 @@ class DataSourceSmartOS(sources.DataSource):
         # Open once for many requests, rather than once for each request
         self.md_client.open_transport()
 
+        values = self.md_client.get_many(
+            [smartos_noun for smartos_noun, _ in SMARTOS_ATTRIB_MAP.values()]
+            + list(SMARTOS_ATTRIB_JSON.values())
+        )
+
         for ci_noun, attribute in SMARTOS_ATTRIB_MAP.items():
             smartos_noun, strip = attribute
-            md[ci_noun] = self.md_client.get(smartos_noun, strip=strip)
+            value = values[smartos_noun]
+            if value and strip:
+                value = value.strip()
+            md[ci_noun] = value
 
         for ci_noun, smartos_noun in SMARTOS_ATTRIB_JSON.items():
-            md[ci_noun] = self.md_client.get_json(smartos_noun)
+            value = values[smartos_noun]
+            md[ci_noun] = None if value is None else json.loads(value)
 
         self.md_client.close_transport()
 
@@ -387,6 +398,10 @@ class JoyentMetadataClient:
             smartos_type = get_smartos_environ()
         self.smartos_type = smartos_type
         self.fp = fp
+        # Bytes read from the transport but not yet returned by _readline
+        self._buffer = b""
+        # Cleared once the host rejects pipelined requests
+        self.pipelining = True
 
     def _checksum(self, body):
         return "{0:08x}".format(
@@ -421,34 +436,51 @@ class JoyentMetadataClient:
         LOG.debug('Value "%s" found.', value)
         return value
 
+    def _read_chunk(self):
+        """
+        Reads the bytes available on the transport, waiting for at least one.
+        """
+        read1 = getattr(self.fp, "read1", None)
+        if read1 is not None:
+            return read1(READ_CHUNK_SIZE)
+        waiting = getattr(self.fp, "in_waiting", 0)
+        return self.fp.read(max(1, min(waiting, READ_CHUNK_SIZE)))
+
     def _readline(self):
         r"""
-        Reads a line a byte at a time until \n is encountered.  Returns an
+        Reads a line from the transport until \n is encountered.  Returns an
         ascii string with the trailing newline removed.
 
-        If a timeout (per-byte) is set and it expires, a
-        JoyentMetadataFetchException will be thrown.
+        Bytes are read as they become available and those following the
+        newline are kept for the next call.
+
+        If a timeout (per-read) is set and it expires, a
+        JoyentMetadataTimeoutException will be thrown and the partial
+        response is discarded.
         """
-        response = []
 
-        def as_ascii():
-            return b"".join(response).decode("ascii")
+        def timeout():
+            partial = self._buffer.decode("ascii")
+            self._buffer = b""
+            return JoyentMetadataTimeoutException(
+                "Partial response: '%s'" % partial
+            )
 
-        msg = "Partial response: '%s'"
         while True:
+            end = self._buffer.find(b"\n")
+            if end >= 0:
+                line = self._buffer[:end]
+                self._buffer = self._buffer[end + 1 :]
+                return line.decode("ascii")
             try:
-                byte = self.fp.read(1)
-                if len(byte) == 0:
-                    raise JoyentMetadataTimeoutException(msg % as_ascii())
-                if byte == b"\n":
-                    return as_ascii()
-                response.append(byte)
+                chunk = self._read_chunk()
             except OSError as exc:
                 if exc.errno == errno.EAGAIN:
-                    raise JoyentMetadataTimeoutException(
-                        msg % as_ascii()
-                    ) from exc
+                    raise timeout() from exc
                 raise
+            if len(chunk) == 0:
+                raise timeout()
+            self._buffer += chunk
 
     def _write(self, msg):
         self.fp.write(msg.encode("ascii"))
@@ -465,8 +497,7 @@ class JoyentMetadataClient:
             )
         LOG.debug("Negotiation complete")
 
-    def request(self, rtype, param=None):
-        request_id = "{0:08x}".format(random.randint(0, 0xFFFFFFFF))
+    def _frame(self, request_id, rtype, param=None):
         message_body = " ".join(
             (
                 request_id,
@@ -475,9 +506,13 @@ class JoyentMetadataClient:
         )
         if param:
             message_body += " " + base64.b64encode(param.encode()).decode()
-        msg = "V2 {0} {1} {2}\n".format(
+        return "V2 {0} {1} {2}\n".format(
             len(message_body), self._checksum(message_body), message_body
         )
+
+    def request(self, rtype, param=None):
+        request_id = "{0:08x}".format(random.randint(0, 0xFFFFFFFF))
+        msg = self._frame(request_id, rtype, param)
         LOG.debug('Writing "%s" to metadata transport.', msg)
 
         need_close = False
@@ -498,6 +533,92 @@ class JoyentMetadataClient:
         value = self._get_value_from_frame(request_id, response)
         return value
 
+    def _pipelined_get(self, keys):
+        """
+        Writes a GET frame for each key at once, then matches the responses
+        to the requests by request id.
+
+        Raises JoyentMetadataFetchException if a response is not a valid
+        frame answering one of the requests, as hosts which do not support
+        pipelining reply to the frames following the first with errors.
+        """
+        first_id = random.randint(0, 0xFFFFFFFF)
+        pending = {}
+        frames = []
+        for idx, key in enumerate(keys):
+            request_id = "{0:08x}".format((first_id + idx) & 0xFFFFFFFF)
+            pending[request_id] = key
+            frames.append(self._frame(request_id, "GET", key))
+        LOG.debug(
+            "Writing %d pipelined requests to metadata transport.", len(frames)
+        )
+        self._write("".join(frames))
+
+        values = {}
+        while pending:
+            response = self._readline()
+            LOG.debug('Read "%s" from metadata transport.', response)
+            match = self.line_regex.match(response)
+            if not match or match.group("request_id") not in pending:
+                raise JoyentMetadataFetchException(
+                    'Unexpected response "%s" to pipelined requests' % response
+                )
+            request_id = match.group("request_id")
+            values[pending.pop(request_id)] = self._get_value_from_frame(
+                request_id, response
+            )
+        return values
+
+    def _resync(self):
+        """
+        Discards any responses still in flight by reopening the transport.
+        """
+        self.close_transport()
+        self.open_transport()
+
+    def _decode_value(self, key, value):
+        """
+        Returns value as read for key, for clients which encode values.
+        """
+        return value
+
+    def get_many(self, keys):
+        """
+        Returns a dict of the values of keys, None for keys not found.
+
+        The requests are pipelined unless the host rejected pipelining
+        before, in which case they are made one at a time.
+        """
+        need_close = False
+        if not self.fp:
+            self.open_transport()
+            need_close = True
+        try:
+            if self.pipelining and len(keys) > 1:
+                try:
+                    values = self._pipelined_get(keys)
+                except JoyentMetadataFetchException as e:
+                    LOG.debug(
+                        "Metadata service rejected pipelined requests,"
+                        " falling back to one request at a time: %s",
+                        e,
+                    )
+                    self.pipelining = False
+                    self._resync()
+                else:
+                    return {
+                        key: (
+                            None
+                            if val is None
+                            else self._decode_value(key, val)
+                        )
+                        for key, val in values.items()
+                    }
+            return {key: self.get(key) for key in keys}
+        finally:
+            if need_close:
+                self.close_transport()
+
     def get(self, key, default=None, strip=False):
         result = self.request(rtype="GET", param=key)
         if result is None:
@@ -528,6 +649,7 @@ class JoyentMetadataClient:
         if self.fp:
             self.fp.close()
             self.fp = None
+        self._buffer = b""
 
     def __enter__(self):
         if self.fp:
@@ -588,6 +710,11 @@ class JoyentMetadataSerialClient(JoyentMetadataClient):
         self._flush()
         self._negotiate()
 
+    def _resync(self):
+        # Reopening the port would drop the lock held on it
+        self._flush()
+        self._negotiate()
+
     def _flush(self):
         LOG.debug("Flushing input")
         # Read any pending data
@@ -705,18 +832,21 @@ class JoyentMetadataLegacySerialClient(JoyentMetadataSerialClient):
 
         return key in self.base64_keys
 
+    def _decode_value(self, key, value):
+        if self.is_b64_encoded(key):
+            try:
+                value = base64.b64decode(value.encode()).decode()
+            except binascii.Error:
+                LOG.warning("Failed base64 decoding key '%s': %s", key, value)
+        return value
+
     def get(self, key, default=None, strip=False):
         mdefault = object()
         val = self._get(key, strip=False, default=mdefault)
         if val is mdefault:
             return default
 
-        if self.is_b64_encoded(key):
-            try:
-                val = base64.b64decode(val.encode()).decode()
-            except binascii.Error:
-                LOG.warning("Failed base64 decoding key '%s': %s", key, val)
-
+        val = self._decode_value(key, val)
         if strip:
             val = val.strip()
 
@@ -9,12 +9,15 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
 import abc
+import base64
 import copy
+import email
 import json
 import logging
 import os
 import pickle
 import re
+import stat
 from collections import namedtuple
 from enum import Enum, unique
 from typing import Any, Dict, List, Optional, Tuple, Union
@@ -23,6 +26,7 @@ from cloudinit import (
     atomic_helper,
     dmi,
     importer,
+    instance_data_index,
     lifecycle,
     net,
     performance,
@@ -55,6 +59,25 @@ EXPERIMENTAL_TEXT = (
 )
 
 
+BOOT_ID_FILE = "/proc/sys/kernel/random/boot_id"
+
+# Bump when the datasource detection cache format changes
+DETECTION_CACHE_VERSION = 1
+# DMI keys which identify the platform datasources are detected on
+DETECTION_CACHE_DMI = (
+    "chassis-asset-tag",
+    "system-manufacturer",
+    "system-product-name",
+    "system-uuid",
+)
+
+# Bump when the datasource cache format changes
+DS_CACHE_VERSION = 1
+# Tags values of the datasource cache which JSON can't represent
+CACHE_TYPE_KEY = "__ci_type__"
+# Datasource attributes rebuilt from configuration when restoring the cache
+CACHE_REBUILT_ATTRS = ("distro", "paths", "sys_cfg", "ud_proc")
+
 REDACT_SENSITIVE_VALUE = "redacted for non-root user"
 
 # Key which can be provide a cloud's official product name to cloud-init
@@ -118,9 +141,11 @@ def process_instance_metadata(metadata, key_path="", sensitive_keys=()):
 
     Strip ci-b64 prefix and catalog any 'base64_encoded_keys' as a list
 
-    @return Dict copy of processed metadata.
+    @return Dict copy of processed metadata. Nested dicts are copies too,
+        other values are shared with metadata.
     """
-    md_copy = copy.deepcopy(metadata)
+    # Each nested dict is replaced by its processed copy below
+    md_copy = dict(metadata)
     base64_encoded_keys = []
     sens_keys = []
     for key, val in metadata.items():
@@ -161,7 +186,10 @@ def redact_sensitive_keys(metadata, redact_value=REDACT_SENSITIVE_VALUE):
     # Thus, we still need to do membership checks in this function.
     if not metadata.get("sensitive_keys", []):
         return metadata
-    md_copy = copy.deepcopy(metadata)
+    # Only copy the dicts on the path to a redacted key, the copy shares all
+    # other values with metadata.
+    md_copy = dict(metadata)
+    copied = {id(md_copy)}
     for key_path in metadata.get("sensitive_keys"):
         path_parts = key_path.split("/")
         obj = md_copy
@@ -171,12 +199,45 @@ def redact_sensitive_keys(metadata, redact_value=REDACT_SENSITIVE_VALUE):
                 and isinstance(obj[path], dict)
                 and path != path_parts[-1]
             ):
+                if id(obj[path]) not in copied:
+                    obj[path] = dict(obj[path])
+                    copied.add(id(obj[path]))
                 obj = obj[path]
         if path in obj:
             obj[path] = redact_value
     return md_copy
 
 
+def _write_instance_data(filename: str, data: dict, mode: int):
+    """Write data and its index to the instance-data file filename.
+
+    Nothing is rewritten when filename already holds the same content with
+    the same permissions and its index is current, which is the case for
+    most stages after the first.
+    """
+    content = (atomic_helper.json_dumps(data) + "\n").encode()
+    try:
+        file_stat = os.stat(filename)
+        if stat.S_IMODE(
+            file_stat.st_mode
+        ) == mode and file_stat.st_size == len(content):
+            with open(filename, "rb") as stream:
+                unchanged = stream.read() == content
+            if unchanged:
+                # Raises StaleIndexError unless the index is current
+                instance_data_index.InstanceDataIndex(filename).close()
+                LOG.debug("Not rewriting unchanged %s", filename)
+                return
+    except (OSError, instance_data_index.StaleIndexError):
+        pass
+    atomic_helper.write_file(filename, content, mode=mode)
+    try:
+        instance_data_index.write_index(filename, data, mode=mode)
+    except OSError as e:
+        # cloud-init query falls back to reading instance-data.json
+        LOG.warning("Error writing instance-data index: %s", e)
+
+
 URLParams = namedtuple(
     "URLParams",
     [
@@ -215,6 +276,10 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
 
     _crawled_metadata: Optional[Union[Dict, str]] = None
 
+    # Result of ds_detect during the last _check_and_get_data: None when
+    # detection was overridden or not run.
+    ds_detected: Optional[bool] = None
+
     # The network configuration sources that should be considered for this data
     # source.  (The first source in this list that provides network
     # configuration will be used without considering any that follow.)  This
@@ -291,10 +356,15 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
         ("vendordata_raw", None),
         ("vendordata2", None),
         ("vendordata2_raw", None),
+        ("_cached_xdata", None),
     )
 
     _dirty_cache = False
 
+    # MIME bytes of the processed user-data and vendor-data restored by
+    # ds_cache_load, which are only parsed when first requested.
+    _cached_xdata: Optional[Dict[str, bytes]] = None
+
     # N-tuple of keypaths or keynames redact from instance-data.json for
     # non-root users
     sensitive_metadata_keys: Tuple[str, ...] = (
@@ -414,9 +484,11 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
 
     def _check_and_get_data(self):
         """Overrides runtime datasource detection"""
+        self.ds_detected = None
         if self.override_ds_detect():
             return self._get_data()
-        elif self.ds_detect():
+        self.ds_detected = bool(self.ds_detect())
+        if self.ds_detected:
             LOG.debug(
                 "Detected %s",
                 self,
@@ -508,17 +580,17 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
         Replace any hyphens with underscores in key names for use in template
         processing.
 
-        :param write_cache: boolean set True to persist obj.pkl when
-            instance_link exists.
+        :param write_cache: boolean set True to persist the datasource cache
+            when instance_link exists.
 
         @return True on successful write, False otherwise.
         """
         if write_cache and os.path.lexists(self.paths.instance_link):
-            pkl_store(self, self.paths.get_ipath_cur("obj_pkl"))
+            ds_cache_store(self, self.paths)
         if self._crawled_metadata is not None:
             # Any datasource with _crawled_metadata will best represent
             # most recent, 'raw' metadata
-            crawled_metadata = copy.deepcopy(self._crawled_metadata)
+            crawled_metadata = dict(self._crawled_metadata)
             crawled_metadata.pop("user-data", None)
             crawled_metadata.pop("vendor-data", None)
             instance_data = {"ds": crawled_metadata}
@@ -529,15 +601,14 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
             if self.ec2_metadata != UNSET:
                 instance_data["ds"]["ec2_metadata"] = self.ec2_metadata
         instance_data["ds"]["_doc"] = EXPERIMENTAL_TEXT
-        # Add merged cloud.cfg and sys info for jinja templates and cli query
-        instance_data["merged_cfg"] = copy.deepcopy(self.sys_cfg)
+        # Add merged cloud.cfg and sys info for jinja templates and cli query.
+        # Shallow copies suffice as instance_data is only serialized.
+        instance_data["merged_cfg"] = dict(self.sys_cfg)
         instance_data["merged_cfg"][
             "_doc"
         ] = "DEPRECATED: Use merged_system_cfg. Will be dropped from 24.1"
         # Deprecate merged_cfg to a more specific key name merged_system_cfg
-        instance_data["merged_system_cfg"] = copy.deepcopy(
-            instance_data["merged_cfg"]
-        )
+        instance_data["merged_system_cfg"] = dict(instance_data["merged_cfg"])
         instance_data["merged_system_cfg"]["_doc"] = (
             "Merged cloud-init system config from /etc/cloud/cloud.cfg and"
             " /etc/cloud/cloud.cfg.d/"
@@ -572,10 +643,11 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
         util.sym_link(new_cloud_id_file, cloud_id_file, force=True)
         if prev_cloud_id_file and prev_cloud_id_file != new_cloud_id_file:
             util.del_file(prev_cloud_id_file)
-        write_json(json_sensitive_file, processed_data, mode=0o600)
         json_file = self.paths.get_runpath("instance_data")
+        redacted_data = redact_sensitive_keys(processed_data)
+        _write_instance_data(json_sensitive_file, processed_data, mode=0o600)
         # World readable
-        write_json(json_file, redact_sensitive_keys(processed_data))
+        _write_instance_data(json_file, redacted_data, mode=0o644)
         return True
 
     def _get_data(self) -> bool:
@@ -645,21 +717,39 @@ class DataSource(CloudInitPickleMixin, metaclass=abc.ABCMeta):
 
         return URLParams(max_wait, timeout, retries, sec_between_retries)
 
+    def _process_xdata(self, name: str, raw):
+        """Return processed user-data or vendor-data.
+
+        MIME bytes restored by ds_cache_load are parsed instead of processing
+        raw again. Caches holding MIME text lost non-ASCII content, so raw is
+        processed again for them.
+        """
+        cached = (self._cached_xdata or {}).pop(name, None)
+        if isinstance(cached, bytes):
+            return email.message_from_bytes(cached)
+        return self.ud_proc.process(raw)
+
     def get_userdata(self, apply_filter=False):
         if self.userdata is None:
-            self.userdata = self.ud_proc.process(self.get_userdata_raw())
+            self.userdata = self._process_xdata(
+                "userdata", self.get_userdata_raw()
+            )
         if apply_filter:
             return self._filter_xdata(self.userdata)
         return self.userdata
 
     def get_vendordata(self):
         if self.vendordata is None:
-            self.vendordata = self.ud_proc.process(self.get_vendordata_raw())
+            self.vendordata = self._process_xdata(
+                "vendordata", self.get_vendordata_raw()
+            )
         return self.vendordata
 
     def get_vendordata2(self):
         if self.vendordata2 is None:
-            self.vendordata2 = self.ud_proc.process(self.get_vendordata2_raw())
+            self.vendordata2 = self._process_xdata(
+                "vendordata2", self.get_vendordata2_raw()
+            )
         return self.vendordata2
 
     @property
@@ -1039,6 +1129,68 @@ def normalize_pubkey_data(pubkey_data):
     return keys
 
 
+def _get_detection_cache_key(cfg_list) -> dict:
+    """Return what ds_detect results of this boot depend on.
+
+    The cache lives in the volatile run dir, so it doesn't outlive a boot.
+    Where the boot id is available, such as on Linux, it is part of the key
+    too, for run dirs which aren't cleared on reboot.
+    """
+    try:
+        boot_id = util.load_text_file(BOOT_ID_FILE).strip()
+    except OSError:
+        boot_id = None
+    return {
+        "version": DETECTION_CACHE_VERSION,
+        "boot_id": boot_id,
+        "cmdline": util.get_cmdline(),
+        "dmi": {key: dmi.read_dmi_data(key) for key in DETECTION_CACHE_DMI},
+        "datasource_list": list(cfg_list),
+    }
+
+
+def _get_detection_name(cls) -> str:
+    """Return the detection cache name of a DataSource class.
+
+    Local and network variants of a datasource share their ds_detect, so
+    the name is that of the ds_detect implementation and dsname it
+    checks.
+    """
+    detector = next(c for c in cls.__mro__ if "ds_detect" in vars(c))
+    return "%s:%s" % (type_utils.obj_name(detector), cls.dsname)
+
+
+def read_detection_cache(paths: Paths, cfg_list) -> List[str]:
+    """Return names of the datasources init --local did not detect this boot.
+
+    A cache written during a previous boot, or for another platform,
+    kernel command line or datasource_list is discarded.
+    """
+    cache_file = paths.get_runpath("ds_detection")
+    try:
+        cache = util.load_json(util.load_text_file(cache_file))
+    except FileNotFoundError:
+        return []
+    except (OSError, TypeError, ValueError) as e:
+        LOG.debug("Ignoring invalid datasource detection cache: %s", e)
+        return []
+    if cache.get("key") != _get_detection_cache_key(cfg_list):
+        LOG.debug("Discarding stale datasource detection cache %s", cache_file)
+        util.del_file(cache_file)
+        return []
+    return cache.get("not_detected", [])
+
+
+def write_detection_cache(paths: Paths, cfg_list, not_detected: List[str]):
+    """Persist the names of the datasources which were not detected."""
+    key = _get_detection_cache_key(cfg_list)
+    cache_file = paths.get_runpath("ds_detection")
+    try:
+        write_json(cache_file, {"key": key, "not_detected": not_detected})
+    except OSError as e:
+        LOG.warning("Failed writing datasource detection cache: %s", e)
+
+
 def find_source(
     sys_cfg, distro, paths, ds_deps, cfg_list, pkg_list, reporter
 ) -> Tuple[DataSource, str]:
@@ -1047,7 +1199,15 @@ def find_source(
     mode = "network" if DEP_NETWORK in ds_deps else "local"
     LOG.debug("Searching for %s data source in: %s", mode, ds_names)
 
+    # Detection results of init --local are reused by later stages. The
+    # local stage always detects from scratch, invalidating prior caches.
+    not_detected: List[str] = []
+    skip = [] if mode == "local" else read_detection_cache(paths, cfg_list)
+
     for name, cls in zip(ds_names, ds_list):
+        if _get_detection_name(cls) in skip:
+            LOG.debug("Skipping %s, not detected by init --local", name)
+            continue
         myrep = events.ReportEventStack(
             name="search-%s" % name.replace("DataSource", ""),
             description="searching for %s data from %s" % (mode, name),
@@ -1062,10 +1222,16 @@ def find_source(
                     [EventType.BOOT_NEW_INSTANCE]
                 ):
                     myrep.message = "found %s data from %s" % (mode, name)
+                    if mode == "local":
+                        write_detection_cache(paths, cfg_list, not_detected)
                     return (s, type_utils.obj_name(cls))
+                if s.ds_detected is False:
+                    not_detected.append(_get_detection_name(cls))
         except Exception:
             util.logexc(LOG, "Getting data from %s failed", cls)
 
+    if mode == "local":
+        write_detection_cache(paths, cfg_list, not_detected)
     msg = "Did not find any data source, searched classes: (%s)" % ", ".join(
         ds_names
     )
@@ -1224,6 +1390,172 @@ def pkl_load(fname: str) -> Optional[DataSource]:
         return None
 
 
+def _import_cached_class(module_name: str, qualname: str):
+    """Return the class of the datasource cache named by qualname."""
+    obj = importer.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _encode_cache_value(value):
+    """Return value as JSON, tagging types JSON can't represent.
+
+    :raises: TypeError when value can't be restored from JSON.
+    """
+    if value is None or type(value) in (bool, int, float, str):
+        return value
+    if type(value) is list:
+        return [_encode_cache_value(item) for item in value]
+    if type(value) is dict:
+        if CACHE_TYPE_KEY not in value and all(
+            type(key) is str for key in value
+        ):
+            return {
+                key: _encode_cache_value(item) for key, item in value.items()
+            }
+        return {
+            CACHE_TYPE_KEY: "dict",
+            "items": [
+                [_encode_cache_value(key), _encode_cache_value(item)]
+                for key, item in value.items()
+            ],
+        }
+    if type(value) in (tuple, set):
+        return {
+            CACHE_TYPE_KEY: type(value).__name__,
+            "items": [_encode_cache_value(item) for item in value],
+        }
+    if isinstance(value, Enum):
+        return {
+            CACHE_TYPE_KEY: "enum",
+            "module": type(value).__module__,
+            "class": type(value).__qualname__,
+            "value": _encode_cache_value(value.value),
+        }
+    if type(value) is bytes:
+        return {
+            CACHE_TYPE_KEY: "bytes",
+            "value": base64.b64encode(value).decode("ascii"),
+        }
+    raise TypeError("Cannot cache value of type %s" % type(value).__name__)
+
+
+def _decode_cache_value(value):
+    """Return value encoded by _encode_cache_value."""
+    if type(value) is list:
+        return [_decode_cache_value(item) for item in value]
+    if type(value) is not dict:
+        return value
+    value_type = value.get(CACHE_TYPE_KEY)
+    if value_type is None:
+        return {key: _decode_cache_value(item) for key, item in value.items()}
+    if value_type == "dict":
+        return {
+            _decode_cache_value(key): _decode_cache_value(item)
+            for key, item in value["items"]
+        }
+    if value_type == "tuple":
+        return tuple(_decode_cache_value(item) for item in value["items"])
+    if value_type == "set":
+        return set(_decode_cache_value(item) for item in value["items"])
+    if value_type == "enum":
+        enum_cls = _import_cached_class(value["module"], value["class"])
+        if not issubclass(enum_cls, Enum):
+            raise ValueError("Cached value %s isn't an Enum" % enum_cls)
+        return enum_cls(_decode_cache_value(value["value"]))
+    if value_type == "bytes":
+        return base64.b64decode(value["value"])
+    raise ValueError("Unknown cached value type %s" % value_type)
+
+
+def ds_cache_store(obj: DataSource, paths: Paths) -> bool:
+    """Persist obj as the datasource cache of the current instance.
+
+    The cache is JSON, only holding the state which can't be rebuilt from
+    configuration, so it can be restored across python upgrades. A pickle
+    is written instead when some of the state can't be represented as JSON.
+
+    :return: True on success
+    """
+    json_fname = paths.get_ipath_cur("obj_json")
+    pkl_fname = paths.get_ipath_cur("obj_pkl")
+    state = obj.__getstate__()
+    xdata = dict(state.get("_cached_xdata") or {})
+    for attr in CACHE_REBUILT_ATTRS:
+        state.pop(attr, None)
+    for attr in ("userdata", "vendordata", "vendordata2"):
+        if isinstance(state.get(attr), email.message.Message):
+            # Text would mangle non-ASCII and binary parts
+            xdata[attr] = state[attr].as_bytes()
+            state[attr] = None
+    state["_cached_xdata"] = xdata or None
+    cls = type(obj)
+    try:
+        contents = json.dumps(
+            {
+                "version": DS_CACHE_VERSION,
+                "module": cls.__module__,
+                "class": cls.__qualname__,
+                "state": _encode_cache_value(state),
+            },
+            separators=(",", ":"),
+        )
+    except (TypeError, ValueError) as e:
+        LOG.debug("Caching datasource %s as a pickle: %s", obj, e)
+        util.del_file(json_fname)
+        return pkl_store(obj, pkl_fname)
+    try:
+        util.write_file(json_fname, contents, mode=0o400)
+    except Exception:
+        util.logexc(LOG, "Failed writing datasource cache to %s", json_fname)
+        return False
+    util.del_file(pkl_fname)
+    return True
+
+
+def ds_cache_load(
+    paths: Paths, sys_cfg, distro: Distro
+) -> Optional[DataSource]:
+    """Restore the datasource cache of the current instance.
+
+    The JSON cache written by ds_cache_store is used when present, else the
+    pickle.
+    """
+    json_fname = paths.get_ipath_cur("obj_json")
+    try:
+        cache = util.load_json(util.load_text_file(json_fname))
+    except FileNotFoundError:
+        return pkl_load(paths.get_ipath_cur("obj_pkl"))
+    except Exception as e:
+        LOG.warning("Failed loading datasource cache %s: %s", json_fname, e)
+        return None
+    if cache.get("version") != DS_CACHE_VERSION:
+        LOG.debug(
+            "Ignoring datasource cache version %s in %s",
+            cache.get("version"),
+            json_fname,
+        )
+        return None
+    try:
+        cls = _import_cached_class(cache["module"], cache["class"])
+        state = _decode_cache_value(cache["state"])
+        obj = cls.__new__(cls)
+        state.update(
+            sys_cfg=sys_cfg,
+            distro=distro,
+            paths=paths,
+            ud_proc=ud.UserDataProcessor(paths),
+        )
+        obj.__setstate__(state)
+    except DatasourceUnpickleUserDataError:
+        return None
+    except Exception:
+        util.logexc(LOG, "Failed restoring datasource from %s", json_fname)
+        return None
+    return obj
+
+
 def parse_cmdline() -> str:
     """Check if command line argument for this datasource was passed
     Passing by command line overrides runtime datasource detection
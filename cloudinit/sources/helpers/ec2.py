@@ -9,12 +9,22 @@
 import functools
 import json
 import logging
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Dict, List, Tuple
 
 from cloudinit import url_helper, util
 
 LOG = logging.getLogger(__name__)
 SKIP_USERDATA_CODES = frozenset([url_helper.NOT_FOUND])
 
+# Number of concurrent requests used to crawl a metadata tree
+MAX_CRAWL_WORKERS = 8
+
 
 class MetadataLeafDecoder:
     """Decodes a leaf blob into something meaningful."""
@@ -52,11 +62,25 @@ class MetadataLeafDecoder:
 # See: http://docs.aws.amazon.com/AWSEC2/latest/UserGuide/
 #         ec2-instance-metadata.html
 class MetadataMaterializer:
-    def __init__(self, blob, base_url, caller, leaf_decoder=None):
+    """Crawl a metadata tree into a dict.
+
+    :param blob: The listing of the tree's root.
+    :param base_url: The url the root listing was read from.
+    :param caller: Callable returning the contents of a url. When max_workers
+        is greater than 1 it is called from multiple threads concurrently.
+    :param leaf_decoder: Optional callable to decode leaf contents.
+    :param max_workers: Maximum number of concurrent calls to caller. The
+        default of 1 crawls the tree serially, depth-first.
+    """
+
+    def __init__(
+        self, blob, base_url, caller, leaf_decoder=None, max_workers=1
+    ):
         self._blob = blob
         self._md = None
         self._base_url = base_url
         self._caller = caller
+        self._max_workers = max(int(max_workers), 1)
         if leaf_decoder is None:
             self._leaf_decoder = MetadataLeafDecoder()
         else:
@@ -108,16 +132,26 @@ class MetadataMaterializer:
     def materialize(self):
         if self._md is not None:
             return self._md
-        self._md = self._materialize(self._blob, self._base_url)
+        if self._max_workers > 1:
+            self._md = self._materialize_concurrently(
+                self._blob, self._base_url
+            )
+        else:
+            self._md = self._materialize(self._blob, self._base_url)
         return self._md
 
+    @staticmethod
+    def _child_url(base_url, child):
+        child_url = url_helper.combine_url(base_url, child)
+        if not child_url.endswith("/"):
+            child_url += "/"
+        return child_url
+
     def _materialize(self, blob, base_url):
         (leaves, children) = self._parse(blob)
         child_contents = {}
         for c in children:
-            child_url = url_helper.combine_url(base_url, c)
-            if not child_url.endswith("/"):
-                child_url += "/"
+            child_url = self._child_url(base_url, c)
             child_blob = self._caller(child_url)
             child_contents[c] = self._materialize(child_blob, child_url)
         leaf_contents = {}
@@ -125,6 +159,61 @@ class MetadataMaterializer:
             leaf_url = url_helper.combine_url(base_url, resource)
             leaf_blob = self._caller(leaf_url)
             leaf_contents[field] = self._leaf_decoder(field, leaf_blob)
+        return self._join(base_url, child_contents, leaf_contents)
+
+    def _materialize_concurrently(self, blob, base_url):
+        """Crawl the tree fetching up to max_workers urls at a time.
+
+        Every listing and leaf is requested as soon as its parent listing
+        has been read. Results are then assembled in the same order as the
+        serial walk so that the returned dict is identical, and the first
+        failure in serial walk order is the one raised.
+        """
+        listings: Dict[str, Tuple[Dict[str, str], List[str]]] = {}
+        fetches: Dict[str, Future] = {}
+        pending: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+
+            def expand(listing_blob, url):
+                (leaves, children) = self._parse(listing_blob)
+                listings[url] = (leaves, children)
+                for c in children:
+                    child_url = self._child_url(url, c)
+                    future = executor.submit(self._caller, child_url)
+                    fetches[child_url] = future
+                    pending[future] = child_url
+                for resource in leaves.values():
+                    leaf_url = url_helper.combine_url(url, resource)
+                    fetches[leaf_url] = executor.submit(self._caller, leaf_url)
+
+            expand(blob, base_url)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    child_url = pending.pop(future)
+                    if future.exception() is None:
+                        expand(future.result(), child_url)
+
+        def assemble(url):
+            (leaves, children) = listings[url]
+            child_contents = {}
+            for c in children:
+                child_url = self._child_url(url, c)
+                # Raises the child listing's exception, if any
+                fetches[child_url].result()
+                child_contents[c] = assemble(child_url)
+            leaf_contents = {}
+            for field, resource in leaves.items():
+                leaf_url = url_helper.combine_url(url, resource)
+                leaf_blob = fetches[leaf_url].result()
+                leaf_contents[field] = self._leaf_decoder(field, leaf_blob)
+            return self._join(url, child_contents, leaf_contents)
+
+        return assemble(base_url)
+
+    @staticmethod
+    def _join(base_url, child_contents, leaf_contents):
         joined = {}
         joined.update(child_contents)
         for field in leaf_contents.keys():
@@ -192,6 +281,7 @@ def _get_instance_metadata(
     headers_redact=None,
     exception_cb=None,
     retrieval_exception_ignore_cb=None,
+    max_workers=MAX_CRAWL_WORKERS,
 ):
     md_url = url_helper.combine_url(metadata_address, api_version, tree)
     caller = functools.partial(
@@ -220,7 +310,11 @@ def _get_instance_metadata(
     try:
         response = caller(md_url)
         materializer = MetadataMaterializer(
-            response.contents, md_url, mcaller, leaf_decoder=leaf_decoder
+            response.contents,
+            md_url,
+            mcaller,
+            leaf_decoder=leaf_decoder,
+            max_workers=max_workers,
         )
         md = materializer.materialize()
         if not isinstance(md, (dict)):
@@ -242,6 +336,7 @@ def get_instance_metadata(
     headers_redact=None,
     exception_cb=None,
     retrieval_exception_ignore_cb=None,
+    max_workers=MAX_CRAWL_WORKERS,
 ):
     # Note, 'meta-data' explicitly has trailing /.
     # this is required for CloudStack (LP: #1356855)
@@ -257,6 +352,7 @@ def get_instance_metadata(
         headers_cb=headers_cb,
         exception_cb=exception_cb,
         retrieval_exception_ignore_cb=retrieval_exception_ignore_cb,
+        max_workers=max_workers,
     )
 
 
@@ -270,6 +366,7 @@ def get_instance_identity(
     headers_cb=None,
     headers_redact=None,
     exception_cb=None,
+    max_workers=MAX_CRAWL_WORKERS,
 ):
     return _get_instance_metadata(
         tree="dynamic/instance-identity",
@@ -282,4 +379,5 @@ def get_instance_identity(
         headers_redact=headers_redact,
         headers_cb=headers_cb,
         exception_cb=exception_cb,
+        max_workers=max_workers,
     )
@@ -22,11 +22,13 @@ from cloudinit import (
     handlers,
     helpers,
     importer,
+    instance_data_index,
     lifecycle,
     net,
     sources,
     type_utils,
     util,
+    version,
 )
 from cloudinit.config import Netv1, Netv2
 from cloudinit.event import EventScope, EventType, userdata_to_events
@@ -34,7 +36,6 @@ from cloudinit.event import EventScope, EventType, userdata_to_events
 # Default handlers (used if not overridden)
 from cloudinit.handlers.boot_hook import BootHookPartHandler
 from cloudinit.handlers.cloud_config import CloudConfigPartHandler
-from cloudinit.handlers.jinja_template import JinjaTemplatePartHandler
 from cloudinit.handlers.shell_script import ShellScriptPartHandler
 from cloudinit.handlers.shell_script_by_frequency import (
     ShellScriptByFreqPartHandler,
@@ -52,8 +53,16 @@ from cloudinit.sources import NetworkConfigSource
 
 LOG = logging.getLogger(__name__)
 
+# Default handler which is only used when consuming user-data; importing it
+# pulls in jinja2
+jinja_template = importer.lazy_import("cloudinit.handlers.jinja_template")
+
 NO_PREVIOUS_INSTANCE_ID = "NO_PREVIOUS_INSTANCE_ID"
 
+# Name of the cache of fetch_base_config in the run dir, None disables it
+BASE_CONFIG_CACHE_FILE: Optional[str] = "base-config-cache.json"
+BASE_CONFIG_CACHE_VERSION = 1
+
 
 COMBINED_CLOUD_CONFIG_DOC = (
     "Aggregated cloud-config created by merging merged_system_cfg"
@@ -133,7 +142,12 @@ def update_event_enabled(
 
 
 class Init:
-    def __init__(self, ds_deps: Optional[List[str]] = None, reporter=None):
+    def __init__(
+        self,
+        ds_deps: Optional[List[str]] = None,
+        reporter=None,
+        previous_datasource: Optional[sources.DataSource] = None,
+    ):
         if ds_deps is not None:
             self.ds_deps = ds_deps
         else:
@@ -146,6 +160,9 @@ class Init:
         self.datasource: Optional[sources.DataSource] = None
         self.ds_restored = False
         self._previous_iid: Optional[str] = None
+        # The datasource of the previous boot stage run by this process, which
+        # is restored instead of the datasource cache of the current instance
+        self._previous_datasource = previous_datasource
 
         if reporter is None:
             reporter = events.ReportEventStack(
@@ -315,7 +332,16 @@ class Init:
         # We try to restore from a current link and static path
         # by using the instance link, if purge_cache was called
         # the file wont exist.
-        return sources.pkl_load(self.paths.get_ipath_cur("obj_pkl"))
+        if self._previous_datasource is not None:
+            # The cache was written from this very object by a previous
+            # stage, skip the round trip.
+            ds = self._previous_datasource
+            self._previous_datasource = None
+            ds.paths = self.paths
+            ds.sys_cfg = self.cfg
+            ds.distro = self.distro
+            return ds
+        return sources.ds_cache_load(self.paths, self.cfg, self.distro)
 
     def _write_to_cache(self):
         if self.datasource is None:
@@ -328,9 +354,7 @@ class Init:
                 omode="w",
                 content="",
             )
-        return sources.pkl_store(
-            self.datasource, self.paths.get_ipath_cur("obj_pkl")
-        )
+        return sources.ds_cache_store(self.datasource, self.paths)
 
     def _get_datasources(self):
         # Any config provided???
@@ -648,7 +672,7 @@ class Init:
             ShellScriptByFreqPartHandler(PER_INSTANCE, **opts),
             ShellScriptByFreqPartHandler(PER_ONCE, **opts),
             boothook_handler,
-            JinjaTemplatePartHandler(
+            jinja_template.JinjaTemplatePartHandler(
                 **opts,
                 sub_handlers=[
                     cloudconfig_handler,
@@ -839,12 +863,8 @@ class Init:
         # Add features information to allow for file-based discovery of
         # feature settings.
         combined_cloud_cfg["features"] = features.get_features()
-        atomic_helper.write_json(
-            self.paths.get_runpath("combined_cloud_config"),
-            combined_cloud_cfg,
-            mode=0o600,
-        )
         json_sensitive_file = self.paths.get_runpath("instance_data_sensitive")
+        instance_json = None
         try:
             instance_json = util.load_json(
                 util.load_text_file(json_sensitive_file)
@@ -856,7 +876,6 @@ class Init:
                 json_sensitive_file,
                 e,
             )
-            return
         except (json.JSONDecodeError, TypeError) as e:
             LOG.warning(
                 "Skipping write of system_info/features to %s."
@@ -864,6 +883,12 @@ class Init:
                 json_sensitive_file,
                 e,
             )
+        atomic_helper.write_json(
+            self.paths.get_runpath("combined_cloud_config"),
+            combined_cloud_cfg,
+            mode=0o600,
+        )
+        if instance_json is None:
             return
         instance_json["system_info"] = combined_cloud_cfg["system_info"]
         instance_json["features"] = combined_cloud_cfg["features"]
@@ -872,6 +897,13 @@ class Init:
             instance_json,
             mode=0o600,
         )
+        try:
+            instance_data_index.write_index(
+                json_sensitive_file, instance_json, mode=0o600
+            )
+        except OSError as e:
+            # cloud-init query falls back to reading instance-data
+            LOG.warning("Error writing instance-data index: %s", e)
 
     def _consume_vendordata(self, vendor_source, frequency=PER_INSTANCE):
         """
@@ -1141,8 +1173,80 @@ def read_runtime_config(run_dir: str):
     return util.read_conf(os.path.join(run_dir, "cloud.cfg"))
 
 
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return [file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size]
+
+
+def _get_base_config_key(run_dir: str, instance_data_file=None) -> dict:
+    """Return a key of everything fetch_base_config reads.
+
+    Files are keyed by their inode, mtime and size. The conf.d directory
+    itself is keyed too, so that added or removed files change the key.
+    """
+    confd = f"{CLOUD_CONFIG}.d"
+    try:
+        confd_files = sorted(
+            os.path.join(confd, f)
+            for f in os.listdir(confd)
+            if f.endswith(".cfg")
+        )
+    except OSError:
+        confd_files = []
+    files = [str(CLOUD_CONFIG), confd, os.path.join(run_dir, "cloud.cfg")]
+    files.extend(confd_files)
+    if instance_data_file:
+        # Templated config files render differently once it changes
+        files.append(str(instance_data_file))
+    return {
+        "version": BASE_CONFIG_CACHE_VERSION,
+        "cloud_init_version": version.version_string(),
+        "cmdline": util.get_cmdline(),
+        "files": {path: _stat_key(path) for path in files},
+    }
+
+
+def _read_base_config_cache(cache_file: str, key: dict) -> Optional[dict]:
+    try:
+        cache = util.load_json(util.load_text_file(cache_file))
+        if cache["key"] == key:
+            LOG.debug("Using base config cache %s", cache_file)
+            return cache["config"]
+    except (OSError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def _write_base_config_cache(cache_file: str, key: dict, config: dict):
+    content = atomic_helper.json_dumps({"key": key, "config": config})
+    if json.loads(content)["config"] != config:
+        LOG.debug("Not caching base config, it isn't representable as JSON")
+        return
+    try:
+        # Templated config may contain sensitive instance-data
+        atomic_helper.write_file(cache_file, content, mode=0o600, omode="w")
+    except OSError as e:
+        LOG.debug("Could not write base config cache %s: %s", cache_file, e)
+
+
 def fetch_base_config(run_dir: str, *, instance_data_file=None) -> dict:
-    return util.mergemanydict(
+    """Return the builtin, system, runtime and kernel cmdline config merged.
+
+    The result is cached in run_dir and reused while none of the files
+    it is read from, nor the kernel cmdline, changed. Config which names a
+    custom conf_d directory is not cached.
+    """
+    cache_file = None
+    if BASE_CONFIG_CACHE_FILE:
+        cache_file = os.path.join(run_dir, BASE_CONFIG_CACHE_FILE)
+        key = _get_base_config_key(run_dir, instance_data_file)
+        config = _read_base_config_cache(cache_file, key)
+        if config is not None:
+            return config
+    config = util.mergemanydict(
         [
             # builtin config, hardcoded in settings.py.
             util.get_builtin_cfg(),
@@ -1157,3 +1261,7 @@ def fetch_base_config(run_dir: str, *, instance_data_file=None) -> dict:
         ],
         reverse=True,
     )
+    # The key only covers the default conf.d directory, not a custom conf_d
+    if cache_file and not config.get("conf_d"):
+        _write_base_config_cache(cache_file, key, config)
+    return config
@@ -16,6 +16,7 @@ import collections
 import logging
 import re
 import sys
+from functools import lru_cache
 from typing import Any
 
 from jinja2 import TemplateSyntaxError
@@ -43,6 +44,8 @@ LOG = logging.getLogger(__name__)
 TYPE_MATCHER = re.compile(r"##\s*template:(.*)", re.I)
 BASIC_MATCHER = re.compile(r"\$\{([A-Za-z0-9_.]+)\}|\$([A-Za-z0-9_.]+)")
 MISSING_JINJA_PREFIX = "CI_MISSING_JINJA_VAR/"
+# Number of compiled jinja templates kept for rendering again
+JINJA_TEMPLATE_CACHE_SIZE = 32
 
 
 class JinjaSyntaxParsingException(TemplateSyntaxError):
@@ -104,6 +107,22 @@ class UndefinedJinjaVariable(JUndefined):
         )
 
 
+@lru_cache(maxsize=JINJA_TEMPLATE_CACHE_SIZE)
+def _compile_jinja(content: str):
+    """Return content compiled as a jinja template.
+
+    Compiled templates are cached by content for the life of the process,
+    as the same templates, such as templated config files, are rendered
+    repeatedly. Rendering doesn't change a compiled template.
+    """
+    return JTemplate(
+        content,
+        undefined=UndefinedJinjaVariable,
+        trim_blocks=True,
+        extensions=["jinja2.ext.do"],
+    )
+
+
 @performance.timed("Rendering basic template")
 def basic_render(content, params):
     """This does simple replacement of bash variable like templates.
@@ -149,15 +168,7 @@ def detect_template(text):
         add = "\n" if content.endswith("\n") else ""
         try:
             with performance.Timed("Rendering jinja2 template"):
-                return (
-                    JTemplate(
-                        content,
-                        undefined=UndefinedJinjaVariable,
-                        trim_blocks=True,
-                        extensions=["jinja2.ext.do"],
-                    ).render(**params)
-                    + add
-                )
+                return _compile_jinja(content).render(**params) + add
         except TemplateSyntaxError as template_syntax_error:
             template_syntax_error.lineno += 1
             raise JinjaSyntaxParsingException(
@@ -0,0 +1,176 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+"""Cache of remote content, revalidated with HTTP conditional requests.
+
+Fetched content is stored under the cache directory in a file named by its
+sha256, so content served by several urls is stored once. An index maps each
+cached url to the hash of its content, the ETag and Last-Modified validators
+it was served with and the time it was last used. Later fetches of the url
+send those validators, and a 304 Not Modified response is answered from the
+cache instead of downloading the content again.
+
+When the cached content exceeds the size limit of the cache, the content of
+the least recently used urls is evicted.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+from cloudinit import atomic_helper, importer, performance, util
+
+LOG = logging.getLogger(__name__)
+
+url_helper = importer.lazy_import("cloudinit.url_helper")
+
+# Directory of the cache, under the cloud data directory
+URL_CACHE_DIR = "url-cache"
+INDEX_FILE = "index.json"
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+CACHEABLE_SCHEMES = ("http", "https")
+
+
+def get_cache_dir(paths) -> str:
+    """Return the directory of the url cache, shared by all instances."""
+    return os.path.join(paths.get_cpath("data"), URL_CACHE_DIR)
+
+
+class UrlCache:
+    """Fetch urls, revalidating the content cached in cache_dir.
+
+    :param cache_dir: Directory of the cache, created when first written.
+    :param max_size: Most bytes of content kept in the cache.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, dict]] = None
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest)
+
+    def _load_index(self) -> Dict[str, dict]:
+        if self._index is None:
+            try:
+                self._index = util.load_json(
+                    util.load_binary_file(
+                        os.path.join(self.cache_dir, INDEX_FILE)
+                    )
+                )
+            except FileNotFoundError:
+                self._index = {}
+            except (OSError, ValueError, TypeError) as e:
+                LOG.debug("Ignoring invalid url cache index: %s", e)
+                self._index = {}
+        return self._index
+
+    def _write_index(self, index: Dict[str, dict]):
+        atomic_helper.write_json(
+            os.path.join(self.cache_dir, INDEX_FILE), index, mode=0o600
+        )
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            contents = util.load_binary_file(self._blob_path(digest))
+        except OSError:
+            return None
+        if hashlib.sha256(contents).hexdigest() != digest:
+            LOG.debug("Ignoring corrupt url cache content %s", digest)
+            return None
+        return contents
+
+    def _evict(self, index: Dict[str, dict]):
+        """Drop the least recently used urls until the content fits."""
+        sizes = {entry["sha256"]: entry["size"] for entry in index.values()}
+        total = sum(sizes.values())
+        for url, entry in sorted(index.items(), key=lambda e: e[1]["used"]):
+            if total <= self.max_size:
+                break
+            del index[url]
+            digest = entry["sha256"]
+            if all(e["sha256"] != digest for e in index.values()):
+                total -= sizes[digest]
+                try:
+                    os.unlink(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+
+    def store(self, url: str, headers: Mapping, contents: bytes):
+        """Cache the contents url was served with, along with its validators.
+
+        Content served without an ETag or Last-Modified header can't be
+        revalidated, so it is not stored.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not (etag or last_modified) or len(contents) > self.max_size:
+            return
+        digest = hashlib.sha256(contents).hexdigest()
+        with self._lock:
+            index = self._load_index()
+            util.ensure_dir(self.cache_dir, mode=0o700)
+            if self._read_blob(digest) is None:
+                atomic_helper.write_file(
+                    self._blob_path(digest), contents, mode=0o600
+                )
+            index[url] = {
+                "sha256": digest,
+                "size": len(contents),
+                "etag": etag,
+                "last_modified": last_modified,
+                "used": time.time(),
+            }
+            self._evict(index)
+            self._write_index(index)
+
+    def _revalidated(self, url: str, headers: Mapping):
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(url)
+            if entry is None:
+                return
+            entry["used"] = time.time()
+            if headers.get("ETag"):
+                entry["etag"] = headers["ETag"]
+            if headers.get("Last-Modified"):
+                entry["last_modified"] = headers["Last-Modified"]
+            self._write_index(index)
+
+    def fetch(self, url: str, **kwargs):
+        """Read url like url_helper.read_file_or_url, from the cache if fresh.
+
+        When url has cached content, the request is made conditional on its
+        validators and a 304 Not Modified response is answered with a
+        StringResponse of the cached content. Successful responses are stored,
+        unless streamed: callers reading a streamed response are expected to
+        store its content with store().
+
+        :param kwargs: passed to url_helper.read_file_or_url
+        """
+        if urlparse(url.strip()).scheme not in CACHEABLE_SCHEMES:
+            return url_helper.read_file_or_url(url, **kwargs)
+        with self._lock:
+            entry = self._load_index().get(url)
+        cached = self._read_blob(entry["sha256"]) if entry else None
+        if cached is not None:
+            headers = dict(kwargs.get("headers") or {})
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            kwargs["headers"] = headers
+        resp = url_helper.read_file_or_url(url, **kwargs)
+        if cached is not None and resp.code == 304:
+            LOG.debug("Content of %s not modified, using cached copy", url)
+            performance.increment("url_cache.not_modified")
+            self._revalidated(url, resp.headers)
+            return url_helper.StringResponse(cached, url)
+        if resp.ok() and not kwargs.get("stream"):
+            self.store(url, resp.headers, resp.contents)
+        return resp
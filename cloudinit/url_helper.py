@@ -25,11 +25,13 @@ from ssl import create_default_context
 from typing import (
     Any,
     Callable,
+    Dict,
     Iterator,
     List,
     Mapping,
     NamedTuple,
     Optional,
+    Set,
     Tuple,
     Union,
 )
@@ -359,6 +361,117 @@ class UrlError(IOError):
         self.url = url
 
 
+def _connection_stats(session: requests.Session) -> Tuple[int, int]:
+    """Return the (new, reused) connection counts of a session's pools."""
+    new = 0
+    reused = 0
+    for adapter in session.adapters.values():
+        pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for key in pools.keys():
+            pool = pools.get(key)
+            num_connections = getattr(pool, "num_connections", 0)
+            num_requests = getattr(pool, "num_requests", 0)
+            new += num_connections
+            reused += max(num_requests - num_connections, 0)
+    return new, reused
+
+
+class SessionPool:
+    """A process-wide pool of keep-alive sessions, one per remote host.
+
+    Sharing a requests.Session between calls to the same host lets urllib3
+    keep the underlying TCP (and TLS) connection open, so metadata crawls
+    which issue many small sequential GETs do not pay connection setup for
+    every leaf.
+
+    Sessions live until close() is called. Callers which finish a boot stage
+    are expected to close the pool, and callers which tear down the network
+    a connection was made over (e.g. ephemeral networking) to discard the
+    sessions created over it.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def get(self, url: str) -> requests.Session:
+        """Return the shared session for url's host, creating it if needed."""
+        key = self._key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                self._sessions[key] = session
+            return session
+
+    def hosts(self) -> Set[str]:
+        """Return the scheme://host of each pooled session."""
+        with self._lock:
+            return set(self._sessions)
+
+    def discard(self, url: str) -> None:
+        """Close and forget the session for url's host.
+
+        Used after connection level errors so that retries do not reuse a
+        connection pool which may be bound to a stale or broken socket.
+        """
+        with self._lock:
+            session = self._sessions.pop(self._key(url), None)
+        if session is not None:
+            self._close_session(session)
+
+    def close(self) -> None:
+        """Close all pooled sessions and record their connection counts."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._close_session(session)
+
+    @staticmethod
+    def _close_session(session: requests.Session) -> None:
+        new, reused = _connection_stats(session)
+        if new or reused:
+            LOG.debug(
+                "Closing HTTP session: %s new connections, %s reused",
+                new,
+                reused,
+            )
+        performance.increment("url_helper.connections.new", new)
+        performance.increment("url_helper.connections.reused", reused)
+        session.close()
+
+
+_SESSION_POOL = SessionPool()
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the process-wide keep-alive session used for url's host."""
+    return _SESSION_POOL.get(url)
+
+
+def get_session_hosts() -> Set[str]:
+    """Return the hosts with a process-wide keep-alive session."""
+    return _SESSION_POOL.hosts()
+
+
+def discard_session(url: str) -> None:
+    """Close the process-wide keep-alive session used for url's host."""
+    _SESSION_POOL.discard(url)
+
+
+def close_sessions() -> None:
+    """Close all process-wide keep-alive sessions."""
+    _SESSION_POOL.close()
+
+
 def _get_ssl_args(url, ssl_details):
     ssl_args = {}
     scheme = urlparse(url).scheme
@@ -490,6 +603,8 @@ def readurl(
     :param exception_cb: Optional callable to handle exception and returns
         True if retries are permitted.
     :param session: Optional exiting requests.Session instance to reuse.
+        Default: the process-wide keep-alive session for url's host, see
+        get_session.
     :param infinite: Bool, set True to retry indefinitely. Default: False.
     :param log_req_resp: Set False to turn off verbose debug messages.
     :param request_method: String passed as 'method' to Session.request.
@@ -530,8 +645,7 @@ def readurl(
     if sec_between is None:
         sec_between = -1
 
-    if session is None:
-        session = requests.Session()
+    pooled_session = session is None
 
     # Handle retrying ourselves since the built-in support
     # doesn't handle sleeping between tries...
@@ -566,6 +680,8 @@ def readurl(
                     filtered_req_args,
                 )
 
+            if pooled_session:
+                session = get_session(url)
             response = session.request(**req_args)
 
             if check_status:
@@ -597,6 +713,9 @@ def readurl(
             url_error = UrlError(e, url=url)
             raised_exception = e
             response = None
+            if pooled_session:
+                # Don't retry over a connection pool which just failed
+                _SESSION_POOL.discard(url)
 
         response_sleep_time = _handle_error(
             url_error,
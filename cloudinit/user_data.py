@@ -10,16 +10,19 @@
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.nonmultipart import MIMENonMultipart
 from email.mime.text import MIMEText
 
-from cloudinit import features, handlers, util
-from cloudinit.url_helper import UrlError, read_file_or_url
+from cloudinit import features, handlers, importer, performance, util
+from cloudinit.url_cache import UrlCache, get_cache_dir
 
 LOG = logging.getLogger(__name__)
 
+url_helper = importer.lazy_import("cloudinit.url_helper")
+
 # Constants copied in from the handler module
 NOT_MULTIPART_TYPE = handlers.NOT_MULTIPART_TYPE
 PART_FN_TPL = handlers.PART_FN_TPL
@@ -48,6 +51,19 @@ DECOMP_TYPES = [
     "application/x-gzip-compressed",
 ]
 
+# Most includes of one part fetched at once
+INCLUDE_FETCH_WORKERS = 4
+
+# Content types whose payload is examined while processing user-data. Parts
+# of other types are attached as they are, without decoding their payload.
+DECODE_TYPES = (
+    DECOMP_TYPES
+    + TYPE_NEEDED
+    + ["text/x-shellscript"]
+    + INCLUDE_TYPES
+    + ARCHIVE_TYPES
+)
+
 # Msg header used to track attachments
 ATTACHMENT_FIELD = "Number-Attachments"
 
@@ -97,7 +113,9 @@ class UserDataProcessor:
 
             ctype = None
             ctype_orig = part.get_content_type()
-            payload = util.fully_decoded_payload(part)
+            payload = None
+            if ctype_orig in DECODE_TYPES:
+                payload = util.fully_decoded_payload(part)
             was_compressed = False
 
             # When the message states it is of a gzipped content type ensure
@@ -202,10 +220,55 @@ class UserDataProcessor:
             _set_filename(msg, PART_FN_TPL % (attached_id))
         self._attach_launch_index(msg)
 
+    def _fetch_include(self, url_cache, include_url):
+        """Return the content of include_url, None if it couldn't be fetched.
+
+        :raises: RuntimeError when the fetch fails and
+            ERROR_ON_USER_DATA_FAILURE is set.
+        """
+        content = None
+        fetch = (
+            url_helper.read_file_or_url
+            if url_cache is None
+            else url_cache.fetch
+        )
+        with performance.Timed(f"Fetching include {include_url}"):
+            try:
+                resp = fetch(
+                    include_url,
+                    timeout=5,
+                    retries=10,
+                    ssl_details=self.ssl_details,
+                )
+                if resp.ok():
+                    content = resp.contents
+                else:
+                    error_message = (
+                        "Fetching from {} resulted in"
+                        " a invalid http code of {}".format(
+                            include_url, resp.code
+                        )
+                    )
+                    _handle_error(error_message)
+            except url_helper.UrlError as urle:
+                message = str(urle)
+                # Older versions of requests.exceptions.HTTPError may not
+                # include the errant url. Append it for clarity in logs.
+                if include_url not in message:
+                    message += " for url: {0}".format(include_url)
+                _handle_error(message, urle)
+            except IOError as ioe:
+                error_message = "Fetching from {} resulted in {}".format(
+                    include_url, ioe
+                )
+                _handle_error(error_message, ioe)
+        return content
+
     def _do_include(self, content, append_msg):
         # Include a list of urls, one per line
         # also support '#include <url here>'
         # or #include-once '<url here>'
+        includes = []
         include_once_on = False
         for line in content.splitlines():
             lc_line = line.lower()
@@ -227,46 +290,55 @@ class UserDataProcessor:
                 continue
 
             include_once_fn = None
-            content = None
             if include_once_on:
                 include_once_fn = self._get_include_once_filename(include_url)
-            if include_once_on and os.path.isfile(include_once_fn):
-                content = util.load_text_file(include_once_fn)
+            includes.append((include_url, include_once_fn))
+
+        # Fetch each distinct include of this part concurrently, then
+        # process them in the order they were listed.
+        fetches = list(
+            dict.fromkeys(
+                (include_url, include_once_fn)
+                for include_url, include_once_fn in includes
+                if not (include_once_fn and os.path.isfile(include_once_fn))
+            )
+        )
+        url_cache = None
+        if self.paths:
+            url_cache = UrlCache(get_cache_dir(self.paths))
+        if len(fetches) > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=min(INCLUDE_FETCH_WORKERS, len(fetches))
+            )
+            futures = [
+                executor.submit(self._fetch_include, url_cache, include_url)
+                for include_url, _include_once_fn in fetches
+            ]
+            try:
+                # Raises the first failure in listing order, if any
+                fetched = {
+                    include: future.result()
+                    for include, future in zip(fetches, futures)
+                }
+            finally:
+                # Don't wait on the fetches of includes past a failure.
+                # Fetches already running can't be interrupted.
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False)
+        else:
+            fetched = {
+                include: self._fetch_include(url_cache, include[0])
+                for include in fetches
+            }
+
+        for include_url, include_once_fn in includes:
+            if (include_url, include_once_fn) in fetched:
+                content = fetched[(include_url, include_once_fn)]
+                if include_once_fn and content is not None:
+                    util.write_file(include_once_fn, content, mode=0o600)
             else:
-                try:
-                    resp = read_file_or_url(
-                        include_url,
-                        timeout=5,
-                        retries=10,
-                        ssl_details=self.ssl_details,
-                    )
-                    if include_once_on and resp.ok():
-                        util.write_file(
-                            include_once_fn, resp.contents, mode=0o600
-                        )
-                    if resp.ok():
-                        content = resp.contents
-                    else:
-                        error_message = (
-                            "Fetching from {} resulted in"
-                            " a invalid http code of {}".format(
-                                include_url, resp.code
-                            )
-                        )
-                        _handle_error(error_message)
-                except UrlError as urle:
-                    message = str(urle)
-                    # Older versions of requests.exceptions.HTTPError may not
-                    # include the errant url. Append it for clarity in logs.
-                    if include_url not in message:
-                        message += " for url: {0}".format(include_url)
-                    _handle_error(message, urle)
-                except IOError as ioe:
-                    error_message = "Fetching from {} resulted in {}".format(
-                        include_url, ioe
-                    )
-                    _handle_error(error_message, ioe)
-
+                content = util.load_text_file(include_once_fn)
             if content is not None:
                 new_msg = convert_string(content)
                 self._process_msg(new_msg, append_msg)
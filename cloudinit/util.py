@@ -35,6 +35,7 @@ import sys
 import time
 from base64 import b64decode
 from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager, suppress
 from errno import ENOENT
 from functools import lru_cache
@@ -52,6 +53,7 @@ from typing import (
     Mapping,
     Optional,
     Sequence,
+    Tuple,
     Union,
     cast,
 )
@@ -65,16 +67,19 @@ from cloudinit import (
     mergers,
     net,
     performance,
+    safeyaml,
     settings,
     subp,
     temp_utils,
     type_utils,
-    url_helper,
     version,
 )
 from cloudinit.log.log_util import logexc
 from cloudinit.settings import CFG_BUILTIN, PER_ONCE
 
+# Only needed when fetching seeds; importing it pulls in requests
+url_helper = importer.lazy_import("cloudinit.url_helper")
+
 if TYPE_CHECKING:
     # Avoid circular import
     from cloudinit.helpers import Paths
@@ -311,20 +316,20 @@ def rand_dict_key(dictionary, postfix=None):
 
 def read_conf(fname, *, instance_data_file=None) -> Dict:
     """Read a yaml config with optional template, and convert to dict"""
-    # Avoid circular import
-    from cloudinit.handlers.jinja_template import (
-        JinjaLoadError,
-        JinjaSyntaxParsingException,
-        NotJinjaError,
-        render_jinja_payload_from_file,
-    )
-
     try:
         config_file = load_text_file(fname)
     except FileNotFoundError:
         return {}
 
     if instance_data_file and os.path.exists(instance_data_file):
+        # Avoid circular import, and importing jinja2 when not rendering
+        from cloudinit.handlers.jinja_template import (
+            JinjaLoadError,
+            JinjaSyntaxParsingException,
+            NotJinjaError,
+            render_jinja_payload_from_file,
+        )
+
         try:
             config_file = render_jinja_payload_from_file(
                 config_file,
@@ -894,7 +899,8 @@ def mergemanydict(sources: Sequence[Mapping], reverse=False) -> dict:
             # Figure out which mergers to apply...
             mergers_to_apply = mergers.dict_extract_mergers(cfg)
             if not mergers_to_apply:
-                mergers_to_apply = mergers.default_mergers()
+                merged_cfg = mergers.merge_default(merged_cfg, cfg)
+                continue
             merger = mergers.construct(mergers_to_apply)
             merged_cfg = merger.merge(merged_cfg, cfg)
     return merged_cfg
@@ -992,7 +998,7 @@ def load_yaml(blob, default=None, allowed=(dict,)):
             len(blob),
             allowed,
         )
-        converted = yaml.safe_load(blob)
+        converted = safeyaml.load(blob)
         if converted is None:
             LOG.debug("loaded blob returned None, returning default.")
             converted = default
@@ -1463,8 +1469,54 @@ def find_devs_with_dragonflybsd(
     return ["/dev/" + i for i in devlist]
 
 
-def find_devs_with_illumos(criteria=None, oformat='device',
-                           tag=None, no_cache=False, path=None):
+# Upper bound of concurrent fstyp and labelit probes of illumos disks
+ILLUMOS_PROBE_WORKERS = 8
+
+
+def _probe_illumos_dev(dev: str) -> Optional[Tuple[str, Optional[str]]]:
+    """Return the filesystem type and volume label of illumos disk dev.
+
+    @return: None when fstyp finds no filesystem on dev. The label is None
+        when it can't be read.
+    """
+    try:
+        (dtype, _err) = subp.subp(["fstyp", dev], rcs=[0])
+    except subp.ProcessExecutionError:
+        return None
+    dtype = dtype.strip()
+    if dtype == "pcfs":
+        # pcfs does not have `labelit` but this works just as well.
+        cmd = ["fstyp", "-v", dev]
+    else:
+        cmd = ["labelit", "-F", dtype, dev]
+    try:
+        (out, _err) = subp.subp(cmd, rcs=[0])
+    except subp.ProcessExecutionError:
+        return (dtype, None)
+    match = re.search(r"^Volume (?:id|Label): (.*?)\s*$", out, re.MULTILINE)
+    return (dtype, match.group(1) if match else None)
+
+
+@lru_cache()
+def _get_illumos_devs() -> Dict[str, Tuple[str, Optional[str]]]:
+    """Return the filesystem type and label of each illumos disk by device.
+
+    Disks are probed concurrently and only once, as datasources look for
+    several LABEL and TYPE criteria in turn.
+    """
+    devs = glob.glob("/dev/dsk/c*t*d*p0")
+    if not devs:
+        return {}
+    with ThreadPoolExecutor(
+        max_workers=min(len(devs), ILLUMOS_PROBE_WORKERS)
+    ) as executor:
+        probes = executor.map(_probe_illumos_dev, devs)
+        return {dev: probe for dev, probe in zip(devs, probes) if probe}
+
+
+def find_devs_with_illumos(
+    criteria=None, oformat="device", tag=None, no_cache=False, path=None
+):
     wantlabel = None
     wanttype = None
     if criteria:
@@ -1475,31 +1527,15 @@ def find_devs_with_illumos(criteria=None, oformat='device',
     ret = []
     if not wantlabel and not wanttype:
         return ret
-    for dev in glob.glob("/dev/dsk/c*t*d*p0"):
-        dtype = None
-        try:
-            (dtype, _err) = subp.subp(['fstyp', dev], rcs=[0])
-            dtype = dtype.strip()
-        except subp.ProcessExecutionError as e:
+    if no_cache:
+        _get_illumos_devs.cache_clear()
+    for dev, (dtype, label) in _get_illumos_devs().items():
+        if wanttype == "iso9660" and dtype != "hsfs":
             continue
-        if wanttype == 'iso9660' and dtype != 'hsfs':
+        if wanttype == "vfat" and dtype != "pcfs":
             continue
-        if wanttype == 'vfat' and dtype != 'pcfs':
+        if wantlabel and label != wantlabel:
             continue
-        if wantlabel:
-            if dtype == 'pcfs':
-                # pcfs does not have `labelit` but this works just as well.
-                cmd = ['fstyp', '-v', dev]
-            else:
-                cmd = ['labelit', '-F', dtype, dev]
-            try:
-                (out, _err) = subp.subp(cmd, rcs=[0])
-            except subp.ProcessExecutionError as e:
-                continue
-
-            if not re.search(rf'^Volume (?:id|Label): {wantlabel}\s*$',
-                             out, re.MULTILINE):
-                continue
         ret.append(dev)
 
     return ret
@@ -1530,6 +1566,17 @@ def find_devs_with(
             criteria, oformat, tag, no_cache, path
         )
 
+    if oformat == "device" and not (tag or no_cache or path):
+        if not criteria:
+            return [tags["DEVNAME"] for tags in _get_blkid_snapshot()]
+        name, sep, value = criteria.partition("=")
+        if sep:
+            return [
+                tags["DEVNAME"]
+                for tags in _get_blkid_snapshot()
+                if tags.get(name) == value
+            ]
+
     blk_id_cmd = ["blkid"]
     options = []
     if criteria:
@@ -1573,6 +1620,39 @@ def find_devs_with(
     return entries
 
 
+@lru_cache()
+def _get_blkid_snapshot() -> List[Dict[str, str]]:
+    """Return the tags of each block device, in the order blkid lists them.
+
+    Devices are probed once until clear_blkid_snapshot is called, and the
+    snapshot serves find_devs_with and blkid queries of all devices.
+    """
+    try:
+        (out, _err) = subp.subp(
+            ["blkid", "-o", "export"], rcs=[0, 2], decode="replace"
+        )
+    except subp.ProcessExecutionError as e:
+        if e.errno == ENOENT:
+            # blkid not found...
+            return []
+        raise
+    snapshot = []
+    # One block of KEY=value lines per device, separated by blank lines
+    for block in re.split(r"\n\s*\n", out):
+        tags = load_shell_content(block)
+        if tags.get("DEVNAME"):
+            snapshot.append(tags)
+    return snapshot
+
+
+def clear_blkid_snapshot():
+    """Probe block devices again on the next find_devs_with or blkid call.
+
+    Call this after creating or changing filesystems or partitions.
+    """
+    _get_blkid_snapshot.cache_clear()
+
+
 def blkid(devs=None, disable_cache=False):
     """Get all device tags details from blkid.
 
@@ -1581,6 +1661,8 @@ def blkid(devs=None, disable_cache=False):
 
     @return: Dict of key value pairs of info for the device.
     """
+    if devs is None and not disable_cache:
+        return {tags["DEVNAME"]: dict(tags) for tags in _get_blkid_snapshot()}
     if devs is None:
         devs = []
     else:
@@ -3164,7 +3246,11 @@ def udevadm_settle(exists=None, timeout=None):
     if timeout:
         settle_cmd.extend(["--timeout=%s" % timeout])
 
-    return subp.subp(settle_cmd)
+    try:
+        return subp.subp(settle_cmd)
+    finally:
+        # Devices udev just processed may have changed
+        clear_blkid_snapshot()
 
 
 def read_hotplug_enabled_file(paths: "Paths") -> dict:
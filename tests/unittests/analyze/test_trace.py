@@ -0,0 +1,94 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import io
+import json
+from argparse import Namespace
+
+from cloudinit import performance
+from cloudinit.analyze import analyze_trace
+from cloudinit.analyze.trace import load_trace, summarize, to_chrome
+
+
+def _span(name, stage, ts, dur, depth=0):
+    return {
+        "name": name,
+        "cat": stage,
+        "ph": "X",
+        "ts": ts,
+        "dur": dur,
+        "pid": 1,
+        "tid": 1,
+        "args": {"stage": stage, "depth": depth},
+    }
+
+
+TRACE = [
+    _span("Loading yaml", "init-local", 1_000_000, 20_000, depth=1),
+    _span("Searching datasources", "init-local", 990_000, 500_000),
+    _span("Running module config-growpart", "init", 5_000_000, 800_000),
+    {
+        "name": "counters",
+        "cat": "init",
+        "ph": "C",
+        "ts": 6_000_000,
+        "pid": 2,
+        "tid": 2,
+        "args": {"url_helper.connections.new": 1},
+    },
+]
+
+
+class TestLoadTrace:
+    def test_skips_blank_and_truncated_lines(self):
+        lines = [json.dumps(e) for e in TRACE]
+        lines.insert(1, "")
+        lines.append('{"name": "Runn')
+        assert TRACE == load_trace(io.StringIO("\n".join(lines)))
+
+
+class TestSummarize:
+    def test_reports_costliest_spans_per_stage(self):
+        assert (
+            "-- Stage init-local: 0.50000s, 2 spans --\n"
+            "   000.50000s Searching datasources\n"
+            "   000.02000s Loading yaml\n"
+            "-- Stage init: 0.80000s, 1 spans --\n"
+            "   000.80000s Running module config-growpart\n"
+            "-- Counters init --\n"
+            "   url_helper.connections.new: 1\n"
+            "2 stages analyzed\n"
+        ) == summarize(TRACE)
+
+    def test_top_limits_spans(self):
+        assert "Loading yaml" not in summarize(TRACE, top=1)
+
+    def test_chrome_format(self):
+        assert {
+            "traceEvents": TRACE,
+            "displayTimeUnit": "ms",
+        } == to_chrome(TRACE)
+
+
+class TestAnalyzeTrace:
+    def test_reads_trace_written_by_timed(self, tmpdir):
+        trace_file = tmpdir.join(performance.TRACE_FILE)
+        outfile = tmpdir.join("out")
+        performance.start_trace(trace_file.strpath, "init-local")
+        try:
+            with performance.Timed("outer", log_mode="skip"):
+                with performance.Timed("inner", log_mode="skip"):
+                    pass
+        finally:
+            performance.stop_trace()
+        args = Namespace(
+            infile=trace_file.strpath,
+            outfile=outfile.strpath,
+            trace_format="summary",
+            top=20,
+        )
+        analyze_trace("trace", args)
+        output = outfile.read()
+        assert output.startswith("-- Stage init-local:")
+        assert "s outer\n" in output
+        assert "s inner\n" in output
+        assert "1 stages analyzed" in output
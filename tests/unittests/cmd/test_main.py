@@ -1,5 +1,6 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import argparse
 import copy
 import getpass
 import os
@@ -11,6 +12,7 @@ import pytest
 
 from cloudinit import safeyaml, util
 from cloudinit.cmd import main
+from cloudinit.helpers import Paths
 from cloudinit.util import ensure_dir, load_text_file, write_file
 
 MyArgs = namedtuple(
@@ -394,3 +396,53 @@ class TestShouldBringUpInterfaces:
 
         result = main._should_bring_up_interfaces(init, args)
         assert result == expected
+
+
+class TestPurgeCacheOnPythonVersionChange:
+    @pytest.fixture
+    def init(self, tmp_path):
+        cloud_dir = tmp_path / "cloud"
+        (cloud_dir / "data").mkdir(parents=True)
+        (cloud_dir / "data" / "python-version").write_text("2.7")
+        util.sym_link(str(cloud_dir), str(cloud_dir / "instance"))
+        init = mock.Mock()
+        init.paths = Paths({"cloud_dir": str(cloud_dir)})
+        return init
+
+    def test_python_version_change_purges_cache(self, init):
+        """Without a JSON cache, the instance link is removed."""
+        write_file(init.paths.get_ipath_cur("obj_pkl"), "")
+        main.purge_cache_on_python_version_change(init)
+        assert [mock.call(True)] == init.purge_cache.call_args_list
+
+    def test_python_version_change_keeps_json_cache(self, init):
+        """Only the pickle is removed when a JSON cache exists."""
+        write_file(init.paths.get_ipath_cur("obj_pkl"), "")
+        write_file(init.paths.get_ipath_cur("obj_json"), "{}")
+        main.purge_cache_on_python_version_change(init)
+        assert [mock.call(False)] == init.purge_cache.call_args_list
+        assert not os.path.exists(init.paths.get_ipath_cur("obj_pkl"))
+        assert os.path.exists(init.paths.get_ipath_cur("obj_json"))
+
+
+class TestAllStages:
+    @mock.patch("cloudinit.cmd.main.socket")
+    @mock.patch("cloudinit.cmd.main.sub_main")
+    def test_datasource_handed_off_between_stages(self, m_sub_main, _m_sock):
+        """Each stage gets the datasource of the previous successful one."""
+        stage_args = []
+        previous = []
+
+        def fake_sub_main(args):
+            stage_args.append(args)
+            previous.append(main._get_previous_datasource(args))
+            args.handoff.datasource = "ds%d" % len(stage_args)
+            # The config stage fails
+            return 1 if len(stage_args) == 3 else 0
+
+        parser = mock.Mock()
+        parser.parse_args.side_effect = lambda args: argparse.Namespace()
+        m_sub_main.side_effect = fake_sub_main
+        main.all_stages(parser)
+        assert [None, "ds1", "ds2", None] == previous
+        assert 1 == len(set(id(args.handoff) for args in stage_args))
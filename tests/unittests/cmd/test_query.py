@@ -14,6 +14,7 @@ import pytest
 from cloudinit.atomic_helper import b64e
 from cloudinit.cmd import query
 from cloudinit.helpers import Paths
+from cloudinit.instance_data_index import write_index
 from cloudinit.sources import REDACT_SENSITIVE_VALUE
 from cloudinit.templater import JinjaSyntaxParsingException
 from cloudinit.util import write_file
@@ -38,7 +39,8 @@ class TestQuery:
     Args = namedtuple(
         "Args",
         "debug dump_all format instance_data list_keys user_data vendor_data"
-        " varname",
+        " varname batch",
+        defaults=(False,),
     )
 
     def _setup_paths(self, tmpdir, ud_val=None, vd_val=None):
@@ -86,8 +88,8 @@ class TestQuery:
         )
         assert 1 == query.handle_args("anyname", args)
         expected_error = (
-            "Expected one of the options: --all, --format, --list-keys"
-            " or varname\n"
+            "Expected one of the options: --all, --batch, --format,"
+            " --list-keys or varname\n"
         )
         assert expected_error in caplog.text
         out, _err = capsys.readouterr()
@@ -632,3 +634,123 @@ class TestQuery:
             m_getuid.return_value = 100
             assert 1 == query.handle_args("anyname", args)
         assert expected_error in caplog.text
+
+    @pytest.mark.parametrize("indexed", (True, False))
+    def test_handle_args_batch(self, indexed, caplog, capsys, tmpdir):
+        """--batch prints a JSON object of the values of stdin varnames."""
+        instance_data = tmpdir.join("instance-data.json")
+        data = {"v1": {"key-2": "value-2", "key3": {"a": 1}}, "top": "gun"}
+        instance_data.write(json.dumps(data))
+        if indexed:
+            write_index(instance_data.strpath, data, mode=0o600)
+        args = self.Args(
+            debug=False,
+            dump_all=False,
+            format=None,
+            instance_data=instance_data.strpath,
+            list_keys=False,
+            user_data="ud",
+            vendor_data="vd",
+            varname=None,
+            batch=True,
+        )
+        m_stdin = mock.MagicMock()
+        m_stdin.__iter__.return_value = iter(["v1.key_2\n", "key3\n", "top"])
+        with mock.patch("os.getuid", return_value=100):
+            with mock.patch(M_PATH + "sys.stdin", m_stdin):
+                with mock.patch(
+                    M_PATH + "_read_instance_data",
+                    wraps=query._read_instance_data,
+                ) as m_read:
+                    assert 0 == query.handle_args("anyname", args)
+        assert m_read.called is not indexed
+        out, _err = capsys.readouterr()
+        assert {
+            "v1.key_2": "value-2",
+            "key3": {"a": 1},
+            "top": "gun",
+        } == json.loads(out)
+
+    def test_handle_args_batch_reports_undefined_varnames(
+        self, caplog, capsys, tmpdir
+    ):
+        instance_data = tmpdir.join("instance-data.json")
+        instance_data.write('{"top": "gun"}')
+        args = self.Args(
+            debug=False,
+            dump_all=False,
+            format=None,
+            instance_data=instance_data.strpath,
+            list_keys=False,
+            user_data="ud",
+            vendor_data="vd",
+            varname=None,
+            batch=True,
+        )
+        m_stdin = mock.MagicMock()
+        m_stdin.__iter__.return_value = iter(["top\n", "absent\n"])
+        with mock.patch("os.getuid", return_value=100):
+            with mock.patch(M_PATH + "sys.stdin", m_stdin):
+                assert 1 == query.handle_args("anyname", args)
+        assert "Undefined instance-data key 'absent'" in caplog.text
+        out, _err = capsys.readouterr()
+        assert {"top": "gun"} == json.loads(out)
+
+    @pytest.mark.parametrize(
+        "varname,list_keys,expected",
+        (
+            ("v1.key_2", False, "value-2\n"),
+            ("v1", True, "key-2\nkey3\n"),
+            ("key3", False, '{\n "a": 1\n}\n'),
+        ),
+    )
+    def test_handle_args_varname_uses_index(
+        self, varname, list_keys, expected, capsys, tmpdir
+    ):
+        """A fresh index answers varname queries without instance-data."""
+        instance_data = tmpdir.join("instance-data.json")
+        data = {"v1": {"key-2": "value-2", "key3": {"a": 1}}}
+        instance_data.write(json.dumps(data))
+        write_index(instance_data.strpath, data, mode=0o600)
+        args = self.Args(
+            debug=False,
+            dump_all=False,
+            format=None,
+            instance_data=instance_data.strpath,
+            list_keys=list_keys,
+            user_data="ud",
+            vendor_data="vd",
+            varname=varname,
+        )
+        with mock.patch(M_PATH + "_read_instance_data") as m_read:
+            assert 0 == query.handle_args("anyname", args)
+        assert 0 == m_read.call_count
+        out, _err = capsys.readouterr()
+        assert expected == out
+
+    @pytest.mark.parametrize("varname", ("userdata", "absent"))
+    def test_handle_args_varname_falls_back_to_instance_data(
+        self, varname, caplog, tmpdir
+    ):
+        """Varnames the index can't answer are read from instance-data."""
+        instance_data = tmpdir.join("instance-data.json")
+        data = {"v1": {"key-2": "value-2"}}
+        instance_data.write(json.dumps(data))
+        write_index(instance_data.strpath, data, mode=0o600)
+        args = self.Args(
+            debug=False,
+            dump_all=False,
+            format=None,
+            instance_data=instance_data.strpath,
+            list_keys=False,
+            user_data="ud",
+            vendor_data="vd",
+            varname=varname,
+        )
+        with mock.patch("os.getuid", return_value=100):
+            with mock.patch(
+                M_PATH + "_read_instance_data",
+                wraps=query._read_instance_data,
+            ) as m_read:
+                query.handle_args("anyname", args)
+        assert 1 == m_read.call_count
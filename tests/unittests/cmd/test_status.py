@@ -2,6 +2,7 @@
 
 import json
 import os
+import sys
 from collections import namedtuple
 from textwrap import dedent
 from typing import Callable, Dict, Optional, Union
@@ -9,11 +10,12 @@ from unittest import mock
 
 import pytest
 
-from cloudinit import subp
+from cloudinit import socket, subp
 from cloudinit.atomic_helper import write_json
 from cloudinit.cmd import status
 from cloudinit.subp import SubpResult
 from cloudinit.util import ensure_file
+from tests.helpers import cloud_init_project_dir
 from tests.unittests.helpers import wrap_and_call
 
 M_NAME = "cloudinit.cmd.status"
@@ -783,7 +785,7 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
     def test_status_wait_blocks_until_done(
         self, m_get_systemd_status, m_read_cfg_paths, config: Config, capsys
     ):
-        """Specifying wait will poll every 1/4 second until done state."""
+        """Specifying wait will block on status updates until done state."""
         m_read_cfg_paths.return_value = config.paths
         running_json = {
             "v1": {
@@ -800,15 +802,15 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
             }
         }
 
-        sleep_calls = 0
+        wait_calls = 0
 
-        def fake_sleep(interval):
-            nonlocal sleep_calls
-            assert interval == 0.25
-            sleep_calls += 1
-            if sleep_calls == 2:
+        def fake_wait(listener):
+            nonlocal wait_calls
+            assert listener.bound
+            wait_calls += 1
+            if wait_calls == 2:
                 write_json(config.status_file, running_json)
-            elif sleep_calls == 3:
+            elif wait_calls == 3:
                 write_json(config.status_file, done_json)
                 result_file = config.result_file
                 ensure_file(result_file)
@@ -817,7 +819,7 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
         retcode = wrap_and_call(
             M_NAME,
             {
-                "sleep": {"side_effect": fake_sleep},
+                "wait_for_status_update": {"side_effect": fake_wait},
                 "get_bootstatus": (status.EnabledStatus.UNKNOWN, ""),
             },
             status.handle_status_args,
@@ -825,9 +827,9 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
             cmdargs,
         )
         assert retcode == 0
-        assert sleep_calls == 4
+        assert wait_calls == 3
         out, _err = capsys.readouterr()
-        assert out == "....status: done\n"
+        assert out == "...status: done\n"
 
     @mock.patch(M_PATH + "read_cfg_paths")
     @mock.patch(
@@ -837,7 +839,7 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
     def test_status_wait_blocks_until_error(
         self, m_get_systemd_status, m_read_cfg_paths, config: Config, capsys
     ):
-        """Specifying wait will poll every 1/4 second until error state."""
+        """Specifying wait will block on status updates until error state."""
         m_read_cfg_paths.return_value = config.paths
         running_json = {
             "v1": {
@@ -858,15 +860,15 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
             }
         }
 
-        sleep_calls = 0
+        wait_calls = 0
 
-        def fake_sleep(interval):
-            nonlocal sleep_calls
-            assert interval == 0.25
-            sleep_calls += 1
-            if sleep_calls == 2:
+        def fake_wait(listener):
+            nonlocal wait_calls
+            assert listener.bound
+            wait_calls += 1
+            if wait_calls == 2:
                 write_json(config.status_file, running_json)
-            elif sleep_calls == 3:
+            elif wait_calls == 3:
                 write_json(config.status_file, error_json)
                 write_json(config.result_file, "{}")
 
@@ -874,7 +876,7 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
         retcode = wrap_and_call(
             M_NAME,
             {
-                "sleep": {"side_effect": fake_sleep},
+                "wait_for_status_update": {"side_effect": fake_wait},
                 "get_bootstatus": (status.EnabledStatus.UNKNOWN, ""),
             },
             status.handle_status_args,
@@ -882,9 +884,9 @@ PATH=/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin:/snap/bin
             cmdargs,
         )
         assert retcode == 1
-        assert sleep_calls == 4
+        assert wait_calls == 3
         out, _err = capsys.readouterr()
-        assert out == "....status: error\n"
+        assert out == "...status: error\n"
 
     @mock.patch(M_PATH + "read_cfg_paths")
     @mock.patch(
@@ -1061,3 +1063,72 @@ class TestQuerySystemctl:
         assert status.query_systemctl(["some", "args"], wait=True) == "hello"
         assert m_subp.call_count == 4
         assert m_sleep.call_count == 3
+
+
+# Dependencies which `cloud-init status` and `query` must not pay for at
+# startup
+STATUS_IMPORT_BUDGET_EXCLUDES = ("jinja2", "jsonschema", "requests")
+
+
+@pytest.mark.allow_subp_for(sys.executable)
+def test_status_startup_import_budget():
+    """Starting `cloud-init status` or `query` doesn't import heavy deps."""
+    out, err = subp.subp(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "from cloudinit.cmd import main, query, status",
+        ],
+        cwd=cloud_init_project_dir(""),
+    )
+    imported = {}
+    for line in err.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if cumulative_us.strip().isdigit():
+            imported[name.strip()] = int(cumulative_us)
+    assert "cloudinit.cmd.main" in imported
+    assert "cloudinit.cmd.query" in imported
+    over_budget = {
+        name: cumulative_us
+        for name, cumulative_us in imported.items()
+        if name.split(".")[0] in STATUS_IMPORT_BUDGET_EXCLUDES
+    }
+    assert {} == over_budget
+
+
+class TestStatusNotification:
+    def test_notify_wakes_listener(self, tmp_path):
+        """Notifications are received once, however many were sent."""
+        waiters_dir = tmp_path / status.STATUS_WAITERS_DIR
+        with socket.Listener(str(waiters_dir)) as listener:
+            assert listener.bound
+            status.notify_status_waiters(str(tmp_path))
+            status.notify_status_waiters(str(tmp_path))
+            assert listener.wait(1) is True
+            assert listener.wait(0) is False
+        assert [] == list(waiters_dir.iterdir())
+
+    def test_notify_removes_stale_listener_sockets(self, tmp_path):
+        waiters_dir = tmp_path / status.STATUS_WAITERS_DIR
+        listener = socket.Listener(str(waiters_dir))
+        # Simulate a listener which was killed
+        listener.sock.close()
+        assert [listener.socket_path] == [
+            str(p) for p in waiters_dir.iterdir()
+        ]
+        status.notify_status_waiters(str(tmp_path))
+        assert [] == list(waiters_dir.iterdir())
+
+    def test_wait_polls_when_unable_to_listen(self, tmp_path, mocker):
+        m_sleep = mocker.patch(f"{M_PATH}sleep")
+        not_a_dir = tmp_path / "file"
+        not_a_dir.write_text("")
+        with socket.Listener(str(not_a_dir / "waiters")) as listener:
+            assert not listener.bound
+            status.wait_for_status_update(listener)
+        m_sleep.assert_called_once_with(status.POLL_INTERVAL)
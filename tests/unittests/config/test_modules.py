@@ -4,13 +4,21 @@
 import importlib
 import inspect
 import logging
+import threading
 from pathlib import Path
 from typing import List
 
 import pytest
 
 from cloudinit import util
-from cloudinit.config.modules import ModuleDetails, Modules, _is_active
+from cloudinit.config.modules import (
+    MODULE_RESOURCES,
+    ModuleDetails,
+    Modules,
+    _is_active,
+    get_module_dependencies,
+    validate_module,
+)
 from cloudinit.config.schema import MetaSchema
 from cloudinit.distros import ALL_DISTROS
 from cloudinit.settings import FREQUENCIES
@@ -221,3 +229,129 @@ class TestModules:
             "Config modules with a `log` parameter is deprecated in 23.2"
             in caplog.text
         )
+
+
+def _module_details(name, **resources):
+    module = mock.Mock()
+    module.meta = MetaSchema(
+        id=f"cc_{name}",
+        distros=[ALL_DISTROS],
+        frequency="always",
+        **resources,
+    )
+    return ModuleDetails(
+        module=module, name=name, frequency="always", run_args=[]
+    )
+
+
+class TestModuleResources:
+    @pytest.mark.parametrize("mod_name", get_module_names())
+    def test_declared_resources_are_known(self, mod_name):
+        module = importlib.import_module(f"cloudinit.config.{mod_name}")
+        for key in ("reads", "writes"):
+            assert MODULE_RESOURCES.issuperset(module.meta.get(key, []))
+
+    def test_validate_module_rejects_unknown_resources(self):
+        module = mock.Mock(spec=["meta"])
+        module.meta = _module_details("mod", writes=["disks", "unicorns"])[
+            0
+        ].meta
+        with pytest.raises(ValueError, match="unknown resources in 'writes'"):
+            validate_module(module, "mod")
+
+    def test_dependencies(self):
+        mods = [
+            _module_details("ssh", reads=["users"], writes=["ssh"]),
+            _module_details("ntp", writes=["ntp", "packages"]),
+            _module_details("timezone", writes=["timezone"]),
+            _module_details("keys_to_console", reads=["ssh"]),
+            _module_details("undeclared"),
+            _module_details("locale", writes=["locale"]),
+            _module_details("users_reader", reads=["users"]),
+            _module_details("packages_reader", reads=["packages"]),
+        ]
+        assert [
+            set(),
+            set(),
+            set(),
+            {0},
+            {0, 1, 2, 3},
+            {4},
+            {4},
+            {1, 4},
+        ] == get_module_dependencies(mods)
+
+
+class TestRunModulesConcurrently:
+    def _modules(self, cfg):
+        mods = Modules(
+            init=mock.Mock(spec=Init), cfg_files=mock.Mock(), reporter=None
+        )
+        mods._cached_cfg = cfg
+        # Run handlers directly, without semaphores
+        m_cc = mods.init.cloudify.return_value
+        m_cc.run.side_effect = lambda _n, handle, args, freq: (
+            True,
+            handle(**args),
+        )
+        return mods
+
+    def test_independent_modules_overlap(self):
+        barrier = threading.Barrier(2, timeout=5)
+        mods = self._modules({"module_concurrency": 2})
+        first = _module_details("timezone", writes=["timezone"])
+        second = _module_details("locale", writes=["locale"])
+        for details in (first, second):
+            details.module.handle.side_effect = lambda **_: barrier.wait()
+
+        # Both handlers only return once the other one is running too
+        assert (["timezone", "locale"], []) == mods._run_modules(
+            [first, second]
+        )
+
+    def test_dependent_modules_keep_order(self):
+        started = []
+        mods = self._modules({"module_concurrency": 4})
+        details = [
+            _module_details("ssh", writes=["ssh"]),
+            _module_details("keys_to_console", reads=["ssh"]),
+            _module_details("undeclared"),
+            _module_details("timezone", writes=["timezone"]),
+        ]
+        for mod in details:
+            mod.module.handle.side_effect = (
+                lambda name=mod.name, **_: started.append(name)
+            )
+        mods._run_modules(details)
+        assert started.index("ssh") < started.index("keys_to_console")
+        assert "undeclared" == started[2]
+        assert "timezone" == started[3]
+
+    def test_failures_are_reported_in_module_order(self):
+        mods = self._modules({"module_concurrency": 2})
+        details = [
+            _module_details("ntp", writes=["ntp"]),
+            _module_details("timezone", writes=["timezone"]),
+            _module_details("locale", writes=["locale"]),
+        ]
+        errors = {}
+        for mod in details:
+            errors[mod.name] = RuntimeError(mod.name)
+            mod.module.handle.side_effect = errors[mod.name]
+        which_ran, failures = mods._run_modules(details)
+        assert ["ntp", "timezone", "locale"] == which_ran
+        assert [
+            ("ntp", errors["ntp"]),
+            ("timezone", errors["timezone"]),
+            ("locale", errors["locale"]),
+        ] == failures
+
+    @mock.patch(M_PATH + "ThreadPoolExecutor")
+    def test_serial_by_default(self, m_executor):
+        mods = self._modules({})
+        details = [
+            _module_details("timezone", writes=["timezone"]),
+            _module_details("locale", writes=["locale"]),
+        ]
+        assert (["timezone", "locale"], []) == mods._run_modules(details)
+        assert 0 == m_executor.call_count
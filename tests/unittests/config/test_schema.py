@@ -451,6 +451,25 @@ class TestValidateCloudConfigSchema:
         validate_cloudconfig_schema(**kwargs)
         assert call_count == get_schema.call_count
 
+    @skipUnlessJsonSchema()
+    @mock.patch(M_PATH + "get_schema")
+    def test_validateconfig_schema_caches_full_schema_validator(
+        self, get_schema
+    ):
+        """The full schema is loaded once for repeated validations."""
+        get_schema.return_value = {"properties": {"p1": {"type": "string"}}}
+        validate_cloudconfig_schema({"p1": "valid"})
+        with pytest.raises(SchemaValidationError, match="p1: -1 is not"):
+            validate_cloudconfig_schema({"p1": -1}, strict=True)
+        assert 1 == get_schema.call_count
+        validate_cloudconfig_schema(
+            {"version": 1}, schema_type=SchemaType.NETWORK_CONFIG_V1
+        )
+        assert [
+            mock.call(SchemaType.CLOUD_CONFIG),
+            mock.call(SchemaType.NETWORK_CONFIG_V1),
+        ] == get_schema.call_args_list
+
     @skipUnlessJsonSchema()
     def test_validateconfig_schema_non_strict_emits_warnings(self, caplog):
         """When strict is False validate_cloudconfig_schema emits warnings."""
@@ -778,6 +797,30 @@ class TestValidateCloudConfigSchema:
             assert log_record not in caplog.record_tuples
 
 
+    @pytest.mark.parametrize(
+        "config, error_msg",
+        [
+            ({"module_concurrency": 4}, None),
+            (
+                {"module_concurrency": 0},
+                "module_concurrency: 0 is less than the minimum of 1",
+            ),
+            (
+                {"module_concurrency": "4"},
+                "module_concurrency: '4' is not of type 'integer'",
+            ),
+        ],
+    )
+    @skipUnlessJsonSchema()
+    def test_validateconfig_schema_base_config(self, config, error_msg):
+        """Base configuration keys are validated by the full schema."""
+        if error_msg is None:
+            validate_cloudconfig_schema(config, strict=True)
+        else:
+            with pytest.raises(SchemaValidationError, match=error_msg):
+                validate_cloudconfig_schema(config, strict=True)
+
+
 class TestCloudConfigExamples:
     metas = get_metas()
     params = [
@@ -943,12 +986,7 @@ class TestValidateCloudConfigFile:
         invalid_jinja_template = "## template: jinja\na:b\nc:{{ d } }"
         mocker.patch("os.path.exists", return_value=True)
         mocker.patch(
-            "cloudinit.util.load_text_file",
-            return_value=invalid_jinja_template,
-        )
-        mocker.patch(
-            "cloudinit.handlers.jinja_template.load_text_file",
-            return_value='{"c": "d"}',
+            "cloudinit.util.load_text_file", return_value='{"c": "d"}'
         )
         config_file = tmpdir.join("my.yaml")
         config_file.write(invalid_jinja_template)
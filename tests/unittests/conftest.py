@@ -7,7 +7,7 @@ from unittest import mock
 
 import pytest
 
-from cloudinit import atomic_helper, lifecycle, util
+from cloudinit import atomic_helper, lifecycle, url_helper, util
 from cloudinit.gpg import GPG
 from cloudinit.log import loggers
 from tests.hypothesis import HAS_HYPOTHESIS
@@ -102,6 +102,21 @@ def disable_sysfs_net(tmpdir_factory):
         yield mock_sysfs
 
 
+@pytest.fixture(scope="session", autouse=True)
+def disable_dmi_snapshot(tmpdir_factory):
+    """Avoid tests which read or write the host's DMI snapshot."""
+    snapshot_file = f"{tmpdir_factory.mktemp('dmi')}/dmi-snapshot.json"
+    with mock.patch("cloudinit.dmi.DMI_SNAPSHOT_FILE", snapshot_file):
+        yield snapshot_file
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disable_base_config_cache():
+    """Avoid tests which read or write a base config cache in the run dir."""
+    with mock.patch("cloudinit.stages.BASE_CONFIG_CACHE_FILE", None):
+        yield
+
+
 @pytest.fixture(scope="class")
 def disable_netdev_info(request):
     """Avoid tests which read the underlying host's /syc/class/net."""
@@ -126,6 +141,22 @@ def disable_dns_lookup(request):
         yield
 
 
+@pytest.fixture(autouse=True)
+def reset_url_sessions():
+    """Don't share pooled keep-alive sessions between tests."""
+    url_helper.close_sessions()
+    yield
+    url_helper.close_sessions()
+
+
+@pytest.fixture(autouse=True)
+def reset_blkid_snapshot():
+    """Don't share probed block devices between tests."""
+    util.clear_blkid_snapshot()
+    yield
+    util.clear_blkid_snapshot()
+
+
 @pytest.fixture()
 def dhclient_exists():
     with mock.patch(
@@ -12,7 +12,7 @@ from unittest import mock
 import pytest
 
 import cloudinit.net as net
-from cloudinit import subp
+from cloudinit import subp, url_helper
 from cloudinit.net.ephemeral import EphemeralIPv4Network, EphemeralIPv6Network
 from cloudinit.subp import ProcessExecutionError
 from cloudinit.util import ensure_file, write_file
@@ -856,6 +856,23 @@ class TestEphemeralIPV4Network(CiTestCase):
             self.assertEqual(expected_setup_calls, m_subp.call_args_list)
         m_subp.assert_has_calls(expected_teardown_calls)
 
+    def test_ephemeral_ipv4_network_discards_sessions_opened(self, m_subp):
+        """Only keep-alive sessions created over the network are closed."""
+        params = {
+            "interface": "eth0",
+            "ip": "192.168.2.2",
+            "prefix_or_mask": "255.255.255.0",
+            "broadcast": "192.168.2.255",
+            "interface_addrs_before_dhcp": example_netdev,
+        }
+        other = url_helper.get_session("http://other/path")
+        with EphemeralIPv4Network(MockDistro(), **params):
+            imds = url_helper.get_session("http://169.254.169.254/latest")
+        self.assertIs(other, url_helper.get_session("http://other/"))
+        self.assertIsNot(
+            imds, url_helper.get_session("http://169.254.169.254/latest")
+        )
+
     def test_teardown_on_enter_exception(self, m_subp):
         """Ensure ephemeral teardown happens.
 
@@ -1,6 +1,9 @@
 # This file is part of cloud-init. See LICENSE file for license information.
+import json
+import queue
 import time
 from contextlib import suppress
+from unittest import mock
 from unittest.mock import PropertyMock
 
 import pytest
@@ -119,3 +122,56 @@ class TestWebHookHandler:
                 "Expected 20 failures, only got "
                 f"{caplog.text.count('Failed posting event')}"
             )
+
+
+class TestWebHookHandlerBatching:
+    @pytest.fixture
+    def handler(self, mocker):
+        def _handler(**kwargs):
+            handler = WebHookHandler(endpoint="http://localhost", **kwargs)
+            m_registered_items = mocker.patch(
+                "cloudinit.registry.DictRegistry.registered_items",
+                new_callable=PropertyMock,
+            )
+            m_registered_items.return_value = {"webhook": handler}
+            return handler
+
+        return _handler
+
+    @responses.activate
+    def test_events_posted_as_json_array(self, handler):
+        """Events published within batch_interval share a single POST."""
+        responses.add(responses.POST, "http://localhost", status=200)
+        handler(batch_size=10, batch_interval=30)
+        for idx in range(3):
+            report_start_event(f"name{idx}", "description")
+        flush_events()
+        assert 1 == len(responses.calls)
+        events = json.loads(responses.calls[0].request.body)
+        assert ["name0", "name1", "name2"] == [e["name"] for e in events]
+
+    @responses.activate
+    def test_batches_bounded_by_batch_size(self, handler):
+        """No POST contains more than batch_size events."""
+        responses.add(responses.POST, "http://localhost", status=200)
+        handler(batch_size=2, batch_interval=30)
+        for idx in range(5):
+            report_start_event(f"name{idx}", "description")
+        flush_events()
+        batches = [json.loads(c.request.body) for c in responses.calls]
+        assert all(1 <= len(batch) <= 2 for batch in batches)
+        assert [f"name{idx}" for idx in range(5)] == [
+            e["name"] for batch in batches for e in batch
+        ]
+
+    def test_full_queue_drops_events_when_endpoint_is_failing(
+        self, handler, caplog
+    ):
+        """A full queue only blocks publishers while POSTs succeed."""
+        webhook = handler(max_queue_size=1)
+        webhook.consecutive_failed = webhook.MAX_CONSECUTIVE_FAILURES
+        with mock.patch.object(webhook.queue, "put") as m_put:
+            m_put.side_effect = queue.Full
+            report_start_event("name", "description")
+        assert [mock.call(mock.ANY, block=False)] == m_put.call_args_list
+        assert "WebHookHandler queue is full. Dropping event" in caplog.text
@@ -1,5 +1,10 @@
 # This file is part of cloud-init. See LICENSE file for license information.
 
+import json
+import threading
+import time
+
+import pytest
 import responses
 
 from cloudinit import url_helper as uh
@@ -322,3 +327,82 @@ class TestEc2Util(helpers.ResponsesTestCase):
         self.assertEqual(md["ami-launch-index"], "1")
         md = ec2.get_instance_metadata(self.VERSION, retries=0, timeout=0.1)
         self.assertEqual(len(md), 0)
+
+
+class TestMetadataMaterializer:
+    BASE_URL = "http://169.254.169.254/latest/meta-data/"
+    TREE = {
+        "": "ami-id\nblock-device-mapping/\nnetwork/\npublic-keys/",
+        "ami-id": "ami-123",
+        "block-device-mapping/": "ami\nephemeral0\nroot",
+        "block-device-mapping/ami": "/dev/sda1",
+        "block-device-mapping/ephemeral0": "sdb",
+        "block-device-mapping/root": "/dev/sda1",
+        "network/": "interfaces/",
+        "network/interfaces/": "macs/",
+        "network/interfaces/macs/": "06:17:04:d7:26:09/\n06:17:04:d7:26:08/",
+        "network/interfaces/macs/06:17:04:d7:26:09/": "device-number\nmac",
+        "network/interfaces/macs/06:17:04:d7:26:09/device-number": "0",
+        "network/interfaces/macs/06:17:04:d7:26:09/mac": "06:17:04:d7:26:09",
+        "network/interfaces/macs/06:17:04:d7:26:08/": "device-number\nmac",
+        "network/interfaces/macs/06:17:04:d7:26:08/device-number": "1",
+        "network/interfaces/macs/06:17:04:d7:26:08/mac": "06:17:04:d7:26:08",
+        "public-keys/": "0=my-public-key",
+        "public-keys/0/openssh-key": '{"key": "ssh-rsa AAAA"}',
+    }
+
+    def _caller(self, url):
+        return self.TREE[url[len(self.BASE_URL) :]].encode()
+
+    @pytest.mark.parametrize("max_workers", [2, 8, 32])
+    def test_concurrent_crawl_matches_serial_crawl(self, max_workers):
+        serial = ec2.MetadataMaterializer(
+            self._caller(self.BASE_URL), self.BASE_URL, self._caller
+        ).materialize()
+        concurrent = ec2.MetadataMaterializer(
+            self._caller(self.BASE_URL),
+            self.BASE_URL,
+            self._caller,
+            max_workers=max_workers,
+        ).materialize()
+        assert json.dumps(serial) == json.dumps(concurrent)
+        assert {"key": "ssh-rsa AAAA"} == concurrent["public-keys"][
+            "my-public-key"
+        ]
+        assert ["06:17:04:d7:26:09", "06:17:04:d7:26:08"] == list(
+            concurrent["network"]["interfaces"]["macs"]
+        )
+
+    def test_concurrent_crawl_is_bounded(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def caller(url):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return self._caller(url)
+
+        ec2.MetadataMaterializer(
+            self._caller(self.BASE_URL), self.BASE_URL, caller, max_workers=2
+        ).materialize()
+        assert 2 == peak[0]
+
+    def test_concurrent_crawl_raises_first_error_in_walk_order(self):
+        def caller(url):
+            path = url[len(self.BASE_URL) :]
+            if path in ("block-device-mapping/root", "public-keys/"):
+                raise uh.UrlError(path, code=500, url=url)
+            return self._caller(url)
+
+        with pytest.raises(uh.UrlError, match="block-device-mapping/root"):
+            ec2.MetadataMaterializer(
+                self._caller(self.BASE_URL),
+                self.BASE_URL,
+                caller,
+                max_workers=4,
+            ).materialize()
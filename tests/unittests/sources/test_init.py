@@ -2,22 +2,34 @@
 # pylint: disable=attribute-defined-outside-init
 
 import copy
+import gzip
 import inspect
+import json
 import os
 import stat
 
-from cloudinit import importer, util
+import pytest
+
+from cloudinit import importer
+from cloudinit import user_data as ud
+from cloudinit import util
 from cloudinit.distros import ubuntu
 from cloudinit.event import EventScope, EventType
 from cloudinit.helpers import Paths
+from cloudinit.instance_data_index import InstanceDataIndex, get_index_path
 from cloudinit.sources import (
+    DEP_FILESYSTEM,
+    DEP_NETWORK,
     EXPERIMENTAL_TEXT,
     METADATA_UNKNOWN,
     REDACT_SENSITIVE_VALUE,
     UNSET,
     DataSource,
     canonical_cloud_id,
-    pkl_load,
+    ds_cache_load,
+    ds_cache_store,
+    find_source,
+    read_detection_cache,
     redact_sensitive_keys,
 )
 from cloudinit.user_data import UserDataProcessor
@@ -737,6 +749,65 @@ class TestDataSource(CiTestCase):
             {"ec2stuff": "is good"}, instance_data["ds"]["ec2_metadata"]
         )
 
+    def test_persist_instance_data_writes_instance_data_indexes(self):
+        """Each instance-data file is indexed with the same permissions."""
+        tmp = self.tmp_dir()
+        cloud_dir = os.path.join(tmp, "cloud")
+        util.ensure_dir(cloud_dir)
+        paths = Paths({"run_dir": tmp, "cloud_dir": cloud_dir})
+        datasource = DataSourceTestSubclassNet(
+            self.sys_cfg,
+            self.distro,
+            paths,
+            custom_metadata={"availability_zone": "myaz"},
+        )
+        datasource.get_data()
+        for lookup, mode in (
+            ("instance_data", 0o644),
+            ("instance_data_sensitive", 0o600),
+        ):
+            json_file = paths.get_runpath(lookup)
+            file_stat = os.stat(get_index_path(json_file))
+            self.assertEqual(mode, stat.S_IMODE(file_stat.st_mode))
+            with InstanceDataIndex(json_file) as index:
+                self.assertEqual("myaz", index.get("v1.availability_zone"))
+                self.assertEqual("myaz", index.get("availability_zone"))
+
+    def test_persist_instance_data_skips_unchanged_instance_data(self):
+        """Unchanged instance-data files and their indexes aren't rewritten."""
+        tmp = self.tmp_dir()
+        cloud_dir = os.path.join(tmp, "cloud")
+        util.ensure_dir(cloud_dir)
+        paths = Paths({"run_dir": tmp, "cloud_dir": cloud_dir})
+        datasource = DataSourceTestSubclassNet(
+            self.sys_cfg,
+            self.distro,
+            paths,
+            custom_metadata={"availability_zone": "myaz"},
+        )
+        datasource.get_data()
+        json_files = [
+            paths.get_runpath("instance_data"),
+            paths.get_runpath("instance_data_sensitive"),
+        ]
+        with mock.patch(
+            "cloudinit.sources.atomic_helper.write_file"
+        ) as m_write_file:
+            datasource.persist_instance_data()
+        self.assertEqual(0, m_write_file.call_count)
+
+        datasource.metadata["availability_zone"] = "otheraz"
+        datasource.persist_instance_data()
+        for json_file in json_files:
+            with InstanceDataIndex(json_file) as index:
+                self.assertEqual("otheraz", index.get("availability_zone"))
+
+        # A stale index is rewritten even though instance-data is unchanged
+        os.unlink(get_index_path(json_files[0]))
+        datasource.persist_instance_data()
+        with InstanceDataIndex(json_files[0]) as index:
+            self.assertEqual("otheraz", index.get("availability_zone"))
+
     def test_persist_instance_data_writes_canonical_cloud_id_and_symlink(self):
         """canonical-cloud-id class attribute is set, persist to json."""
         tmp = self.tmp_dir()
@@ -799,32 +870,34 @@ class TestDataSource(CiTestCase):
             {"network_json": "is good"}, instance_data["ds"]["network_json"]
         )
 
-    def test_persist_instance_serializes_datasource_pickle(self):
-        """obj.pkl is written when instance link present and write_cache."""
+    def test_persist_instance_serializes_datasource_cache(self):
+        """obj.json is written when instance link present and write_cache."""
         tmp = self.tmp_dir()
         cloud_dir = os.path.join(tmp, "cloud")
         util.ensure_dir(cloud_dir)
+        paths = Paths({"run_dir": tmp, "cloud_dir": cloud_dir})
         datasource = DataSourceTestSubclassNet(
-            self.sys_cfg,
-            self.distro,
-            Paths({"run_dir": tmp, "cloud_dir": cloud_dir}),
+            self.sys_cfg, self.distro, paths
         )
-        pkl_cache_file = os.path.join(cloud_dir, "instance/obj.pkl")
-        self.assertFalse(os.path.exists(pkl_cache_file))
+        json_cache_file = os.path.join(cloud_dir, "instance/obj.json")
+        self.assertFalse(os.path.exists(json_cache_file))
         datasource.network_json = {"network_json": "is good"}
         # No /var/lib/cloud/instance symlink
         datasource.persist_instance_data(write_cache=True)
-        self.assertFalse(os.path.exists(pkl_cache_file))
+        self.assertFalse(os.path.exists(json_cache_file))
 
         # Symlink /var/lib/cloud/instance but write_cache=False
         util.sym_link(cloud_dir, os.path.join(cloud_dir, "instance"))
         datasource.persist_instance_data(write_cache=False)
-        self.assertFalse(os.path.exists(pkl_cache_file))
+        self.assertFalse(os.path.exists(json_cache_file))
 
         # Symlink /var/lib/cloud/instance and write_cache=True
         datasource.persist_instance_data(write_cache=True)
-        self.assertTrue(os.path.exists(pkl_cache_file))
-        ds = pkl_load(pkl_cache_file)
+        self.assertTrue(os.path.exists(json_cache_file))
+        self.assertFalse(
+            os.path.exists(os.path.join(cloud_dir, "instance/obj.pkl"))
+        )
+        ds = ds_cache_load(paths, self.sys_cfg, self.distro)
         self.assertEqual(datasource.network_json, ds.network_json)
 
     def test_get_data_base64encodes_unserializable_bytes(self):
@@ -1008,6 +1081,19 @@ class TestRedactSensitiveData(CiTestCase):
         secure_md["md"]["secure"] = "redacted for non-root user"
         self.assertEqual(secure_md, redact_sensitive_keys(md))
 
+    def test_redact_sensitive_data_leaves_metadata_unchanged(self):
+        """Redaction copies the path to redacted keys, not metadata."""
+        md = {
+            "sensitive_keys": ["md/secure", "md"],
+            "md": {"secure": "s3kr1t", "insecure": "publik"},
+            "other": {"key": "value"},
+        }
+        orig_md = copy.deepcopy(md)
+        redacted_md = redact_sensitive_keys(md, redact_value="redacted")
+        self.assertEqual(orig_md, md)
+        self.assertEqual("redacted", redacted_md["md"])
+        self.assertIs(md["other"], redacted_md["other"])
+
 
 class TestCanonicalCloudID(CiTestCase):
     def test_cloud_id_returns_platform_on_unknowns(self):
@@ -1092,3 +1178,201 @@ class TestCanonicalCloudID(CiTestCase):
                 cloud_name="azure", region="!chinaeast", platform="platform"
             ),
         )
+
+
+class UndetectedDataSource(DataSourceTestSubclassNet):
+
+    dsname = "Undetected"
+
+    def ds_detect(self):
+        return False
+
+
+class TestDetectionCache:
+    @pytest.fixture
+    def paths(self, tmp_path, mocker):
+        boot_id_file = tmp_path / "boot_id"
+        boot_id_file.write_text("boot-1\n")
+        mocker.patch("cloudinit.sources.BOOT_ID_FILE", str(boot_id_file))
+        mocker.patch("cloudinit.sources.util.get_cmdline", return_value="")
+        mocker.patch(
+            "cloudinit.sources.dmi.read_dmi_data", return_value="product"
+        )
+        return Paths({"cloud_dir": str(tmp_path), "run_dir": str(tmp_path)})
+
+    def _find_source(self, paths, ds_deps):
+        with mock.patch(
+            "cloudinit.sources.list_sources",
+            return_value=[UndetectedDataSource, DataSourceTestSubclassNet],
+        ):
+            return find_source(
+                {}, None, paths, ds_deps, ["Undetected", "Test"], [], None
+            )
+
+    def test_network_stage_skips_datasources_not_detected_locally(self, paths):
+        """find_source skips datasources init --local did not detect."""
+        with mock.patch.object(
+            UndetectedDataSource, "ds_detect", return_value=False
+        ) as m_detect:
+            self._find_source(paths, [DEP_FILESYSTEM])
+            assert 1 == m_detect.call_count
+            assert ["UndetectedDataSource:Undetected"] == (
+                read_detection_cache(paths, ["Undetected", "Test"])
+            )
+            _ds, dsname = self._find_source(
+                paths, [DEP_FILESYSTEM, DEP_NETWORK]
+            )
+            assert 1 == m_detect.call_count
+        assert "DataSourceTestSubclassNet" == dsname
+
+    def test_detection_cache_discarded_on_new_boot(self, paths, tmp_path):
+        """A detection cache of a previous boot is removed, not used."""
+        self._find_source(paths, [DEP_FILESYSTEM])
+        cache_file = paths.get_runpath("ds_detection")
+        assert os.path.exists(cache_file)
+        (tmp_path / "boot_id").write_text("boot-2\n")
+        assert [] == read_detection_cache(paths, ["Undetected", "Test"])
+        assert not os.path.exists(cache_file)
+
+    def test_detection_cache_used_without_boot_id(
+        self, paths, tmp_path, mocker
+    ):
+        """Platforms without a boot id, such as illumos, use the cache."""
+        mocker.patch("cloudinit.sources.BOOT_ID_FILE", str(tmp_path / "none"))
+        self._find_source(paths, [DEP_FILESYSTEM])
+        assert ["UndetectedDataSource:Undetected"] == (
+            read_detection_cache(paths, ["Undetected", "Test"])
+        )
+
+    def test_detection_cache_discarded_on_datasource_list_change(self, paths):
+        """The cache only applies to the datasource_list it was built for."""
+        self._find_source(paths, [DEP_FILESYSTEM])
+        assert [] == read_detection_cache(paths, ["Test"])
+
+
+class TestDatasourceCache:
+    @pytest.fixture
+    def paths(self, tmp_path):
+        cloud_dir = tmp_path / "cloud"
+        cloud_dir.mkdir()
+        util.sym_link(str(cloud_dir), str(cloud_dir / "instance"))
+        return Paths({"cloud_dir": str(cloud_dir), "run_dir": str(tmp_path)})
+
+    @pytest.fixture
+    def distro(self):
+        return ubuntu.Distro("ubuntu", {}, {})
+
+    def test_state_restored_from_json(self, paths, distro):
+        """Values JSON can't represent are restored with their types."""
+        ds = DataSourceTestSubclassNet({}, distro, paths)
+        ds.metadata = {"key": b"\x00bytes", 1: ("tuple", {"set"})}
+        ds.ec2_metadata = UNSET
+        ds.network_json = {"__ci_type__": "metadata using the tag key"}
+        ds.default_update_events = {
+            EventScope.NETWORK: {EventType.BOOT, EventType.HOTPLUG}
+        }
+        assert ds_cache_store(ds, paths)
+        assert not os.path.exists(paths.get_ipath_cur("obj_pkl"))
+        assert 0o400 == stat.S_IMODE(
+            os.stat(paths.get_ipath_cur("obj_json")).st_mode
+        )
+
+        sys_cfg = {"datasource_list": ["MyTestSubclass"]}
+        restored = ds_cache_load(paths, sys_cfg, distro)
+        assert isinstance(restored, DataSourceTestSubclassNet)
+        assert ds.metadata == restored.metadata
+        assert UNSET == restored.ec2_metadata
+        assert ds.network_json == restored.network_json
+        assert ds.default_update_events == restored.default_update_events
+        assert sys_cfg is restored.sys_cfg
+        assert distro is restored.distro
+        assert paths is restored.paths
+
+    def test_processed_userdata_parsed_on_first_use(self, paths, distro):
+        """Processed user-data is restored without processing it again."""
+        ds = DataSourceTestSubclassNet(
+            {}, distro, paths, custom_userdata="#cloud-config\n{}\n"
+        )
+        ds.get_data()
+        userdata = ds.get_userdata()
+        assert ds_cache_store(ds, paths)
+
+        restored = ds_cache_load(paths, {}, distro)
+        assert restored.userdata is None
+        with mock.patch.object(restored.ud_proc, "process") as m_process:
+            assert userdata.as_string() == restored.get_userdata().as_string()
+        assert 0 == m_process.call_count
+
+    @pytest.mark.parametrize(
+        "userdata",
+        (
+            "#cloud-config\nusers: [{name: josé}]\n".encode(),
+            gzip.compress(b"#!/bin/sh\necho \xc3\x84 \xff\n"),
+            b"#!/bin/sh\n\xff\xfe\x00binary",
+        ),
+    )
+    def test_processed_userdata_round_trip(self, userdata, paths, distro):
+        """Non-ASCII and binary parts are restored unchanged."""
+        ds = DataSourceTestSubclassNet(
+            {}, distro, paths, custom_userdata=userdata
+        )
+        ds.get_data()
+        payloads = [
+            util.fully_decoded_payload(part)
+            for part in ds.get_userdata().walk()
+            if not ud.is_skippable(part)
+        ]
+        assert ds_cache_store(ds, paths)
+
+        restored = ds_cache_load(paths, {}, distro)
+        with mock.patch.object(restored.ud_proc, "process") as m_process:
+            assert payloads == [
+                util.fully_decoded_payload(part)
+                for part in restored.get_userdata().walk()
+                if not ud.is_skippable(part)
+            ]
+        assert 0 == m_process.call_count
+
+    def test_cached_userdata_text_processed_again(self, paths, distro):
+        """User-data cached as MIME text is processed from raw again."""
+        ds = DataSourceTestSubclassNet(
+            {}, distro, paths, custom_userdata="#cloud-config\n{}\n"
+        )
+        ds.get_data()
+        ds._cached_xdata = {"userdata": "mangled"}
+        assert "mangled" not in ds.get_userdata().as_string()
+
+    def test_cached_userdata_not_used_after_update(self, paths, distro):
+        """Restored user-data is dropped when the metadata is updated."""
+        ds = DataSourceTestSubclassNet(
+            {}, distro, paths, custom_userdata="#cloud-config\n{}\n"
+        )
+        ds.get_data()
+        ds.get_userdata()
+        assert ds_cache_store(ds, paths)
+
+        restored = ds_cache_load(paths, {}, distro)
+        restored._custom_userdata = "#cloud-config\nupdated: true\n"
+        restored.update_metadata_if_supported([EventType.BOOT_NEW_INSTANCE])
+        assert "updated: true" in restored.get_userdata().as_string()
+
+    def test_pickle_written_when_state_is_not_json(self, paths, distro):
+        """A pickle replaces the JSON cache when state isn't JSON."""
+        ds = DataSourceTestSubclassNet({}, distro, paths)
+        assert ds_cache_store(ds, paths)
+        ds.unserializable = object()
+        assert ds_cache_store(ds, paths)
+        assert not os.path.exists(paths.get_ipath_cur("obj_json"))
+        assert os.path.exists(paths.get_ipath_cur("obj_pkl"))
+        restored = ds_cache_load(paths, {}, distro)
+        assert isinstance(restored, DataSourceTestSubclassNet)
+
+    def test_other_cache_versions_ignored(self, paths, distro):
+        ds = DataSourceTestSubclassNet({}, distro, paths)
+        assert ds_cache_store(ds, paths)
+        json_file = paths.get_ipath_cur("obj_json")
+        cache = util.load_json(util.load_text_file(json_file))
+        cache["version"] += 1
+        os.chmod(json_file, 0o600)
+        util.write_file(json_file, json.dumps(cache))
+        assert None is ds_cache_load(paths, {}, distro)
@@ -28,7 +28,7 @@ from binascii import crc32
 import serial
 
 from cloudinit import helpers as c_helpers
-from cloudinit.atomic_helper import b64e
+from cloudinit.atomic_helper import b64d, b64e
 from cloudinit.event import EventScope, EventType
 from cloudinit.sources import DataSourceSmartOS
 from cloudinit.sources.DataSourceSmartOS import SERIAL_DEVICE, SMARTOS_ENV_KVM
@@ -400,6 +400,9 @@ class PsuedoJoyentClient:
             return default
         return json.loads(result)
 
+    def get_many(self, keys):
+        return {key: self.data.get(key) for key in keys}
+
     def exists(self):
         return True
 
@@ -798,6 +801,64 @@ class ShortReader:
         return ret
 
 
+class FakeMetadataHost:
+    """Implements the transport interface of a serial port to a host
+    serving metadata, queueing a response for each line written."""
+
+    def __init__(self, metadata, pipelining=True, reverse=False):
+        self.metadata = metadata
+        self.pipelining = pipelining
+        self.reverse = reverse
+        self.pending = b""
+        self.timeout = 1
+        self.writes = []
+        self.reads = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.pending)
+
+    def _respond(self, line):
+        if line == "":
+            return "invalid command"
+        if line == "NEGOTIATE V2":
+            return "V2_OK"
+        request_id, rtype, *params = line.split(" ")[3:]
+        if rtype == "KEYS":
+            value = "\n".join(self.metadata)
+        else:
+            value = self.metadata.get(b64d(params[0]))
+        if value is None:
+            body = "%s NOTFOUND" % request_id
+        else:
+            body = "%s SUCCESS %s" % (request_id, b64e(value))
+        return "V2 %d %08x %s" % (
+            len(body),
+            crc32(body.encode("utf-8")) & 0xFFFFFFFF,
+            body,
+        )
+
+    def write(self, data):
+        self.writes.append(data)
+        lines = data.decode("ascii").split("\n")[:-1]
+        responses = [self._respond(lines[0])]
+        if self.pipelining:
+            responses.extend(self._respond(line) for line in lines[1:])
+        else:
+            responses.extend("invalid command" for _ in lines[1:])
+        if self.reverse:
+            responses.reverse()
+        self.pending += "".join(r + "\n" for r in responses).encode("ascii")
+
+    def flush(self):
+        pass
+
+    def read(self, size=1):
+        self.reads += 1
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+
 class TestJoyentMetadataClient(FilesystemMockingTestCase):
 
     invalid = b"invalid command\n"
@@ -808,6 +869,7 @@ class TestJoyentMetadataClient(FilesystemMockingTestCase):
         super(TestJoyentMetadataClient, self).setUp()
 
         self.serial = mock.MagicMock(spec=serial.Serial)
+        self.serial.in_waiting = 0
         self.request_id = 0xABCDEF12
         self.metadata_value = "value"
         self.response_parts = {
@@ -1023,6 +1085,68 @@ class TestJoyentMetadataClient(FilesystemMockingTestCase):
         client.open_transport()
         self.assertTrue(reader.emptied)
 
+    def test_readline_reads_available_bytes_at_once(self):
+        client = self._get_client()
+        self.serial.in_waiting = 1024
+        reader = ShortReader(self.invalid + self.v2_ok)
+        client.fp.read.side_effect = reader.read
+        self.assertEqual("invalid command", client._readline())
+        self.assertEqual("V2_OK", client._readline())
+        self.assertEqual(1, client.fp.read.call_count)
+
+    def test_get_many_pipelines_requests(self):
+        host = FakeMetadataHost(
+            {"sdc:uuid": "uuid", "hostname": "host"}, reverse=True
+        )
+        client = DataSourceSmartOS.JoyentMetadataClient(
+            fp=host, smartos_type=DataSourceSmartOS.SMARTOS_ENV_KVM
+        )
+        self.assertEqual(
+            {"sdc:uuid": "uuid", "hostname": "host", "routes": None},
+            client.get_many(["sdc:uuid", "hostname", "routes"]),
+        )
+        self.assertEqual(1, len(host.writes))
+        self.assertEqual(3, host.writes[0].count(b"\n"))
+        self.assertEqual(1, host.reads)
+        self.assertTrue(client.pipelining)
+
+    def test_get_many_falls_back_to_lock_step_when_rejected(self):
+        host = FakeMetadataHost(
+            {"sdc:uuid": "uuid", "hostname": "host"}, pipelining=False
+        )
+        client = DataSourceSmartOS.JoyentMetadataSerialClient(None, fp=host)
+        self.assertEqual(
+            {"sdc:uuid": "uuid", "hostname": "host", "routes": None},
+            client.get_many(["sdc:uuid", "hostname", "routes"]),
+        )
+        self.assertFalse(client.pipelining)
+        self.assertEqual(b"", host.pending)
+        host.writes.clear()
+        self.assertEqual(
+            {"sdc:uuid": "uuid", "hostname": "host"},
+            client.get_many(["sdc:uuid", "hostname"]),
+        )
+        self.assertEqual([1, 1], [data.count(b"\n") for data in host.writes])
+
+    def test_get_many_decodes_legacy_base64_values(self):
+        host = FakeMetadataHost(
+            {
+                "base64_keys": "cloud-init:user-data",
+                "cloud-init:user-data": b64e("#cloud-config\n"),
+                "hostname": "host",
+            }
+        )
+        client = DataSourceSmartOS.JoyentMetadataLegacySerialClient(
+            None, smartos_type=DataSourceSmartOS.SMARTOS_ENV_KVM
+        )
+        client.fp = host
+        self.assertEqual(
+            {"cloud-init:user-data": "#cloud-config\n", "hostname": "host"},
+            client.get_many(["cloud-init:user-data", "hostname"]),
+        )
+        self.assertTrue(client.pipelining)
+        self.assertEqual(2, host.writes[0].count(b"\n"))
+
     def test_list_metadata_returns_list(self):
         parts = ["foo", "bar"]
         value = b64e("\n".join(parts))
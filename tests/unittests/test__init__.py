@@ -9,6 +9,7 @@ import pytest
 
 from cloudinit import handlers, helpers, settings, url_helper, util
 from cloudinit.cmd import main
+from cloudinit.url_cache import UrlCache
 from tests.unittests.helpers import ExitStack, TestCase, mock
 
 
@@ -318,6 +319,34 @@ class TestCmdlineUrl:
         assert logging.INFO == lvl
         assert url in msg
 
+    @mock.patch("cloudinit.url_cache.url_helper.read_file_or_url")
+    def test_valid_content_url_revalidated(self, m_read, tmpdir):
+        """Content from a previous boot is used when not modified."""
+        url = "http://example.com/foo"
+        payload = b"#cloud-config\nmydata: foo\nbar: wark\n"
+        cmdline = "ro %s=%s bar=1" % ("cloud-config-url", url)
+        response = FakeResponse(payload)
+        response.headers = {"ETag": '"1"'}
+        not_modified = FakeResponse(b"", status_code=304)
+        not_modified.headers = {}
+        m_read.side_effect = [
+            url_helper.UrlResponse(response),
+            url_helper.UrlResponse(not_modified),
+        ]
+        cache_dir = tmpdir.join("url-cache").strpath
+
+        for fname in ("ccfile1", "ccfile2"):
+            fpath = tmpdir.join(fname)
+            lvl, msg = main.attempt_cmdline_url(
+                fpath,
+                network=True,
+                cmdline=cmdline,
+                url_cache=UrlCache(cache_dir),
+            )
+            assert util.load_binary_file(fpath) == payload
+            assert logging.INFO == lvl
+        assert {"If-None-Match": '"1"'} == m_read.call_args[1]["headers"]
+
     @mock.patch("cloudinit.cmd.main.url_helper.read_file_or_url")
     def test_no_key_found(self, m_read, tmpdir):
         cmdline = "ro mykey=http://example.com/foo root=foo"
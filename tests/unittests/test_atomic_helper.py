@@ -3,6 +3,9 @@
 import json
 import os
 import stat
+from unittest import mock
+
+import pytest
 
 from cloudinit import atomic_helper
 
@@ -68,3 +71,60 @@ class TestAtomicHelper:
         contents = b"Hey there\n"
         atomic_helper.write_file(path, contents)
         self.check_file(path, contents)
+
+
+class TestWriteTransaction:
+    def test_writes_committed_on_exit(self, tmp_path):
+        """Staged writes only replace their targets when the block exits."""
+        path1 = tmp_path / "file1"
+        path2 = tmp_path / "subdir" / "file2"
+        path1.write_bytes(b"old")
+        with atomic_helper.write_transaction() as transaction:
+            atomic_helper.write_file(path1, b"new1")
+            atomic_helper.write_json(path2, {"key": "value"}, mode=0o600)
+            assert b"old" == path1.read_bytes()
+            assert not path2.exists()
+            with open(transaction.staged_path(path1), "rb") as stream:
+                assert b"new1" == stream.read()
+        assert b"new1" == path1.read_bytes()
+        assert {"key": "value"} == json.loads(path2.read_text())
+        assert 0o600 == stat.S_IMODE(os.stat(path2).st_mode)
+        assert ["file1", "subdir"] == sorted(os.listdir(tmp_path))
+        assert None is atomic_helper.get_transaction()
+
+    def test_writes_discarded_on_error(self, tmp_path):
+        """No target is written when the block raises."""
+        path = tmp_path / "file"
+        path.write_bytes(b"old")
+        with pytest.raises(RuntimeError):
+            with atomic_helper.write_transaction():
+                atomic_helper.write_file(path, b"new")
+                atomic_helper.write_file(tmp_path / "other", b"new")
+                raise RuntimeError("stage failed")
+        assert b"old" == path.read_bytes()
+        assert ["file"] == os.listdir(tmp_path)
+
+    def test_last_write_wins_and_nested_blocks_join(self, tmp_path):
+        path = tmp_path / "file"
+        with atomic_helper.write_transaction() as outer:
+            atomic_helper.write_file(path, b"first")
+            with atomic_helper.write_transaction() as inner:
+                assert outer is inner
+                atomic_helper.write_file(path, b"second")
+            assert not path.exists()
+            assert 1 == len(os.listdir(tmp_path))
+        assert b"second" == path.read_bytes()
+
+    def test_durable_syncs_files_and_each_directory_once(self, tmp_path):
+        with mock.patch("cloudinit.atomic_helper.os.fsync") as m_fsync:
+            with atomic_helper.write_transaction(durable=True):
+                for name in ("file1", "file2", "file3"):
+                    atomic_helper.write_file(tmp_path / name, b"content")
+        # One per file, one for the directory
+        assert 4 == m_fsync.call_count
+
+    def test_not_durable_by_default(self, tmp_path):
+        with mock.patch("cloudinit.atomic_helper.os.fsync") as m_fsync:
+            with atomic_helper.write_transaction():
+                atomic_helper.write_file(tmp_path / "file", b"content")
+        assert 0 == m_fsync.call_count
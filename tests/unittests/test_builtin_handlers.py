@@ -187,7 +187,7 @@ class TestJinjaTemplatePartHandler:
         instance_json = os.path.join(paths.run_dir, INSTANCE_DATA_FILE)
         util.write_file(instance_json, atomic_helper.json_dumps({}))
         h = JinjaTemplatePartHandler(paths, sub_handlers=[script_handler])
-        with mock.patch(MPATH + "load_text_file") as m_load:
+        with mock.patch(MPATH + "util.load_text_file") as m_load:
             with pytest.raises(JinjaLoadError) as context_manager:
                 m_load.side_effect = OSError(errno.EACCES, "Not allowed")
                 h.handle_part(
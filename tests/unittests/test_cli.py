@@ -281,7 +281,7 @@ class TestCLI:
         "args,expected_subcommands",
         [
             ([], ["schema"]),
-            (["analyze"], ["blame", "show", "dump"]),
+            (["analyze"], ["blame", "show", "dump", "trace"]),
         ],
     )
     def test_subcommand_parser_multi_arg(
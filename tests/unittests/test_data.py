@@ -5,6 +5,8 @@
 import gzip
 import logging
 import os
+import stat
+import threading
 from email import encoders
 from email.mime.application import MIMEApplication
 from email.mime.base import MIMEBase
@@ -22,6 +24,7 @@ from cloudinit import safeyaml, stages
 from cloudinit import user_data as ud
 from cloudinit import util
 from cloudinit.config.modules import Modules
+from cloudinit.instance_data_index import InstanceDataIndex
 from cloudinit.settings import DEFAULT_RUN_DIR, PER_INSTANCE
 from tests.unittests import helpers
 from tests.unittests.util import FakeDataSource
@@ -533,6 +536,11 @@ c: 4
             )
         )
         assert expected == loaded_json
+        # The index is rewritten along with instance-data-sensitive.json
+        with InstanceDataIndex(
+            init_tmp.paths.get_runpath("instance_data_sensitive")
+        ) as index:
+            assert "ubuntu" == index.get("system_info.distro")
 
         expected["_doc"] = stages.COMBINED_CLOUD_CONFIG_DOC
         assert expected == util.load_json(
@@ -768,6 +776,83 @@ class TestConsumeUserDataHttp:
         assert cc.get("bad") is None
         assert cc.get("included") is True
 
+    @responses.activate
+    def test_includes_fetched_concurrently_in_order(self, init_tmp):
+        """The includes of a part are fetched at once but kept in order."""
+        urls = ["http://hostname/%d" % idx for idx in range(3)]
+        # Times out unless all includes are being fetched at the same time
+        barrier = threading.Barrier(len(urls), timeout=5)
+
+        def callback(request):
+            barrier.wait()
+            return (200, {}, "#!/bin/sh\necho %s\n" % request.url)
+
+        for url in urls:
+            responses.add_callback(responses.GET, url, callback=callback)
+        # Fetched once for all its include-once lines
+        responses.add(responses.GET, "http://hostname/once", "#!/bin/sh\n")
+
+        ud_proc = ud.UserDataProcessor(init_tmp.paths)
+        message = ud_proc.process(
+            "#include-once\nhttp://hostname/once\nhttp://hostname/once\n"
+            "#include\n" + "\n".join(urls)
+        )
+        payloads = [
+            part.get_payload()
+            for part in message.walk()
+            if not ud.is_skippable(part)
+        ]
+        assert payloads == ["#!/bin/sh\n"] * 2 + [
+            "#!/bin/sh\necho %s\n" % url for url in urls
+        ]
+        assert len(responses.calls) == 4
+
+    @responses.activate
+    def test_include_failure_raised_without_waiting(self, init_tmp, mocker):
+        """A failing include doesn't wait on the fetches listed after it."""
+        mocker.patch("cloudinit.url_helper.time.sleep")
+        mocker.patch("cloudinit.user_data.INCLUDE_FETCH_WORKERS", 2)
+        slow_started = threading.Event()
+        release = threading.Event()
+        slow_done = threading.Event()
+
+        def bad_callback(request):
+            slow_started.wait(5)
+            return (403, {}, "")
+
+        def slow_callback(request):
+            slow_started.set()
+            release.wait(5)
+            slow_done.set()
+            return (200, {}, "#!/bin/sh\n")
+
+        responses.add_callback(
+            responses.GET, "http://bad/forbidden", callback=bad_callback
+        )
+        responses.add_callback(
+            responses.GET, "http://hostname/slow", callback=slow_callback
+        )
+        responses.add(responses.GET, "http://hostname/once", "#!/bin/sh\n")
+
+        ud_proc = ud.UserDataProcessor(init_tmp.paths)
+        try:
+            with pytest.raises(RuntimeError, match="403"):
+                ud_proc.process(
+                    "#include\nhttp://bad/forbidden\nhttp://hostname/slow\n"
+                    "#include-once\nhttp://hostname/once\n"
+                )
+            assert not slow_done.is_set()
+        finally:
+            release.set()
+            assert slow_done.wait(5)
+        # Pending fetches past the failure are cancelled
+        assert "http://hostname/once" not in [
+            call.request.url for call in responses.calls
+        ]
+        assert not os.path.exists(
+            ud_proc._get_include_once_filename("http://hostname/once")
+        )
+
 
 class TestUDProcess(helpers.ResourceUsingTestCase):
     def test_bytes_in_userdata(self):
@@ -790,6 +875,31 @@ class TestUDProcess(helpers.ResourceUsingTestCase):
         message = ud_proc.process(msg)
         self.assertTrue(count_messages(message) == 1)
 
+    def test_payload_decoded_only_when_examined(self):
+        """Parts of types that aren't examined are attached undecoded."""
+        msg = MIMEMultipart()
+        msg.attach(MIMEApplication(b"\x00" * 1024, "octet-stream"))
+        msg.attach(MIMEApplication(b"{}", "json"))
+        msg.attach(MIMEBase("text", "plain"))
+        msg.get_payload()[-1].set_payload("#!/bin/sh\necho hi\n")
+
+        ud_proc = ud.UserDataProcessor(self.getCloudPaths())
+        with mock.patch(
+            "cloudinit.user_data.util.fully_decoded_payload",
+            wraps=util.fully_decoded_payload,
+        ) as m_decode:
+            message = ud_proc.process(msg.as_bytes())
+        # Only the text/plain part, to find its actual content type
+        self.assertEqual(1, m_decode.call_count)
+        self.assertEqual(
+            [b"\x00" * 1024, b"{}", b"#!/bin/sh\necho hi\n"],
+            [
+                part.get_payload(decode=True)
+                for part in message.walk()
+                if not ud.is_skippable(part)
+            ],
+        )
+
 
 class TestConvertString(helpers.TestCase):
     def test_handles_binary_non_utf8_decodable(self):
@@ -912,3 +1022,59 @@ class TestFetchBaseConfig:
             "key3": "builtin3",
             "keyconfd1": "kconfd1",
         }
+
+    def test_cache_reused_until_an_input_changes(self, mocker, tmp_path):
+        """The cached config is used while its files and cmdline are same."""
+        run_dir = tmp_path / "run"
+        cfg_path = tmp_path / "cloud.cfg"
+        cfg_path.write_text("key1: value1\n")
+        (tmp_path / "cloud.cfg.d").mkdir()
+        instance_data_path = tmp_path / "instance-data-sensitive.json"
+        mocker.patch(f"{MPATH}.CLOUD_CONFIG", str(cfg_path))
+        mocker.patch(f"{MPATH}.BASE_CONFIG_CACHE_FILE", "cache.json")
+        mocker.patch(f"{MPATH}.util.get_builtin_cfg", return_value={})
+        mocker.patch(f"{MPATH}.util.get_cmdline", return_value="ro")
+        mocker.patch(f"{MPATH}.util.read_conf_from_cmdline", return_value={})
+        mocker.patch(f"{MPATH}.read_runtime_config", return_value={})
+        m_read_confd = mocker.spy(util, "read_conf_with_confd")
+
+        def fetch():
+            return stages.fetch_base_config(
+                str(run_dir), instance_data_file=instance_data_path
+            )
+
+        assert {"key1": "value1"} == fetch()
+        assert 0o600 == stat.S_IMODE(os.stat(run_dir / "cache.json").st_mode)
+        assert {"key1": "value1"} == fetch()
+        assert 1 == m_read_confd.call_count
+
+        (tmp_path / "cloud.cfg.d" / "90.cfg").write_text("key2: value2\n")
+        assert {"key1": "value1", "key2": "value2"} == fetch()
+        assert 2 == m_read_confd.call_count
+        instance_data_path.write_text("{}")
+        fetch()
+        assert 3 == m_read_confd.call_count
+        mocker.patch(f"{MPATH}.util.get_cmdline", return_value="rw")
+        fetch()
+        assert 4 == m_read_confd.call_count
+        fetch()
+        assert 4 == m_read_confd.call_count
+
+    def test_cache_not_written_with_custom_conf_d(self, mocker, tmp_path):
+        """Files in a conf_d directory named by cloud.cfg aren't keyed."""
+        run_dir = tmp_path / "run"
+        confd = tmp_path / "custom.d"
+        confd.mkdir()
+        cfg_path = tmp_path / "cloud.cfg"
+        cfg_path.write_text(f"conf_d: {confd}\n")
+        mocker.patch(f"{MPATH}.CLOUD_CONFIG", str(cfg_path))
+        mocker.patch(f"{MPATH}.BASE_CONFIG_CACHE_FILE", "cache.json")
+        mocker.patch(f"{MPATH}.util.get_builtin_cfg", return_value={})
+        mocker.patch(f"{MPATH}.util.get_cmdline", return_value="ro")
+        mocker.patch(f"{MPATH}.util.read_conf_from_cmdline", return_value={})
+        mocker.patch(f"{MPATH}.read_runtime_config", return_value={})
+
+        assert "key1" not in stages.fetch_base_config(str(run_dir))
+        (confd / "90.cfg").write_text("key1: value1\n")
+        assert "value1" == stages.fetch_base_config(str(run_dir))["key1"]
+        assert not (run_dir / "cache.json").exists()
@@ -1,5 +1,6 @@
 import os
 import shutil
+import stat
 import tempfile
 from unittest import mock
 
@@ -245,3 +246,113 @@ class TestSubDMIVars:
         for warning in warnings:
             assert 1 == caplog.text.count(warning)
         assert m_dmi.call_args_list == read_dmi_data_mocks
+
+
+SMBIOS_OUT = """\
+ID    SIZE TYPE
+0     54   SMB_TYPE_BIOS (type 0) (BIOS Information)
+
+  Vendor: SeaBIOS
+  Version String: 1.16.0
+  Release Date: 04/01/2014
+  Characteristics: 0x8
+        SMB_BIOSFL_NOTSUP (BIOS Characteristics Not Supported)
+
+ID    SIZE TYPE
+256   84   SMB_TYPE_SYSTEM (type 1) (system information)
+
+  Manufacturer: QEMU
+  Product: Standard PC (i440FX + PIIX, 1996)
+  Version: pc-i440fx-7.2
+
+  UUID: 5a1e3c36-6bd5-4a25-9a5a-a0d3b0bbb6ed
+"""
+
+DMIDECODE_OUT = """\
+# dmidecode 3.3
+Getting SMBIOS data from sysfs.
+SMBIOS 2.8 present.
+
+Handle 0x0100, DMI type 1, 27 bytes
+System Information
+\tManufacturer: QEMU
+\tProduct Name: Standard PC (i440FX + PIIX, 1996)
+\tSerial Number: Not Specified
+\tUUID: 5a1e3c36-6bd5-4a25-9a5a-a0d3b0bbb6ed
+
+Handle 0x0300, DMI type 3, 22 bytes
+Chassis Information
+\tManufacturer: QEMU
+\tAsset Tag: .....
+"""
+
+
+class TestDMISnapshot:
+    @pytest.fixture(autouse=True)
+    def snapshot_file(self, tmp_path, mocker):
+        snapshot_file = str(tmp_path / "dmi-snapshot.json")
+        mocker.patch("cloudinit.dmi.DMI_SNAPSHOT_FILE", snapshot_file)
+        mocker.patch("cloudinit.dmi.is_container", return_value=False)
+        return snapshot_file
+
+    def test_smbios_runs_once_for_all_keys(self, mocker):
+        """All illumos keys are served from a single smbios dump."""
+        m_subp = mocker.patch(
+            "cloudinit.dmi.subp.subp", return_value=SubpResult(SMBIOS_OUT, "")
+        )
+        mocker.patch("cloudinit.dmi.is_illumos", return_value=True)
+        assert "QEMU" == dmi.read_dmi_data("system-manufacturer")
+        assert "5a1e3c36-6bd5-4a25-9a5a-a0d3b0bbb6ed" == dmi.read_dmi_data(
+            "system-uuid"
+        )
+        assert "1.16.0" == dmi.read_dmi_data("bios-version")
+        assert None is dmi.read_dmi_data("chassis-asset-tag")
+        assert [mock.call(["smbios"], rcs=[0])] == m_subp.call_args_list
+
+    def test_dmidecode_runs_once_for_all_mapped_keys(self, mocker):
+        """Mapped dmidecode keys are served from a single dmidecode dump."""
+        m_subp = mocker.patch(
+            "cloudinit.dmi.subp.subp",
+            return_value=SubpResult(DMIDECODE_OUT, ""),
+        )
+        assert "Standard PC (i440FX + PIIX, 1996)" == dmi._call_dmidecode(
+            "system-product-name", "/usr/sbin/dmidecode"
+        )
+        assert "Not Specified" == dmi._call_dmidecode(
+            "system-serial-number", "/usr/sbin/dmidecode"
+        )
+        assert "" == dmi._call_dmidecode(
+            "chassis-asset-tag", "/usr/sbin/dmidecode"
+        )
+        assert [
+            mock.call(["/usr/sbin/dmidecode", "--type", "0,1,2,3"], rcs=[0])
+        ] == m_subp.call_args_list
+
+    def test_snapshot_reused_by_later_stages(self, mocker, snapshot_file):
+        """A new process reads the snapshot instead of running smbios."""
+        mocker.patch("cloudinit.dmi.is_illumos", return_value=True)
+        mocker.patch(
+            "cloudinit.dmi.subp.subp", return_value=SubpResult(SMBIOS_OUT, "")
+        )
+        dmi.read_dmi_data("system-uuid")
+        assert 0o600 == stat.S_IMODE(os.stat(snapshot_file).st_mode)
+        dmi._get_dmi_snapshot.cache_clear()
+        m_subp = mocker.patch(
+            "cloudinit.dmi.subp.subp",
+            side_effect=AssertionError("Unexpected smbios call"),
+        )
+        assert "QEMU" == dmi.read_dmi_data("system-manufacturer")
+        assert 0 == m_subp.call_count
+
+    def test_failed_dump_falls_back_to_dmidecode_string(self, mocker):
+        """When the dump fails, dmidecode --string is used per key."""
+
+        def _subp(cmd, **kwargs):
+            if "--type" in cmd:
+                raise subp.ProcessExecutionError()
+            return SubpResult("QEMU\n", "")
+
+        mocker.patch("cloudinit.dmi.subp.subp", side_effect=_subp)
+        assert "QEMU" == dmi._call_dmidecode(
+            "system-manufacturer", "/usr/sbin/dmidecode"
+        )
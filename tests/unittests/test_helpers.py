@@ -3,9 +3,10 @@
 """Tests of the built-in user data handlers."""
 
 import os
+import pickle
 from pathlib import Path
 
-from cloudinit import sources
+from cloudinit import helpers, sources
 from tests.helpers import cloud_init_project_dir, get_top_level_dir
 from tests.unittests.helpers import ResourceUsingTestCase
 
@@ -65,3 +66,22 @@ class Testcloud_init_project_dir:
             == cloud_init_project_dir("test")
             == str(Path(self._get_top_level_dir_alt_implementation(), "test"))
         )
+
+
+class TestRunners:
+    def test_runners_pickle_without_locks(self):
+        """Distros holding runners are pickled with the datasource."""
+        runners = helpers.Runners(paths=None)
+        runners._get_run_lock("config_ntp")
+        restored = pickle.loads(pickle.dumps(runners))
+        assert {} == restored._run_locks
+        assert restored._get_run_lock("config_ntp")
+
+    def test_runners_unpickled_from_older_versions_have_locks(self):
+        runners = helpers.Runners(paths=None)
+        runners.__dict__.pop("_lock")
+        runners.__dict__.pop("_run_locks")
+        state = runners.__dict__.copy()
+        restored = helpers.Runners.__new__(helpers.Runners)
+        restored.__setstate__(state)
+        assert restored._get_run_lock("config_ntp")
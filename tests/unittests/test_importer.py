@@ -1,6 +1,10 @@
+import subprocess
+import sys
+from unittest import mock
+
 import pytest
 
-from cloudinit.importer import match_case_insensitive_module_name
+from cloudinit.importer import lazy_import, match_case_insensitive_module_name
 
 
 @pytest.mark.parametrize(
@@ -22,3 +26,46 @@ from cloudinit.importer import match_case_insensitive_module_name
 )
 def test_importer(m_name, m_match):
     assert m_match == match_case_insensitive_module_name(m_name)
+
+
+class TestLazyImport:
+    @pytest.fixture
+    def lazy_mod(self, tmp_path, monkeypatch):
+        """Return an importable module name which isn't imported yet."""
+        tmp_path.joinpath("lazy_mod_under_test.py").write_text(
+            "def func():\n    return 'real'\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, "lazy_mod_under_test", False)
+        yield "lazy_mod_under_test"
+        sys.modules.pop("lazy_mod_under_test", None)
+
+    def test_import_deferred_until_attribute_use(self, lazy_mod):
+        """The module is imported on first attribute access."""
+        module = lazy_import(lazy_mod)
+        assert lazy_mod not in sys.modules
+        assert "real" == module.func()
+        assert sys.modules[lazy_mod].func is module.func
+
+    def test_already_imported_module_is_returned(self):
+        assert sys.modules["cloudinit.importer"] is lazy_import(
+            "cloudinit.importer"
+        )
+
+    def test_patches_apply_to_the_real_module(self, lazy_mod):
+        """mock.patch through the lazy module patches the real one."""
+        module = lazy_import(lazy_mod)
+        with mock.patch.object(module, "func", return_value="mocked"):
+            assert "mocked" == sys.modules[lazy_mod].func()
+            assert "mocked" == module.func()
+        assert "real" == sys.modules[lazy_mod].func()
+
+    @pytest.mark.parametrize(
+        "module_name",
+        ("cloudinit.importer", "cloudinit.user_data", "cloudinit.util"),
+    )
+    def test_modules_importable_first(self, module_name):
+        """Modules using lazy_import can be the first cloudinit import."""
+        subprocess.run(
+            [sys.executable, "-c", f"import {module_name}"], check=True
+        )
@@ -0,0 +1,109 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import os
+
+import pytest
+
+from cloudinit import atomic_helper
+from cloudinit.cmd.query import _find_instance_data_leaf_by_varname_path
+from cloudinit.handlers.jinja_template import convert_jinja_instance_data
+from cloudinit.instance_data_index import (
+    InstanceDataIndex,
+    StaleIndexError,
+    get_index_path,
+    write_index,
+)
+
+INSTANCE_DATA = {
+    "ds": {
+        "meta-data": {"instance-id": "i-1", "local.hostname": "host"},
+        "v1.0": {"config": {"user.network-config": 1}},
+        "_doc": "EXPERIMENTAL",
+    },
+    "merged_cfg": {"key": [1, "two", None, {"three": 3.0}]},
+    "v1": {
+        "cloud-name": "mycloud",
+        "instance_id": "i-1",
+        "region": "",
+        "availability-zone": None,
+    },
+    "a-b": "hyphenated",
+    "a_b": "underscored",
+    "unicode": "éè",
+}
+
+
+def _write(tmp_path, instance_data=None):
+    instance_data_file = str(tmp_path / "instance-data.json")
+    instance_data = instance_data or INSTANCE_DATA
+    atomic_helper.write_json(instance_data_file, instance_data)
+    write_index(instance_data_file, instance_data, mode=0o600)
+    return instance_data_file
+
+
+def _query_varnames(data, prefix=""):
+    """Yield the varnames query resolves from a jinja aliased tree."""
+    for key, value in data.items():
+        if "." in key:
+            continue
+        varname = f"{prefix}.{key}" if prefix else key
+        yield varname
+        if isinstance(value, dict):
+            yield from _query_varnames(value, varname)
+
+
+class TestInstanceDataIndex:
+    def test_index_path(self):
+        assert "/run/cloud-init/instance-data-sensitive.idx" == (
+            get_index_path("/run/cloud-init/instance-data-sensitive.json")
+        )
+
+    def test_index_matches_query_walk(self, tmp_path):
+        """Each varname resolves to the same value as a walk of the tree."""
+        instance_data_file = _write(tmp_path)
+        without_aliases = convert_jinja_instance_data(INSTANCE_DATA)
+        with_aliases = convert_jinja_instance_data(
+            INSTANCE_DATA, include_key_aliases=True
+        )
+        varnames = list(_query_varnames(with_aliases))
+        assert "ds.v1_0.config.user_network_config" in varnames
+        assert "cloud_name" in varnames
+        with InstanceDataIndex(instance_data_file) as index:
+            for varname in varnames:
+                assert _find_instance_data_leaf_by_varname_path(
+                    jinja_vars_without_aliases=without_aliases,
+                    jinja_vars_with_aliases=with_aliases,
+                    varname=varname,
+                    list_keys=False,
+                ) == index.get(varname), varname
+
+    @pytest.mark.parametrize(
+        "varname",
+        ("absent", "v1.absent", "v1.cloud-name.absent", "ds.v1.0", ""),
+    )
+    def test_unknown_varname_raises_key_error(self, varname, tmp_path):
+        with InstanceDataIndex(_write(tmp_path)) as index:
+            with pytest.raises(KeyError):
+                index.get(varname)
+
+    def test_index_has_mode_of_instance_data(self, tmp_path):
+        index_path = get_index_path(_write(tmp_path))
+        assert 0o600 == os.stat(index_path).st_mode & 0o777
+
+    def test_changed_instance_data_makes_index_stale(self, tmp_path):
+        instance_data_file = _write(tmp_path)
+        atomic_helper.write_json(instance_data_file, {"v1": {}})
+        with pytest.raises(StaleIndexError):
+            InstanceDataIndex(instance_data_file)
+
+    def test_invalid_index_is_stale(self, tmp_path):
+        instance_data_file = _write(tmp_path)
+        atomic_helper.write_file(get_index_path(instance_data_file), b"junk")
+        with pytest.raises(StaleIndexError):
+            InstanceDataIndex(instance_data_file)
+
+    def test_missing_index_raises_os_error(self, tmp_path):
+        instance_data_file = str(tmp_path / "instance-data.json")
+        atomic_helper.write_json(instance_data_file, INSTANCE_DATA)
+        with pytest.raises(OSError):
+            InstanceDataIndex(instance_data_file)
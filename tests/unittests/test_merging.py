@@ -10,7 +10,7 @@ import string
 import pytest
 
 from cloudinit import helpers as c_helpers
-from cloudinit import util
+from cloudinit import mergers, util
 from cloudinit.config.schema import (
     SchemaValidationError,
     get_schema,
@@ -264,6 +264,35 @@ class TestSimpleRun(helpers.ResourceUsingTestCase):
         self.assertEqual(c, d)
 
 
+class TestMergeDefault:
+    def test_matches_default_mergers(self):
+        """The fast path merges like the mergers it stands in for."""
+        merger = mergers.construct(mergers.default_mergers())
+        for seed in range(200):
+            rand = random.Random(seed)
+            a = _make_dict(0, 5, rand)
+            b = _make_dict(0, 5, rand)
+            # Merge into values of every type under the same keys
+            for key in list(b)[:3]:
+                a[key] = make_dict(3, seed + 1000)
+            assert merger.merge(a, b) == mergers.merge_default(a, b)
+
+    def test_mixed_types(self):
+        merger = mergers.construct(mergers.default_mergers())
+        a = {"l": [1, 2], "t": (1, 2), "s": "a", "i": 1, "n": None, "d": {}}
+        b = {key: {"x": [3]} for key in a}
+        b["e"] = "new"
+        assert merger.merge(a, b) == mergers.merge_default(a, b)
+        assert merger.merge(a["l"], [3]) == mergers.merge_default(a["l"], [3])
+        assert merger.merge(a["t"], [3]) == mergers.merge_default(a["t"], [3])
+
+    def test_merger_plans_reused(self):
+        parsed = mergers.string_extract_mergers("dict(replace)+list(append)")
+        assert mergers.construct(parsed) is mergers.construct(
+            mergers.string_extract_mergers("dict(replace)+list(append)")
+        )
+
+
 class TestMergingSchema:
     @pytest.mark.parametrize(
         "config, error_msg",
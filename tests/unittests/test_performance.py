@@ -0,0 +1,110 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import json
+import threading
+
+import pytest
+
+from cloudinit import performance
+
+
+@pytest.fixture(autouse=True)
+def reset_performance():
+    performance.reset_counters()
+    yield
+    performance.stop_trace()
+    performance.reset_counters()
+
+
+class TestCounters:
+    def test_increment(self):
+        performance.increment("a")
+        performance.increment("a", 2)
+        performance.increment("b", 0)
+        assert {"a": 3, "b": 0} == performance.get_counters()
+
+    def test_increment_from_threads(self):
+        def work():
+            for _ in range(1000):
+                performance.increment("a")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert {"a": 4000} == performance.get_counters()
+
+
+class TestTrace:
+    def _read(self, path):
+        return [json.loads(line) for line in path.read().splitlines()]
+
+    def test_no_trace_by_default(self, tmpdir):
+        with performance.Timed("untraced"):
+            pass
+        assert [] == tmpdir.listdir()
+
+    def test_records_nested_spans(self, tmpdir):
+        trace_file = tmpdir.join("trace.jsonl")
+        performance.start_trace(trace_file.strpath, "init")
+        with performance.Timed("outer", log_mode="skip"):
+            with performance.Timed("inner", log_mode="always"):
+                pass
+        performance.increment("a")
+        performance.stop_trace()
+
+        inner, outer, counters = self._read(trace_file)
+        assert "inner" == inner["name"]
+        assert {"stage": "init", "depth": 1, "parent": "outer"} == inner[
+            "args"
+        ]
+        assert "outer" == outer["name"]
+        assert {"stage": "init", "depth": 0} == outer["args"]
+        for span in (inner, outer):
+            assert "X" == span["ph"]
+            assert "init" == span["cat"]
+        assert outer["ts"] <= inner["ts"]
+        assert outer["dur"] >= inner["dur"]
+        assert {"a": 1} == counters["args"]
+
+    def test_records_thread_ids(self, tmpdir):
+        trace_file = tmpdir.join("trace.jsonl")
+        performance.start_trace(trace_file.strpath, "init")
+
+        def work():
+            with performance.Timed("thread", log_mode="skip"):
+                pass
+
+        with performance.Timed("main", log_mode="skip"):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        performance.stop_trace()
+
+        events = {e["name"]: e for e in self._read(trace_file)}
+        assert events["thread"]["tid"] != events["main"]["tid"]
+        # Spans on other threads are not nested under this thread's spans
+        assert 0 == events["thread"]["args"]["depth"]
+
+    def test_stages_append_to_trace(self, tmpdir):
+        trace_file = tmpdir.join("trace.jsonl")
+        for stage in ("init-local", "init"):
+            performance.start_trace(trace_file.strpath, stage)
+            with performance.Timed(stage, log_mode="skip"):
+                pass
+            performance.stop_trace()
+        stages = [e["cat"] for e in self._read(trace_file) if e["ph"] == "X"]
+        assert ["init-local", "init"] == stages
+
+    def test_span_outliving_trace(self, tmpdir):
+        trace_file = tmpdir.join("trace.jsonl")
+        performance.start_trace(trace_file.strpath, "init")
+        with performance.Timed("outlives", log_mode="skip"):
+            performance.stop_trace()
+        assert ["counters"] == [e["name"] for e in self._read(trace_file)]
+
+    def test_unwritable_trace_is_not_fatal(self, tmpdir):
+        performance.start_trace(tmpdir.join("a", "b").strpath, "init")
+        with performance.Timed("untraced", log_mode="skip"):
+            pass
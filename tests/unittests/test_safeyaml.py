@@ -2,9 +2,26 @@
 
 """Tests for cloudinit.safeyaml."""
 
+import glob
+
 import pytest
+import yaml
 
+from cloudinit import safeyaml
 from cloudinit.safeyaml import load_with_marks
+from tests.helpers import cloud_init_project_dir
+
+# YAML documents of the tree: test data and the module docs examples
+YAML_CORPUS = sorted(
+    path
+    for pattern in (
+        "tests/data/**/*",
+        "doc/module-docs/**/*.yaml",
+        "config/cloud.cfg.d/*.cfg",
+    )
+    for path in glob.glob(cloud_init_project_dir(pattern), recursive=True)
+    if not path.endswith((".pkl", ".json"))
+)
 
 
 class TestLoadWithMarks:
@@ -104,3 +121,48 @@ class TestLoadWithMarks:
         (processed_yaml, yaml_marks) = load_with_marks(source_yaml)
         assert loaded_yaml == processed_yaml
         assert schemamarks == yaml_marks
+
+
+def _safe_load_or_error(loader, content):
+    try:
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError as e:
+        return type(e)
+
+
+class TestLoad:
+    @pytest.mark.skipif(
+        not yaml.__with_libyaml__, reason="PyYAML built without libyaml"
+    )
+    def test_fast_loader_matches_safe_load_on_corpus(self):
+        """libyaml loads the documents of the tree like yaml.safe_load."""
+        assert YAML_CORPUS
+        mismatches = []
+        for path in YAML_CORPUS:
+            try:
+                with open(path, "rb") as stream:
+                    content = stream.read().decode()
+            except (IsADirectoryError, UnicodeDecodeError):
+                continue
+            expected = _safe_load_or_error(yaml.SafeLoader, content)
+            if expected != _safe_load_or_error(
+                safeyaml.FastSafeLoader, content
+            ):
+                mismatches.append(path)
+        assert [] == mismatches
+
+    @pytest.mark.parametrize(
+        "content", ("a: [1", "a: b: c", "a:\n\t- b", "[x]: '"), ids=repr
+    )
+    def test_errors_are_those_of_safe_load(self, content):
+        """Invalid YAML raises the errors of the pure Python loader."""
+        with pytest.raises(yaml.YAMLError) as expected:
+            yaml.safe_load(content)
+        with pytest.raises(yaml.YAMLError) as error:
+            safeyaml.load(content)
+        assert str(expected.value) == str(error.value)
+
+    def test_load_types(self):
+        """Values are constructed like yaml.safe_load does."""
+        content = "a: 2020-01-02\nb: !!binary aGk=\nc: 0o17\nd: yes\n"
+        assert yaml.safe_load(content) == safeyaml.load(content)
@@ -629,6 +629,42 @@ class TestInit:
         )
 
 
+class TestInitPreviousDatasource:
+    @pytest.fixture
+    def cfg(self, tmpdir):
+        return {
+            "system_info": {
+                "distro": "ubuntu",
+                "paths": {"cloud_dir": str(tmpdir), "run_dir": str(tmpdir)},
+            }
+        }
+
+    def test_fetch_reuses_previous_datasource(self, cfg):
+        """The previous stage's datasource is used instead of the cache."""
+        previous = FakeDataSource()
+        init = stages.Init(ds_deps=[], previous_datasource=previous)
+        with mock.patch.object(
+            stages.Init, "_read_cfg", return_value=cfg
+        ), mock.patch(M_PATH + "sources.ds_cache_load") as m_load:
+            assert previous is init.fetch(existing="trust")
+            assert init.ds_restored
+            assert init.paths.cloud_dir == previous.paths.cloud_dir
+            assert init.distro is previous.distro
+        m_load.assert_not_called()
+
+    def test_fetch_restores_cache_without_previous_datasource(self, cfg):
+        """Without a previous datasource the cache is restored."""
+        cached = FakeDataSource()
+        init = stages.Init(ds_deps=[])
+        with mock.patch.object(
+            stages.Init, "_read_cfg", return_value=cfg
+        ), mock.patch(
+            M_PATH + "sources.ds_cache_load", return_value=cached
+        ) as m_load:
+            assert cached is init.fetch(existing="trust")
+        assert 1 == m_load.call_count
+
+
 class TestInit_InitializeFilesystem:
     """Tests for cloudinit.stages.Init._initialize_filesystem.
 
@@ -171,6 +171,19 @@ class TestTemplates(test_helpers.CiTestCase):
             expected_result,
         )
 
+    def test_jinja_templates_compiled_once(self):
+        """Rendering the same template again reuses its compiled form."""
+        blob = self.add_header("jinja", "compiled once: {{a}}")
+        templater._compile_jinja.cache_clear()
+        self.assertEqual(
+            "compiled once: 1", templater.render_string(blob, {"a": 1})
+        )
+        self.assertEqual(
+            "compiled once: 2", templater.render_string(blob, {"a": 2})
+        )
+        cache_info = templater._compile_jinja.cache_info()
+        self.assertEqual((1, 1), (cache_info.hits, cache_info.misses))
+
 
 class TestJinjaSyntaxParsingException:
     def test_jinja_syntax_parsing_exception_message(self):
@@ -0,0 +1,118 @@
+# This file is part of cloud-init. See LICENSE file for license information.
+
+import hashlib
+import os
+import stat
+
+import pytest
+import responses
+
+from cloudinit import performance
+from cloudinit.url_cache import INDEX_FILE, UrlCache
+from cloudinit.url_helper import StringResponse, UrlResponse
+
+URL = "http://hostname/path"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return UrlCache(str(tmp_path / "url-cache"))
+
+
+def add_response(content, etag='"v1"', status=200, url=URL):
+    headers = {"ETag": etag} if etag else {}
+    responses.add(
+        responses.GET, url, body=content, status=status, headers=headers
+    )
+
+
+class TestUrlCache:
+    @responses.activate
+    def test_revalidates_cached_content(self, cache, tmp_path):
+        """A 304 response is answered with the content cached before."""
+        performance.reset_counters()
+        add_response(b"content")
+        add_response(b"", status=304)
+
+        assert b"content" == cache.fetch(URL).contents
+        # Cached content is used across UrlCache instances, as across boots
+        resp = UrlCache(cache.cache_dir).fetch(URL, headers={"X-Foo": "bar"})
+
+        assert isinstance(resp, StringResponse)
+        assert resp.ok()
+        assert b"content" == resp.contents
+        request = responses.calls[1].request
+        assert '"v1"' == request.headers["If-None-Match"]
+        assert "bar" == request.headers["X-Foo"]
+        assert 1 == performance.get_counters()["url_cache.not_modified"]
+        blob = os.path.join(
+            cache.cache_dir, hashlib.sha256(b"content").hexdigest()
+        )
+        for path in (cache.cache_dir, blob, f"{cache.cache_dir}/{INDEX_FILE}"):
+            assert 0 == stat.S_IMODE(os.stat(path).st_mode) & 0o077
+
+    @responses.activate
+    def test_modified_content_replaces_cached_content(self, cache):
+        add_response(b"old")
+        add_response(b"new", etag='"v2"')
+        add_response(b"", etag='"v2"', status=304)
+
+        assert b"old" == cache.fetch(URL).contents
+        assert b"new" == cache.fetch(URL).contents
+        assert b"new" == cache.fetch(URL).contents
+        assert '"v2"' == responses.calls[2].request.headers["If-None-Match"]
+
+    @responses.activate
+    def test_content_without_validators_not_cached(self, cache):
+        add_response(b"content", etag=None)
+        add_response(b"content", etag=None)
+
+        cache.fetch(URL)
+        cache.fetch(URL)
+
+        assert "If-None-Match" not in responses.calls[1].request.headers
+        assert not os.path.exists(cache.cache_dir)
+
+    @responses.activate
+    def test_corrupt_content_fetched_unconditionally(self, cache):
+        add_response(b"content")
+        add_response(b"content")
+        cache.fetch(URL)
+        blob = os.path.join(
+            cache.cache_dir, hashlib.sha256(b"content").hexdigest()
+        )
+        with open(blob, "wb") as stream:
+            stream.write(b"corrupt")
+
+        resp = UrlCache(cache.cache_dir).fetch(URL)
+
+        assert isinstance(resp, UrlResponse)
+        assert b"content" == resp.contents
+        assert "If-None-Match" not in responses.calls[1].request.headers
+
+    @responses.activate
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = UrlCache(str(tmp_path / "url-cache"), max_size=20)
+        for idx in range(3):
+            add_response(b"content%d" % idx, url=f"{URL}{idx}")
+        add_response(b"", status=304, url=f"{URL}0")
+
+        cache.fetch(f"{URL}0")
+        cache.fetch(f"{URL}1")
+        # Revalidating url 0 makes url 1 the least recently used
+        cache.fetch(f"{URL}0")
+        cache.fetch(f"{URL}2")
+
+        assert {f"{URL}0", f"{URL}2"} == set(cache._load_index())
+        assert not os.path.exists(
+            os.path.join(
+                cache.cache_dir, hashlib.sha256(b"content1").hexdigest()
+            )
+        )
+
+    def test_files_not_cached(self, cache, tmp_path):
+        path = tmp_path / "file"
+        path.write_bytes(b"content")
+
+        assert b"content" == cache.fetch(f"file://{path}").contents
+        assert not os.path.exists(cache.cache_dir)
@@ -11,13 +11,15 @@ import pytest
 import requests
 import responses
 
-from cloudinit import util, version
+from cloudinit import performance, util, version
 from cloudinit.url_helper import (
     REDACTED,
+    SessionPool,
     UrlError,
     UrlResponse,
     _handle_error,
     dual_stack,
+    get_session,
     oauth_headers,
     read_file_or_url,
     readurl,
@@ -405,6 +407,65 @@ class TestReadUrl:
         assert m_request.call_count == 3
 
 
+class TestSessionPool:
+    def test_same_host_shares_session(self):
+        pool = SessionPool()
+        session = pool.get("http://169.254.169.254/latest/meta-data/")
+        assert session is pool.get("http://169.254.169.254/latest/user-data")
+        assert session is not pool.get("http://169.254.169.254:8080/")
+        assert session is not pool.get("https://169.254.169.254/")
+        assert session is not pool.get("http://[fd00:ec2::254]/")
+
+    def test_close_creates_new_sessions(self):
+        pool = SessionPool()
+        session = pool.get("http://hostname/path")
+        pool.close()
+        assert session is not pool.get("http://hostname/path")
+
+    def test_close_records_connection_counters(self):
+        """Connection counts are fed into the performance counters."""
+        performance.reset_counters()
+        pool = SessionPool()
+        session = pool.get("http://hostname/path")
+        with mock.patch(
+            M_PATH + "_connection_stats", return_value=(1, 3)
+        ) as m_stats:
+            pool.close()
+        m_stats.assert_called_once_with(session)
+        assert {
+            "url_helper.connections.new": 1,
+            "url_helper.connections.reused": 3,
+        } == performance.get_counters()
+
+    @responses.activate
+    def test_readurl_reuses_pooled_session(self):
+        url = "http://hostname/path"
+        responses.add(responses.GET, url, b"data")
+        session = get_session(url)
+        with mock.patch.object(
+            session, "request", wraps=session.request
+        ) as m_request:
+            readurl(url)
+            readurl(url)
+        assert 2 == m_request.call_count
+
+    def test_readurl_explicit_session_bypasses_pool(self):
+        m_session = mock.MagicMock()
+        readurl("http://hostname/path", session=m_session)
+        assert 1 == m_session.request.call_count
+
+    def test_readurl_discards_session_on_connection_error(self, mocker):
+        mocker.patch("time.sleep")
+        url = "http://hostname/path"
+        m_request = mocker.patch("requests.Session.request", autospec=True)
+        m_request.side_effect = requests.exceptions.ConnectionError("broke")
+        with pytest.raises(UrlError):
+            readurl(url, retries=1)
+        # Each attempt is made with a fresh session
+        first, second = [c.args[0] for c in m_request.call_args_list]
+        assert first is not second
+
+
 event = Event()
 
 
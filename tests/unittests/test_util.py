@@ -477,11 +477,10 @@ class TestUtil:
         mocker.patch("os.path.exists", return_value=True)
         mocker.patch(
             "cloudinit.util.load_text_file",
-            return_value='## template: jinja\n{"a": "{{c}}"}',
-        )
-        mocker.patch(
-            "cloudinit.handlers.jinja_template.load_text_file",
-            return_value='{"c": "d"}',
+            side_effect={
+                "cfg_path": '## template: jinja\n{"a": "{{c}}"}',
+                "vars_path": '{"c": "d"}',
+            }.get,
         )
 
         conf = util.read_conf("cfg_path", instance_data_file="vars_path")
@@ -496,11 +495,10 @@ class TestUtil:
         mocker.patch("os.path.exists", return_value=True)
         mocker.patch(
             "cloudinit.util.load_text_file",
-            return_value='## template: jinja\n{"a": "{{c}}"',  # missing }
-        )
-        mocker.patch(
-            "cloudinit.handlers.jinja_template.load_text_file",
-            return_value='{"c": "d"}',
+            side_effect={
+                "cfg_path": '## template: jinja\n{"a": "{{c}}"',  # missing }
+                "vars_path": '{"c": "d"}',
+            }.get,
         )
         conf = util.read_conf("cfg_path", instance_data_file="vars_path")
         assert "Failed loading yaml blob" in caplog.text
@@ -511,11 +509,10 @@ class TestUtil:
         mocker.patch("os.path.exists", return_value=True)
         mocker.patch(
             "cloudinit.util.load_text_file",
-            return_value='## template: jinja\n{"a": "{{c}}"}',
-        )
-        mocker.patch(
-            "cloudinit.handlers.jinja_template.load_text_file",
-            return_value='{"c": "d"',  # missing }
+            side_effect={
+                "cfg_path": '## template: jinja\n{"a": "{{c}}"}',
+                "vars_path": '{"c": "d"',  # missing }
+            }.get,
         )
         conf = util.read_conf("cfg_path", instance_data_file="vars_path")
         assert "Could not apply Jinja template" in caplog.text
@@ -536,11 +533,10 @@ class TestUtil:
         mocker.patch("os.path.exists", return_value=True)
         mocker.patch(
             "cloudinit.util.load_text_file",
-            return_value="## template: jinja\n" + template,
-        )
-        mocker.patch(
-            "cloudinit.handlers.jinja_template.load_text_file",
-            return_value='{"c": "d"}',
+            side_effect={
+                "cfg_path": "## template: jinja\n" + template,
+                "vars_path": '{"c": "d"}',
+            }.get,
         )
         conf = util.read_conf("cfg_path", instance_data_file="vars_path")
         assert (
@@ -880,13 +876,78 @@ class TestBlkid(CiTestCase):
             },
         }
 
+    blkid_export_out = dedent(
+        """\
+        DEVNAME=/dev/loop0
+        TYPE=squashfs
+
+        DEVNAME=/dev/loop1
+        TYPE=squashfs
+
+        DEVNAME=/dev/loop2
+        TYPE=squashfs
+
+        DEVNAME=/dev/loop3
+        TYPE=squashfs
+
+        DEVNAME=/dev/sda1
+        UUID={id01}
+        TYPE=vfat
+        PARTUUID={id02}
+
+        DEVNAME=/dev/sda2
+        UUID={id03}
+        TYPE=ext4
+        PARTUUID={id04}
+
+        DEVNAME=/dev/sda3
+        UUID={id05}
+        TYPE=ext4
+        PARTUUID={id06}
+
+        DEVNAME=/dev/sda4
+        LABEL=default
+        UUID={id07}
+        UUID_SUB={id08}
+        TYPE=zfs_member
+        PARTUUID={id09}
+
+        DEVNAME=/dev/loop4
+        TYPE=squashfs
+        """
+    )
+
     @mock.patch("cloudinit.subp.subp")
     def test_functional_blkid(self, m_subp):
-        m_subp.return_value = SubpResult(self.blkid_out.format(**self.ids), "")
+        m_subp.return_value = SubpResult(
+            self.blkid_export_out.format(**self.ids), ""
+        )
         self.assertEqual(self._get_expected(), util.blkid())
-        m_subp.assert_called_with(
-            ["blkid", "-o", "full"], capture=True, decode="replace"
+        m_subp.assert_called_once_with(
+            ["blkid", "-o", "export"], rcs=[0, 2], decode="replace"
+        )
+
+    @mock.patch("cloudinit.subp.subp")
+    def test_blkid_snapshot_serves_find_devs_with(self, m_subp):
+        """All devices are probed once until the snapshot is cleared."""
+        m_subp.return_value = SubpResult(
+            self.blkid_export_out.format(**self.ids), ""
+        )
+        self.assertEqual(["/dev/sda4"], util.find_devs_with("LABEL=default"))
+        self.assertEqual(
+            ["/dev/sda2", "/dev/sda3"], util.find_devs_with("TYPE=ext4")
+        )
+        self.assertEqual(
+            ["/dev/sda3"],
+            util.find_devs_with("PARTUUID=%s" % self.ids["id06"]),
         )
+        self.assertEqual([], util.find_devs_with("LABEL=cidata"))
+        self.assertEqual(9, len(util.find_devs_with()))
+        self.assertEqual(self._get_expected(), util.blkid())
+        self.assertEqual(1, m_subp.call_count)
+        util.clear_blkid_snapshot()
+        util.find_devs_with("LABEL=default")
+        self.assertEqual(2, m_subp.call_count)
 
     @mock.patch("cloudinit.subp.subp")
     def test_blkid_no_cache_uses_no_cache(self, m_subp):
@@ -3023,18 +3084,30 @@ class TestFindDevs:
     @mock.patch("cloudinit.subp.subp")
     def test_find_devs_with(self, m_subp):
         m_subp.return_value = (
-            '/dev/sda1: UUID="some-uuid" TYPE="ext4" PARTUUID="some-partid"',
+            "DEVNAME=/dev/sda1\nUUID=some-uuid\nTYPE=ext4\n"
+            "PARTUUID=some-partid\n",
             "",
         )
         devlist = util.find_devs_with()
-        assert devlist == [
-            '/dev/sda1: UUID="some-uuid" TYPE="ext4" PARTUUID="some-partid"'
-        ]
+        assert devlist == ["/dev/sda1"]
 
         devlist = util.find_devs_with("LABEL_FATBOOT=A_LABEL")
+        assert devlist == []
+
+    @mock.patch("cloudinit.subp.subp")
+    def test_find_devs_with_runs_blkid_for_other_formats(self, m_subp):
+        """Queries the blkid snapshot can't answer run blkid."""
+        m_subp.return_value = (
+            '/dev/sda1: UUID="some-uuid" TYPE="ext4" PARTUUID="some-partid"',
+            "",
+        )
+        devlist = util.find_devs_with("TYPE=ext4", oformat="full")
         assert devlist == [
             '/dev/sda1: UUID="some-uuid" TYPE="ext4" PARTUUID="some-partid"'
         ]
+        m_subp.assert_called_once_with(
+            ["blkid", "-tTYPE=ext4", "-ofull"], rcs=[0, 2]
+        )
 
     @mock.patch("cloudinit.subp.subp")
     def test_find_devs_with_openbsd(self, m_subp):
@@ -3152,6 +3225,56 @@ class TestFindDevs:
         devlist = util.find_devs_with_dragonflybsd(criteria=criteria)
         assert devlist == expected_devlist
 
+    @mock.patch("cloudinit.subp.subp")
+    @mock.patch("glob.glob")
+    def test_find_devs_with_illumos_probes_disks_once(self, m_glob, m_subp):
+        """Disks are probed once and serve all criteria until no_cache."""
+        outputs = {
+            ("fstyp", "/dev/dsk/c0t0d0p0"): "zfs\n",
+            ("fstyp", "/dev/dsk/c1t0d0p0"): "hsfs\n",
+            ("fstyp", "/dev/dsk/c2t0d0p0"): "pcfs\n",
+            ("labelit", "/dev/dsk/c1t0d0p0"): "Volume id: cidata\n",
+            ("fstyp", "-v", "/dev/dsk/c2t0d0p0"): (
+                "Bytes Per Sector  512\nVolume Label: config-2   \n"
+            ),
+        }
+
+        def fake_subp(cmd, rcs=None):
+            key = tuple(c for c in cmd if c not in ("-F", "hsfs", "zfs"))
+            if key not in outputs:
+                raise subp.ProcessExecutionError(cmd=cmd, exit_code=1)
+            return SubpResult(outputs[key], "")
+
+        m_glob.return_value = [
+            "/dev/dsk/c0t0d0p0",
+            "/dev/dsk/c1t0d0p0",
+            "/dev/dsk/c2t0d0p0",
+            "/dev/dsk/c3t0d0p0",
+        ]
+        m_subp.side_effect = fake_subp
+        util._get_illumos_devs.cache_clear()
+        try:
+            assert ["/dev/dsk/c1t0d0p0"] == util.find_devs_with_illumos(
+                "TYPE=iso9660"
+            )
+            assert ["/dev/dsk/c2t0d0p0"] == util.find_devs_with_illumos(
+                "TYPE=vfat"
+            )
+            assert ["/dev/dsk/c1t0d0p0"] == util.find_devs_with_illumos(
+                "LABEL=cidata"
+            )
+            assert ["/dev/dsk/c2t0d0p0"] == util.find_devs_with_illumos(
+                "LABEL=config-2"
+            )
+            assert [] == util.find_devs_with_illumos("LABEL=config")
+            assert 1 == m_glob.call_count
+            # fstyp for each disk, then labelit for each filesystem
+            assert 7 == m_subp.call_count
+            util.find_devs_with_illumos("LABEL=cidata", no_cache=True)
+            assert 2 == m_glob.call_count
+        finally:
+            util._get_illumos_devs.cache_clear()
+
 
 class TestVersion:
     @pytest.mark.parametrize(